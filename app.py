@@ -0,0 +1,162 @@
+import io
+import time
+
+import pandas as pd
+from flask import Flask, Response, g, jsonify, request
+
+from src.exception import CustomException
+from src.logger import REQUEST_LOGGER_NAME, logging
+from src.pipeline.micro_batcher import MicroBatcher
+from src.pipeline.predict_pipeline import FEATURE_COLUMNS, PredictPipeline, PredictPipelineConfig
+
+
+def _json_records(payload):
+    """
+    Function Name : _json_records
+    Description : This function returns the records of a JSON body: a single record object, a list of records, or an
+                  object with a "records" list. Every record is checked for the input columns and reduced to them, so
+                  records of different requests can share a batch.
+    Returns :
+        tuple: The list of records and whether the body was a single record.
+    On Failure : Raises a ValueError for any other body or a record missing input columns.
+    """
+
+    if isinstance(payload, dict) and isinstance(payload.get("records"), list):
+        records, single = payload["records"], False
+    elif isinstance(payload, dict):
+        records, single = [payload], True
+    elif isinstance(payload, list):
+        records, single = payload, False
+    else:
+        records = None
+
+    if records is None or not all(isinstance(record, dict) for record in records):
+        raise ValueError("Expected a JSON record, a list of records or {\"records\": [...]}")
+
+    for position, record in enumerate(records):
+        missing_columns = [column for column in FEATURE_COLUMNS if column not in record]
+        if missing_columns:
+            raise ValueError(f"Record {position} is missing input columns: {missing_columns}")
+
+    return [{column: record[column] for column in FEATURE_COLUMNS} for record in records], single
+
+
+def _root_cause(error):
+    """
+    Function Name : _root_cause
+    Description : This function returns the error a chain of CustomException wraps, i.e. the first exception raised.
+    Returns :
+        Exception: The innermost exception of the chain that is not a CustomException, or the error itself.
+    """
+
+    cause = error
+    while isinstance(cause, CustomException):
+        inner = cause.__cause__ or cause.__context__
+        if inner is None:
+            break
+        cause = inner
+
+    return cause
+
+
+def create_app(predict_pipeline_config=None, batcher_config=None):
+    """
+    Function Name : create_app
+    Description : This function builds the Flask app. The model and preprocessor are loaded at startup and replaced
+                  in the background when the training pipeline publishes new ones, requests to /predict are merged
+                  into vectorized batches by a MicroBatcher, and /predict/bulk scores a whole JSON or CSV payload in
+                  one call.
+    Parameters :
+        predict_pipeline_config (PredictPipelineConfig, optional): The artifact and prediction settings.
+        batcher_config (MicroBatcherConfig, optional): The batching limits.
+    Returns :
+        Flask: The configured app.
+    """
+
+    app = Flask(__name__)
+
+    predict_pipeline = PredictPipeline(predict_pipeline_config or PredictPipelineConfig())
+    predict_pipeline.load()
+    predict_pipeline.start_hot_reload()
+
+    batcher = MicroBatcher(lambda records: predict_pipeline.predict(records).tolist(), batcher_config)
+    app.extensions["predict_pipeline"] = predict_pipeline
+    app.extensions["micro_batcher"] = batcher
+
+    request_logger = logging.getLogger(REQUEST_LOGGER_NAME)
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        # One event per request; sampled / rate limited with LOG_MODE=queue, off in the synchronous file mode
+        if request_logger.isEnabledFor(logging.INFO):
+            request_logger.info("request", extra={
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - g.request_start) * 1000, 3),
+            })
+        return response
+
+    @app.errorhandler(ValueError)
+    @app.errorhandler(CustomException)
+    def bad_request(error):
+        # Invalid input surfaces as a ValueError, possibly wrapped in CustomExceptions whose message carries the
+        # server file paths: only the original message goes back to the client
+        cause = _root_cause(error)
+        if isinstance(cause, ValueError) and not isinstance(cause, CustomException):
+            return jsonify({"error": str(cause)}), 400
+
+        logging.exception(f"Error while serving {request.method} {request.path}")
+        return jsonify({"error": "Internal server error"}), 500
+
+    @app.get("/health")
+    def health():
+        return jsonify({"status": "ok"})
+
+    @app.post("/predict")
+    def predict():
+        records, single = _json_records(request.get_json(force=True))
+        if not records:
+            raise ValueError("No records to score")
+
+        predictions = batcher.predict(records)
+        if single:
+            return jsonify({"prediction": predictions[0]})
+        return jsonify({"predictions": predictions})
+
+    @app.post("/predict/bulk")
+    def predict_bulk():
+        uploaded = request.files.get("file")
+        if uploaded is not None or request.mimetype == "text/csv":
+            df = pd.read_csv(uploaded if uploaded is not None else io.BytesIO(request.get_data()))
+            if df.empty:
+                raise ValueError("No records to score")
+
+            df["prediction"] = predict_pipeline.predict(df)
+            return Response(df.to_csv(index=False), mimetype="text/csv")
+
+        records, _ = _json_records(request.get_json(force=True))
+        if not records:
+            raise ValueError("No records to score")
+
+        return jsonify({"predictions": predict_pipeline.predict(records).tolist()})
+
+    @app.get("/stats")
+    def stats():
+        return jsonify({
+            "batcher": batcher.stats(),
+            "prediction_cache": predict_pipeline.cache_stats(),
+            "model": predict_pipeline.reload_stats(),
+        })
+
+    logging.info("Prediction app ready")
+
+    return app
+
+
+if __name__ == "__main__":
+    create_app().run(host="0.0.0.0", port=5000, threaded=True)
@@ -0,0 +1,364 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from importlib import metadata
+from multiprocessing import get_context
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Libraries whose versions are recorded with every result, read from their metadata without importing them
+TRACKED_PACKAGES = ("numpy", "pandas", "scikit-learn", "xgboost", "catboost", "pyarrow", "joblib")
+
+# Relative change of a metric that compare_results reports as a regression or an improvement
+COMPARE_THRESHOLD = 0.10
+
+
+@dataclass
+class BenchmarkConfig:
+    """
+    Class Name : BenchmarkConfig
+    Description : This class holds the configuration of a benchmark run.
+    Attributes :
+        sizes (tuple): The numbers of synthetic rows to benchmark, each in its own process.
+        models (tuple): The MODEL_REGISTRY candidates fit by evaluate_models, None for all of them.
+        full_grid (bool): Whether evaluate_models searches the registered grids instead of the default parameters.
+        search (str): The search strategy passed to evaluate_models.
+        n_jobs (int): The CPU budget passed to evaluate_models.
+        max_train_rows (int): The training rows the models are fit on; larger training sets are subsampled.
+        streaming_rows (int): The size from which ingestion runs in streaming mode.
+        latency_samples (int): The number of single-row and batch predictions timed.
+        batch_size (int): The number of rows of a batch prediction.
+        seed (int): The seed of the synthetic data.
+        output_dir (str): The directory the JSON result files are written to.
+    """
+
+    sizes: Tuple[int, ...] = (10_000, 100_000, 1_000_000)
+    models: Optional[Tuple[str, ...]] = None
+    full_grid: bool = False
+    search: str = "grid"
+    n_jobs: int = 1
+    max_train_rows: int = 200_000
+    streaming_rows: int = 2_000_000
+    latency_samples: int = 200
+    batch_size: int = 1_000
+    seed: int = 42
+    output_dir: str = os.path.join("benchmarks", "results")
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+
+
+@contextmanager
+def measure(results, name, **extra):
+    """
+    Function Name : measure
+    Description : This context manager records the wall time, CPU time and peak RSS of the block under results[name].
+                  The peak RSS is the process peak at the end of the block, every size runs in a fresh process.
+    Parameters :
+        results (dict): The stage results being filled.
+        name (str): The stage name.
+        extra: Additional values stored with the stage.
+    """
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    record = dict(extra)
+    results[name] = record
+    yield record
+    record.update(
+        wall_time=time.perf_counter() - wall_start,
+        cpu_time=time.process_time() - cpu_start,
+        peak_rss_mb=peak_rss_mb(),
+    )
+
+
+def latency_summary(timings):
+    """
+    Function Name : latency_summary
+    Description : This function summarizes latencies measured in seconds.
+    Parameters :
+        timings (list): The measured latencies.
+    Returns :
+        dict: The p50, p99 and mean latencies in milliseconds.
+    """
+
+    timings_ms = np.asarray(timings) * 1000
+    return {
+        "p50_ms": float(np.percentile(timings_ms, 50)),
+        "p99_ms": float(np.percentile(timings_ms, 99)),
+        "mean_ms": float(timings_ms.mean()),
+    }
+
+
+def time_calls(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return latency_summary(timings)
+
+
+def benchmark_size(n_rows, config):
+    """
+    Function Name : benchmark_size
+    Description : This function benchmarks the pipeline on n_rows synthetic records in a temporary directory:
+                  data generation, DataIngestion, DataTransformation, the fit of every candidate in evaluate_models,
+                  artifact save/load, the model export and single-row / batch inference latency with the fast path,
+                  the DataFrame path and the compiled model.
+    Parameters :
+        n_rows (int): The number of synthetic rows.
+        config (BenchmarkConfig): The benchmark configuration.
+    Returns :
+        dict: The measurements of every stage.
+    """
+
+    # Imported here so that every size pays its own cold imports in its own process
+    from benchmarks.synthetic_data import write_student_data
+    from src.components.data_ingestion import DataIngestion
+    from src.components.data_transformation import DataTransformation
+    from src.components.model_exporter import ModelExporter
+    from src.components.model_registry import MODEL_REGISTRY, create_model, get_param_grid
+    from src.pipeline.predict_pipeline import FEATURE_COLUMNS, PredictPipeline, PredictPipelineConfig
+    from src.utils import evaluate_models, load_object, read_frame, save_object
+
+    work_dir = tempfile.mkdtemp(prefix=f"benchmark_{n_rows}_")
+    stages = {}
+
+    try:
+        source_path = os.path.join(work_dir, "source.parquet")
+        with measure(stages, "generate", rows=n_rows):
+            write_student_data(source_path, n_rows, seed=config.seed)
+
+        data_ingestion = DataIngestion()
+        ingestion_config = data_ingestion.ingestion_config
+        ingestion_config.source_data_path = source_path
+        ingestion_config.raw_data_path = os.path.join(work_dir, "data.parquet")
+        ingestion_config.train_data_path = os.path.join(work_dir, "train.parquet")
+        ingestion_config.test_data_path = os.path.join(work_dir, "test.parquet")
+        ingestion_config.streaming = n_rows >= config.streaming_rows
+        # Only the binary artifacts the pipeline reads are timed, not the CSV copies kept for older readers
+        ingestion_config.export_csv = False
+
+        with measure(stages, "ingestion", rows=n_rows, streaming=ingestion_config.streaming):
+            train_path, test_path = data_ingestion.initiate_data_ingestion()
+
+        data_transformation = DataTransformation()
+        transformation_config = data_transformation.data_transformation_config
+        transformation_config.preprocessor_obj_file_path = os.path.join(work_dir, "preprocessor.pkl")
+        transformation_config.train_arr_file_path = os.path.join(work_dir, "train_arr.npy")
+        transformation_config.test_arr_file_path = os.path.join(work_dir, "test_arr.npy")
+
+        with measure(stages, "transformation", rows=n_rows):
+            train_arr, test_arr, preprocessor_path = data_transformation.initiate_data_transformation(
+                train_path, test_path
+            )
+
+        # Model fits: subsample the training rows so the largest sizes stay tractable
+        rng = np.random.default_rng(config.seed)
+        if len(train_arr) > config.max_train_rows:
+            train_arr = train_arr[rng.choice(len(train_arr), config.max_train_rows, replace=False)]
+        X_train, y_train, X_test, y_test = train_arr[:, :-1], train_arr[:, -1], test_arr[:, :-1], test_arr[:, -1]
+
+        names = config.models or tuple(MODEL_REGISTRY)
+        models = {name: create_model(name) for name in names}
+        params = {name: get_param_grid(name) if config.full_grid else {} for name in names}
+
+        with measure(stages, "training", train_rows=len(y_train), test_rows=len(y_test)) as training:
+            report = evaluate_models(X_train, y_train, X_test, y_test, models, params,
+                                     n_jobs=config.n_jobs, search=config.search)
+        training["models"] = {
+            name: {key: report[name][key] for key in
+                   ("test_score", "n_fits", "search_time", "refit_time", "predict_time", "total_time")}
+            for name in names
+        }
+
+        best_name = max(report, key=lambda name: report[name]["test_score"])
+        model_path = os.path.join(work_dir, "model.pkl")
+
+        artifacts = stages["artifacts"] = {"model": best_name}
+        with measure(artifacts, "save_model"):
+            save_object(model_path, models[best_name])
+        with measure(artifacts, "load_model"):
+            load_object(model_path)
+        with measure(artifacts, "load_model_mmap"):
+            load_object(model_path, mmap_mode="r")
+        with measure(artifacts, "load_preprocessor"):
+            load_object(preprocessor_path)
+        artifacts["model_bytes"] = os.path.getsize(model_path)
+
+        model_exporter = ModelExporter()
+        compiled_model_path = model_exporter.model_exporter_config.compiled_model_file_path = os.path.join(
+            work_dir, "compiled_model.pkl"
+        )
+        with measure(artifacts, "export_model") as export:
+            export.update(model_exporter.initiate_model_export(model_path, preprocessor_path, test_path))
+        with measure(artifacts, "load_compiled_model"):
+            load_object(compiled_model_path)
+        artifacts["compiled_model_bytes"] = os.path.getsize(compiled_model_path)
+
+        test_df = read_frame(test_path)
+        records = test_df[FEATURE_COLUMNS].head(max(config.latency_samples, config.batch_size)).to_dict("records")
+        batch_df = test_df[FEATURE_COLUMNS].head(config.batch_size)
+
+        inference = stages["inference"] = {"model": best_name, "batch_size": len(batch_df)}
+        for name, fast_path, use_compiled_model in (("fast_path", True, False), ("dataframe", False, False),
+                                                    ("compiled", True, True)):
+            predict_pipeline = PredictPipeline(PredictPipelineConfig(
+                model_file_path=model_path, preprocessor_file_path=preprocessor_path, fast_path=fast_path,
+                compiled_model_file_path=compiled_model_path, use_compiled_model=use_compiled_model
+            ))
+            predict_pipeline.predict(records[0])
+            rows = iter(records * (config.latency_samples // len(records) + 1))
+            batch = records[:config.batch_size] if fast_path else batch_df
+
+            inference[name] = {
+                "single_row": time_calls(lambda: predict_pipeline.predict(next(rows)), config.latency_samples),
+                "batch": time_calls(lambda: predict_pipeline.predict(batch), max(10, config.latency_samples // 10)),
+            }
+
+        stages["peak_rss_mb"] = peak_rss_mb()
+        return stages
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def environment_metadata():
+    """
+    Function Name : environment_metadata
+    Description : This function describes where the benchmark ran, so results of different commits can be compared.
+    Returns :
+        dict: The git commit, timestamp, Python and platform details, CPU count and library versions.
+    """
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                                    text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+
+    versions = {}
+    for package in TRACKED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+    }
+
+
+def run_benchmarks(config):
+    """
+    Function Name : run_benchmarks
+    Description : This function benchmarks every configured size in a fresh process, so cold imports and peak RSS are
+                  measured per size, and writes the results to a JSON file.
+    Parameters :
+        config (BenchmarkConfig): The benchmark configuration.
+    Returns :
+        tuple: The results dict and the path of the JSON file.
+    """
+
+    results = {"meta": environment_metadata(), "config": asdict(config), "sizes": {}}
+
+    for n_rows in config.sizes:
+        print(f"Benchmarking {n_rows} rows", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            results["sizes"][str(n_rows)] = executor.submit(benchmark_size, n_rows, config).result()
+
+    os.makedirs(config.output_dir, exist_ok=True)
+    file_name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{results['meta']['commit'] or 'nogit'}.json"
+    output_path = os.path.join(config.output_dir, file_name)
+    with open(output_path, "w") as file_obj:
+        json.dump(results, file_obj, indent=2)
+
+    return results, output_path
+
+
+def _flatten(tree, prefix=""):
+    for key, value in tree.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare_results(baseline, current, threshold=COMPARE_THRESHOLD):
+    """
+    Function Name : compare_results
+    Description : This function lists the timings and memory measurements that changed by more than threshold between
+                  two result files. Scores and row counts are skipped.
+    Parameters :
+        baseline (dict): The results of the reference commit.
+        current (dict): The results to check.
+        threshold (float): The relative change reported.
+    Returns :
+        list: (metric, baseline value, current value, relative change) tuples, largest change first.
+    """
+
+    baseline_metrics = dict(_flatten(baseline["sizes"]))
+    changes = []
+    for name, value in _flatten(current["sizes"]):
+        if not name.endswith(("_time", "_ms", "_mb", "_bytes")) or not baseline_metrics.get(name):
+            continue
+        change = value / baseline_metrics[name] - 1
+        if abs(change) > threshold:
+            changes.append((name, baseline_metrics[name], value, change))
+
+    return sorted(changes, key=lambda item: -abs(item[3]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the training and serving pipeline on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BenchmarkConfig.sizes))
+    parser.add_argument("--models", nargs="+", help="MODEL_REGISTRY names to fit, default all")
+    parser.add_argument("--full-grid", action="store_true", help="search the registered grids")
+    parser.add_argument("--search", default=BenchmarkConfig.search)
+    parser.add_argument("--n-jobs", type=int, default=BenchmarkConfig.n_jobs)
+    parser.add_argument("--max-train-rows", type=int, default=BenchmarkConfig.max_train_rows)
+    parser.add_argument("--output-dir", default=BenchmarkConfig.output_dir)
+    parser.add_argument("--compare", help="a previous result file to compare against")
+    args = parser.parse_args()
+
+    config = BenchmarkConfig(
+        sizes=tuple(args.sizes),
+        models=tuple(args.models) if args.models else None,
+        full_grid=args.full_grid,
+        search=args.search,
+        n_jobs=args.n_jobs,
+        max_train_rows=args.max_train_rows,
+        output_dir=args.output_dir,
+    )
+    results, output_path = run_benchmarks(config)
+    print(f"Results written to {output_path}")
+
+    if args.compare:
+        with open(args.compare) as file_obj:
+            baseline = json.load(file_obj)
+        for name, before, after, change in compare_results(baseline, results):
+            print(f"{name}: {before:.4g} -> {after:.4g} ({change:+.0%})")
@@ -0,0 +1,13 @@
+// Appends the listings of <template id="lazy-listings"> shortly after the page is scrolled to the bottom, the way the
+// results pages load their last cards, so the crawler has to scroll and wait for the page to settle to see them all
+(() => {
+    const template = document.getElementById("lazy-listings");
+    let loaded = false;
+    window.addEventListener("scroll", () => {
+        if (loaded || window.innerHeight + window.scrollY < document.body.scrollHeight - 200) {
+            return;
+        }
+        loaded = true;
+        setTimeout(() => document.getElementById("results").appendChild(template.content.cloneNode(true)), 300);
+    });
+})();
@@ -0,0 +1,328 @@
+import argparse
+import csv
+import functools
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urljoin
+
+from src.components.scrape_data import CARD_SELECTOR, FIELD_SELECTORS, FIELDNAMES, ListingIndex
+
+# Static results pages served to the crawler: page-N.html, the last one without listings
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scraper_fixtures")
+PAGE_URL_TEMPLATE = "{base_url}/page-{page}.html"
+
+# The listing whose price the incremental crawl expects to see changed
+CHANGED_PAGE = 1
+CHANGED_PRICE = ("KSh 28 000", "KSh 30 000")
+
+
+@dataclass
+class ScraperHarnessConfig:
+    """
+    Class Name : ScraperHarnessConfig
+    Description : This class holds the configuration of the scraper harness.
+    Attributes :
+        fixture_dir (str): The directory of the static results pages.
+        interrupt_page (int): The page whose request is held while the first crawl is interrupted, so the pages
+                              before it are committed and the ones from it on are not.
+        concurrency (int): The number of browser contexts of every crawl.
+        timeout (float): The number of seconds a crawl, or the wait for a page request, may take.
+        keep_dir (str, optional): A directory to keep the output CSVs and the SQLite index in, None for a temporary
+                                  directory removed at the end.
+    """
+
+    fixture_dir: str = FIXTURE_DIR
+    interrupt_page: int = 3
+    concurrency: int = 2
+    timeout: float = 120.0
+    keep_dir: Optional[str] = None
+
+
+class FixtureRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Class Name : FixtureRequestHandler
+    Description : This class serves the fixture directory. The request of the server's hold_page is held until the
+                  server releases it and then dropped without an answer, so the crawl interrupted meanwhile never
+                  gets to commit that page.
+    """
+
+    def do_GET(self):
+        server = self.server
+        if server.hold_page is not None and self.path == f"/page-{server.hold_page}.html":
+            server.held.set()
+            server.release.wait()
+            self.close_connection = True
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server(fixture_dir):
+    """
+    Function Name : start_fixture_server
+    Description : This function serves a fixture directory over HTTP on a free localhost port, from a daemon thread.
+    Parameters :
+        fixture_dir (str): The directory to serve.
+    Returns :
+        ThreadingHTTPServer: The running server, with hold_page (None), held and release (threading.Event).
+    """
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(FixtureRequestHandler, directory=fixture_dir))
+    server.daemon_threads = True
+    server.hold_page = None
+    server.held = threading.Event()
+    server.release = threading.Event()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class ListingParser(HTMLParser):
+    """
+    Class Name : ListingParser
+    Description : This class reads the listing cards of a fixture page, including the ones lazy.js appends after a
+                  scroll, with the fields the crawler is expected to extract from them.
+    """
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+        self.listings = []
+        self._card_class = CARD_SELECTOR.lstrip(".")
+        self._field_classes = {name: set(selector.strip(".").split(".")) for name, selector in FIELD_SELECTORS.items()}
+        self._card = None
+        self._field = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = set((attrs.get("class") or "").split())
+        if self._card_class in classes:
+            self._card = {name: None for name in FIELDNAMES}
+            self.listings.append(self._card)
+        elif self._card is not None:
+            if tag == "a" and self._card["url"] is None:
+                self._card["url"] = urljoin(self.base_url, attrs.get("href"))
+            for name, field_classes in self._field_classes.items():
+                if field_classes <= classes:
+                    self._field = name
+                    self._card[name] = ""
+
+    def handle_endtag(self, tag):
+        if tag == "span":
+            self._field = None
+
+    def handle_data(self, data):
+        if self._field is not None:
+            self._card[self._field] = (self._card[self._field] + data).strip()
+
+
+def expected_listings(fixture_dir, base_url):
+    """
+    Function Name : expected_listings
+    Description : This function lists the listings of every fixture page, in page and card order.
+    Parameters :
+        fixture_dir (str): The directory of the fixture pages.
+        base_url (str): The URL the pages are served from, to resolve the listing links.
+    Returns :
+        dict: The page numbers mapped to their listings, one dict of FIELDNAMES per card.
+    """
+
+    pages = {}
+    page_num = 1
+    while os.path.exists(os.path.join(fixture_dir, f"page-{page_num}.html")):
+        parser = ListingParser(base_url + "/")
+        with open(os.path.join(fixture_dir, f"page-{page_num}.html"), encoding="utf-8") as file_obj:
+            parser.feed(file_obj.read())
+        pages[page_num] = parser.listings
+        page_num += 1
+
+    return pages
+
+
+def read_index(index_path):
+    """
+    Function Name : read_index
+    Description : This function reads the ListingIndex SQLite file of a crawl.
+    Parameters :
+        index_path (str): The SQLite file.
+    Returns :
+        tuple: The content hashes of the indexed listings by URL, and the crawl checkpoint.
+    """
+
+    index = ListingIndex(index_path)
+    try:
+        hashes = dict(index.connection.execute("SELECT url, content_hash FROM listings"))
+        return hashes, index.load_checkpoint()
+    finally:
+        index.close()
+
+
+def read_rows(output_file):
+    with open(output_file, newline="", encoding="utf-8") as file_obj:
+        return [{name: row[name] or None for name in FIELDNAMES} for row in csv.DictReader(file_obj)]
+
+
+def expect(condition, message):
+    if not condition:
+        raise AssertionError(message)
+
+
+def crawl_command(base_url, work_dir, output_file, concurrency, *extra_args):
+    # The crawl goes through the CLI with the page URL template pointed at the fixture server
+    return [
+        sys.executable, "-m", "src.components.scrape_data", "--async",
+        "--base-url", base_url,
+        "--page-url-template", PAGE_URL_TEMPLATE,
+        "--concurrency", str(concurrency),
+        "--min-delay", "0",
+        "--max-delay", "0",
+        "--output-file", os.path.join(work_dir, output_file),
+        "--index-path", os.path.join(work_dir, "index.sqlite"),
+        *extra_args,
+    ]
+
+
+def run_harness(config=None):
+    """
+    Function Name : run_harness
+    Description : This function crawls the static fixture pages served on localhost with the async scraper in three
+                  runs and checks the output CSV and the SQLite ListingIndex after each one:
+                  1. a crawl interrupted with SIGINT while the request of interrupt_page is held: the pages before it
+                     are committed, the checkpoint still says "running";
+                  2. the same crawl with --resume: it continues after the last committed page, every listing of the
+                     fixtures is in the CSV exactly once with the fields of its card, and the crawl is "complete";
+                  3. an --incremental crawl after the price of one listing changed: only that listing is written, its
+                     hash is updated in the index, and the crawl stops after the first page.
+    Parameters :
+        config (ScraperHarnessConfig, optional): The harness configuration.
+    Returns :
+        dict: The duration and the CSV rows written of every run.
+    On Failure : Raises an AssertionError naming the first check that failed.
+    """
+
+    config = config or ScraperHarnessConfig()
+    work_dir = config.keep_dir or tempfile.mkdtemp(prefix="scraper_harness_")
+    fixture_dir = os.path.join(work_dir, "fixtures")
+    shutil.copytree(config.fixture_dir, fixture_dir, dirs_exist_ok=True)
+    index_path = os.path.join(work_dir, "index.sqlite")
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    server = start_fixture_server(fixture_dir)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    pages = expected_listings(fixture_dir, base_url)
+    last_page = max(page_num for page_num, listings in pages.items() if listings)
+    listings = [listing for page_num in sorted(pages) for listing in pages[page_num]]
+    committed = [listing for page_num in range(1, config.interrupt_page) for listing in pages[page_num]]
+    results = {}
+
+    try:
+        # 1. Interrupt the crawl once the pages before interrupt_page are committed
+        server.hold_page = config.interrupt_page
+        start = time.perf_counter()
+        process = subprocess.Popen(crawl_command(base_url, work_dir, "listings.csv", config.concurrency))
+        try:
+            expect(server.held.wait(config.timeout), f"The crawl never requested page {config.interrupt_page}")
+            deadline = time.perf_counter() + config.timeout
+            while read_index(index_path)[1].get("last_page") != config.interrupt_page - 1:
+                expect(time.perf_counter() < deadline, f"Page {config.interrupt_page - 1} was never committed")
+                time.sleep(0.1)
+            process.send_signal(signal.SIGINT)
+            server.release.set()
+            returncode = process.wait(config.timeout)
+        finally:
+            server.hold_page = None
+            server.release.set()
+            if process.poll() is None:
+                process.kill()
+
+        hashes, checkpoint = read_index(index_path)
+        expect(returncode != 0, "The interrupted crawl exited cleanly")
+        expect(checkpoint.get("status") == "running", f"The interrupted crawl is marked {checkpoint.get('status')}")
+        expect(set(hashes) == {listing["url"] for listing in committed},
+               f"The index holds {len(hashes)} listings after the interruption, expected {len(committed)}")
+        expect([row["url"] for row in read_rows(os.path.join(work_dir, "listings.csv"))] == [row["url"] for row in committed],
+               "The CSV of the interrupted crawl does not hold exactly the committed pages")
+        results["interrupted"] = {"seconds": time.perf_counter() - start, "rows": len(committed)}
+
+        # 2. Resume it: every listing is written once, with the fields of its card
+        start = time.perf_counter()
+        subprocess.run(crawl_command(base_url, work_dir, "listings.csv", config.concurrency, "--resume"),
+                       check=True, timeout=config.timeout)
+
+        hashes, checkpoint = read_index(index_path)
+        rows = read_rows(os.path.join(work_dir, "listings.csv"))
+        expect(checkpoint.get("status") == "complete", f"The resumed crawl is marked {checkpoint.get('status')}")
+        expect(checkpoint.get("last_page") == last_page,
+               f"The resumed crawl stopped after page {checkpoint.get('last_page')}, expected {last_page}")
+        expect(set(hashes) == {listing["url"] for listing in listings},
+               f"The index holds {len(hashes)} listings after the resumed crawl, expected {len(listings)}")
+        for listing in listings:
+            expect(hashes[listing["url"]] == ListingIndex.content_hash(listing),
+                   f"The index hash of {listing['url']} does not match its card")
+        expect(rows == listings, "The CSV of the resumed crawl differs from the fixture listings "
+                                 f"({len(rows)} rows, {len(listings)} listings)")
+        results["resumed"] = {"seconds": time.perf_counter() - start, "rows": len(rows) - len(committed)}
+
+        # 3. Change one price and crawl incrementally: only that listing is written
+        page_path = os.path.join(fixture_dir, f"page-{CHANGED_PAGE}.html")
+        with open(page_path, encoding="utf-8") as file_obj:
+            html = file_obj.read()
+        expect(CHANGED_PRICE[0] in html, f"No listing of page {CHANGED_PAGE} costs {CHANGED_PRICE[0]}")
+        with open(page_path, "w", encoding="utf-8") as file_obj:
+            file_obj.write(html.replace(CHANGED_PRICE[0], CHANGED_PRICE[1], 1))
+        changed = next(listing for listing in expected_listings(fixture_dir, base_url)[CHANGED_PAGE]
+                       if listing["price"] == CHANGED_PRICE[1])
+
+        start = time.perf_counter()
+        subprocess.run(crawl_command(base_url, work_dir, "changes.csv", config.concurrency, "--incremental"),
+                       check=True, timeout=config.timeout)
+
+        hashes, checkpoint = read_index(index_path)
+        rows = read_rows(os.path.join(work_dir, "changes.csv"))
+        expect(rows == [changed], f"The incremental crawl wrote {len(rows)} rows, expected the changed listing only")
+        expect(hashes[changed["url"]] == ListingIndex.content_hash(changed),
+               "The index still holds the old hash of the changed listing")
+        expect(checkpoint.get("status") == "complete" and checkpoint.get("last_page") == CHANGED_PAGE,
+               f"The incremental crawl stopped after page {checkpoint.get('last_page')}, expected {CHANGED_PAGE}")
+        results["incremental"] = {"seconds": time.perf_counter() - start, "rows": len(rows)}
+
+        return results
+
+    finally:
+        server.shutdown()
+        server.server_close()
+        if config.keep_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Crawl the static fixture pages on localhost, interrupt, resume and re-crawl incrementally."
+    )
+    parser.add_argument("--interrupt-page", type=int, default=ScraperHarnessConfig.interrupt_page)
+    parser.add_argument("--concurrency", type=int, default=ScraperHarnessConfig.concurrency)
+    parser.add_argument("--timeout", type=float, default=ScraperHarnessConfig.timeout)
+    parser.add_argument("--keep-dir", help="keep the CSVs and the index in this directory")
+    args = parser.parse_args()
+
+    results = run_harness(ScraperHarnessConfig(
+        interrupt_page=args.interrupt_page,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        keep_dir=args.keep_dir,
+    ))
+    for name, result in results.items():
+        print(f"{name}: {result['rows']} rows in {result['seconds']:.1f}s")
+    print("All scraper checks passed")
@@ -0,0 +1,158 @@
+import argparse
+import os
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import FrameChunkWriter, read_frame
+
+CATEGORICAL_COLUMNS = ["gender", "race_ethnicity", "parental_level_of_education", "lunch", "test_preparation_course"]
+SCORE_COLUMNS = ["math_score", "reading_score", "writing_score"]
+
+# Column order of data/stud.csv
+STUDENT_COLUMNS = CATEGORICAL_COLUMNS + SCORE_COLUMNS
+
+
+@dataclass
+class StudentDataProfile:
+    """
+    Class Name : StudentDataProfile
+    Description : This class holds the statistics the synthetic generator samples from, fitted on the reference
+                  dataset: the frequency of every category, the mean and covariance of the reading and writing scores,
+                  and a linear model of the math score on the categories and the two other scores with the standard
+                  deviation of its residuals. Categories are drawn independently, so the marginal distributions match
+                  the reference and the math score keeps the signal the candidate models learn.
+    Attributes :
+        categories (dict): The categories of every categorical column.
+        frequencies (dict): The relative frequency of every category, in the same order.
+        score_mean (numpy.ndarray): The mean of the reading and writing scores.
+        score_cov (numpy.ndarray): The covariance of the reading and writing scores.
+        math_coef (numpy.ndarray): The intercept, one coefficient per non-reference category and the reading and
+                                   writing coefficients of the math score model.
+        math_residual_std (float): The standard deviation of the math score model residuals.
+    """
+
+    categories: dict
+    frequencies: dict
+    score_mean: np.ndarray
+    score_cov: np.ndarray
+    math_coef: np.ndarray
+    math_residual_std: float
+
+    @staticmethod
+    def _design_matrix(categories, df):
+        blocks = [np.ones((len(df), 1))]
+        for column in CATEGORICAL_COLUMNS:
+            # The first category of every column is the reference level
+            codes = pd.Categorical(df[column], categories=categories[column]).codes
+            blocks.append(np.eye(len(categories[column]))[codes][:, 1:])
+        blocks.append(df[["reading_score", "writing_score"]].to_numpy(dtype=np.float64))
+
+        return np.hstack(blocks)
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Method Name : from_frame
+        Description : This method fits the profile on a reference DataFrame with the columns of data/stud.csv.
+        Parameters :
+            df (pandas.DataFrame): The reference data.
+        Returns : A StudentDataProfile.
+        """
+
+        categories, frequencies = {}, {}
+        for column in CATEGORICAL_COLUMNS:
+            counts = df[column].astype(str).value_counts().sort_index()
+            categories[column] = list(counts.index)
+            frequencies[column] = (counts / counts.sum()).to_numpy()
+
+        scores = df[["reading_score", "writing_score"]].to_numpy(dtype=np.float64)
+        X = cls._design_matrix(categories, df)
+        y = df["math_score"].to_numpy(dtype=np.float64)
+        math_coef, *_ = np.linalg.lstsq(X, y, rcond=None)
+
+        return cls(
+            categories=categories,
+            frequencies=frequencies,
+            score_mean=scores.mean(axis=0),
+            score_cov=np.cov(scores, rowvar=False),
+            math_coef=math_coef,
+            math_residual_std=float(np.std(y - X @ math_coef)),
+        )
+
+    def sample(self, n_rows, rng):
+        """
+        Method Name : sample
+        Description : This method draws synthetic rows. Scores are rounded to integers and clipped to [0, 100].
+        Parameters :
+            n_rows (int): The number of rows.
+            rng (numpy.random.Generator): The random generator.
+        Returns : A pandas DataFrame with the columns of data/stud.csv.
+        """
+
+        df = pd.DataFrame({
+            column: np.asarray(self.categories[column], dtype=object)[
+                rng.choice(len(self.categories[column]), size=n_rows, p=self.frequencies[column])
+            ]
+            for column in CATEGORICAL_COLUMNS
+        })
+
+        scores = rng.multivariate_normal(self.score_mean, self.score_cov, size=n_rows)
+        df["reading_score"], df["writing_score"] = scores[:, 0], scores[:, 1]
+
+        math_score = self._design_matrix(self.categories, df) @ self.math_coef
+        df["math_score"] = math_score + rng.normal(0.0, self.math_residual_std, size=n_rows)
+
+        for column in SCORE_COLUMNS:
+            df[column] = np.clip(np.rint(df[column]), 0, 100).astype(np.int64)
+
+        return df[STUDENT_COLUMNS]
+
+
+def write_student_data(file_path, n_rows, seed=42, chunk_size=1_000_000, reference_path=os.path.join("data", "stud.csv")):
+    """
+    Function Name : write_student_data
+    Description : This function writes n_rows synthetic student records to a CSV or Parquet file, chunk by chunk so
+                  that 10M rows never have to be held in memory. Chunk i is drawn from a generator seeded with
+                  (seed, i), so a file is reproducible for a given seed and chunk size.
+    Parameters :
+        file_path (str): The output file; the format follows the extension.
+        n_rows (int): The number of rows to write.
+        seed (int): The random seed.
+        chunk_size (int): The number of rows generated and written at a time.
+        reference_path (str): The dataset the distributions are fitted on.
+    Returns :
+        str: The output file path.
+    On Failure : Raises a CustomException if any error occurs during the process.
+    """
+
+    try:
+        profile = StudentDataProfile.from_frame(read_frame(reference_path))
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+
+        with FrameChunkWriter(file_path) as writer:
+            for chunk_index, start in enumerate(range(0, n_rows, chunk_size)):
+                rng = np.random.default_rng([seed, chunk_index])
+                writer.write(profile.sample(min(chunk_size, n_rows - start), rng))
+
+        logging.info(f"Wrote {n_rows} synthetic student records to {file_path}")
+
+        return file_path
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic student records shaped like data/stud.csv.")
+    parser.add_argument("output", help="the .csv or .parquet file to write")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(write_student_data(args.output, args.rows, seed=args.seed, chunk_size=args.chunk_size))
@@ -2,32 +2,61 @@ import os
 import sys
 from src.exception import CustomException
 from src.logger import logging
-import pandas as pd
+from src.profiling import profile_stage
+from src.utils import FrameChunkWriter, iter_frame_chunks, read_frame, write_frame
 
-from sklearn.model_selection import train_test_split
+import numpy as np
+import pandas as pd
 from dataclasses import dataclass
-
-from src.components.data_transformation import DataTransformation
-from src.components.data_transformation import DataTransformationConfig
-from src.components.model_trainer import ModelTrainer
-from src.components.model_trainer import ModelTrainerConfig
+from typing import Optional, Tuple
 
 @dataclass
 class DataIngestionConfig:
     """
     Class Name : DataIngestionConfig
     Description : This class holds the configuration for data ingestion, including file paths for training, testing,
-                  and raw data.
+                  and raw data. The artifact format follows the file extension: .parquet (default) and .feather are
+                  binary columnar formats with typed categoricals, .csv is plain text.
     
     Attributes :
         train_data_path (str): The file path where the training data will be saved.
         test_data_path (str): The file path where the testing data will be saved.
         raw_data_path (str): The file path where the raw data will be saved.
+        source_data_path (str): The file path of the source dataset.
+        export_csv (bool): Whether to also export the raw, train and test data as CSV next to the binary artifacts.
+                           On by default, so the committed artifacts/*.csv stay in step with the Parquet splits
+                           until their readers move to Parquet.
+        test_size (float): The fraction of rows assigned to the test split.
+        streaming (bool): Whether to read the source in chunks and split rows by a hash of their key instead of
+                          loading the whole file (out-of-core mode, for CSV and Parquet).
+        chunk_size (int): The number of source rows read at a time in streaming mode.
+        row_key_columns (tuple): The columns hashed to assign a row to a split in streaming mode, None for all columns.
     """
 
-    train_data_path: str=os.path.join('artifacts',"train.csv")
-    test_data_path: str=os.path.join('artifacts',"test.csv")
-    raw_data_path: str=os.path.join('artifacts',"data.csv")
+    train_data_path: str=os.path.join('artifacts',"train.parquet")
+    test_data_path: str=os.path.join('artifacts',"test.parquet")
+    raw_data_path: str=os.path.join('artifacts',"data.parquet")
+    source_data_path: str=os.path.join('data',"stud.csv")
+    export_csv: bool=True
+    test_size: float=0.2
+    streaming: bool=False
+    chunk_size: int=100_000
+    row_key_columns: Optional[Tuple[str, ...]]=None
+
+    def csv_export_paths(self):
+        """
+        Method Name : csv_export_paths
+        Description : This method returns the CSV export paths of the raw, train and test data.
+        Returns : A list of file paths, empty when export_csv is off.
+        """
+
+        if not self.export_csv:
+            return []
+
+        return [
+            os.path.splitext(path)[0]+".csv"
+            for path in (self.raw_data_path, self.train_data_path, self.test_data_path)
+        ]
 
 class DataIngestion:
     """"
@@ -39,6 +68,8 @@ class DataIngestion:
     Methods :
         __init__(): Initializes the DataIngestion class and its configuration.
         initiate_data_ingestion(): Reads the data, splits it into training and testing sets, and saves them to the specified file paths.
+        initiate_streaming_data_ingestion(): Does the same chunk by chunk, with a deterministic hash-based split.
+        assign_test_rows(chunk): Returns which rows of a chunk belong to the test split in streaming mode.
 
     """
 
@@ -60,34 +91,119 @@ class DataIngestion:
         On Failure : Raises a CustomException if any error occurs during the process.
         """
 
+        if self.ingestion_config.streaming:
+            return self.initiate_streaming_data_ingestion()
+
         logging.info("Entered the data ingestion method or component")
         try:
-            df=pd.read_csv('data/stud.csv')
-            logging.info('Read the dataset as dataframe')
+            with profile_stage("data_ingestion",streaming=False) as stage:
+                df=read_frame(self.ingestion_config.source_data_path)
+                stage["rows"]=len(df)
+                logging.info('Read the dataset as dataframe')
+
+                os.makedirs(os.path.dirname(self.ingestion_config.train_data_path),exist_ok=True)
 
-            os.makedirs(os.path.dirname(self.ingestion_config.train_data_path),exist_ok=True)
+                write_frame(df,self.ingestion_config.raw_data_path)
 
-            df.to_csv(self.ingestion_config.raw_data_path,index=False,header=True)
+                logging.info("Train test split initiated")
+                # sklearn.model_selection alone takes over a second to import; only the in-memory split needs it
+                from sklearn.model_selection import train_test_split
+                train_set,test_set=train_test_split(df,test_size=self.ingestion_config.test_size,random_state=42)
 
-            logging.info("Train test split initiated")
-            train_set,test_set=train_test_split(df,test_size=0.2,random_state=42)
+                write_frame(train_set,self.ingestion_config.train_data_path)
 
-            train_set.to_csv(self.ingestion_config.train_data_path,index=False,header=True)
+                write_frame(test_set,self.ingestion_config.test_data_path)
 
-            test_set.to_csv(self.ingestion_config.test_data_path,index=False,header=True)
+                if self.ingestion_config.export_csv:
+                    artifact_paths=(self.ingestion_config.raw_data_path,
+                                    self.ingestion_config.train_data_path,
+                                    self.ingestion_config.test_data_path)
+                    for frame,artifact_path,path in zip((df,train_set,test_set),artifact_paths,
+                                                        self.ingestion_config.csv_export_paths()):
+                        if path!=artifact_path:
+                            write_frame(frame,path)
+                    logging.info("Exported raw, train and test data as CSV")
 
-            logging.info("Data Ingestion is completed")
+                logging.info("Data Ingestion is completed")
 
-            return(
-                self.ingestion_config.train_data_path,
-                self.ingestion_config.test_data_path
+                return(
+                    self.ingestion_config.train_data_path,
+                    self.ingestion_config.test_data_path
+
+                )
+        except Exception as e:
+            raise CustomException(e,sys)
 
-            )
+    def assign_test_rows(self,chunk):
+        """"
+        Method Name : assign_test_rows
+        Description : This method decides the split of every row from a hash of its key columns alone, so a row always
+                      lands in the same split no matter which chunk or run it is read in. Numeric keys are hashed as
+                      float64, so 72 and 72.0 (e.g. from chunks with and without missing values) hash the same.
+        Returns : A boolean numpy array, True for the rows assigned to the test split.
+        """
+
+        key_columns=list(self.ingestion_config.row_key_columns or chunk.columns)
+        keys=pd.DataFrame({
+            column:(chunk[column].astype("float64") if pd.api.types.is_numeric_dtype(chunk[column])
+                    else chunk[column].astype(str))
+            for column in key_columns
+        })
+        hashes=pd.util.hash_pandas_object(keys,index=False).to_numpy()
+
+        return (hashes%np.uint64(10_000))<np.uint64(round(self.ingestion_config.test_size*10_000))
+
+    def initiate_streaming_data_ingestion(self):
+        """"
+        Method Name : initiate_streaming_data_ingestion
+        Description : This method reads the source in chunks of chunk_size rows, assigns every row to the training or
+                      testing set with assign_test_rows and appends each chunk straight to the raw, train and test
+                      artifacts. Peak memory depends on the chunk size, not on the size of the source.
+        Returns : A tuple containing the file paths of the training and testing data.
+        On Failure : Raises a CustomException if any error occurs during the process.
+        """
+
+        logging.info("Entered the streaming data ingestion method or component")
+        try:
+            with profile_stage("data_ingestion",streaming=True) as stage:
+                config=self.ingestion_config
+                paths=[config.raw_data_path,config.train_data_path,config.test_data_path]
+                if config.export_csv:
+                    paths+=[path for path in config.csv_export_paths() if path not in paths]
+
+                writers={path:FrameChunkWriter(path) for path in paths}
+                csv_paths=dict(zip(("raw","train","test"),config.csv_export_paths()))
+
+                try:
+                    for chunk in iter_frame_chunks(config.source_data_path,config.chunk_size):
+                        is_test=self.assign_test_rows(chunk)
+                        parts={"raw":chunk,"train":chunk[~is_test],"test":chunk[is_test]}
+
+                        for name,path in zip(("raw","train","test"),paths[:3]):
+                            writers[path].write(parts[name])
+                            if name in csv_paths and csv_paths[name]!=path:
+                                writers[csv_paths[name]].write(parts[name])
+                finally:
+                    for writer in writers.values():
+                        writer.close()
+
+                logging.info(f"Streamed {writers[config.raw_data_path].n_rows} rows: "
+                             f"{writers[config.train_data_path].n_rows} train, {writers[config.test_data_path].n_rows} test")
+                stage["rows"]=writers[config.raw_data_path].n_rows
+                logging.info("Data Ingestion is completed")
+
+                return(
+                    config.train_data_path,
+                    config.test_data_path
+                )
         except Exception as e:
             raise CustomException(e,sys)
 
 
 if __name__=="__main__":
+    # Imported here so that importing the ingestion module does not load the model libraries
+    from src.components.data_transformation import DataTransformation
+    from src.components.model_trainer import ModelTrainer
 
     #data ingestion
     obj=DataIngestion()
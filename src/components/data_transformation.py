@@ -1,9 +1,11 @@
+import copy
 import sys
 from dataclasses import dataclass
 
 
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
@@ -12,21 +14,47 @@ from sklearn.compose import ColumnTransformer
 
 from src.exception import CustomException
 from src.logger import logging
+from src.profiling import profile_stage
 import os
 
-from src.utils import save_object
+from src.utils import load_object, read_frame, save_object
 
 @dataclass
 class DataTransformationConfig:
     """
     Class Name : DataTransformationConfig
-    Description : This class holds the configuration for data transformation, including the file path for the preprocessor object.
+    Description : This class holds the configuration for data transformation, including the file path for the preprocessor object
+                  and the transformed arrays.
     
     Attributes :
         preprocessor_obj_file_path (str): The file path where the preprocessor object will be saved.
+        train_arr_file_path (str): The .npy file path where the transformed training array will be saved.
+        test_arr_file_path (str): The .npy file path where the transformed testing array will be saved.
+        sparse_output (bool): Whether to keep the features as a CSR float32 matrix with the target as a separate vector,
+                              instead of a dense float64 array with the target as last column. The sparse features are
+                              saved as <arr>_X.npz and the target as <arr>_y.npy.
     """
 
     preprocessor_obj_file_path = os.path.join('artifacts',"preprocessor.pkl")
+    train_arr_file_path = os.path.join('artifacts',"train_arr.npy")
+    test_arr_file_path = os.path.join('artifacts',"test_arr.npy")
+    sparse_output: bool = False
+
+    def array_file_paths(self):
+        """
+        Method Name : array_file_paths
+        Description : This method returns the files the transformed training and testing data are saved to.
+        Returns : A list of file paths, training files first.
+        """
+
+        if not self.sparse_output:
+            return [self.train_arr_file_path, self.test_arr_file_path]
+
+        paths = []
+        for arr_file_path in (self.train_arr_file_path, self.test_arr_file_path):
+            stem = os.path.splitext(arr_file_path)[0]
+            paths += [stem+"_X.npz", stem+"_y.npy"]
+        return paths
 
 class DataTransformation:
     """"
@@ -72,9 +100,10 @@ class DataTransformation:
             ])
 
             # Create a pipeline for categorical features
+            sparse_output = self.data_transformation_config.sparse_output
             cat_pipeline = Pipeline(steps=[
                 ('imputer', SimpleImputer(strategy='most_frequent')),
-                ('one_hot_encoder', OneHotEncoder()),
+                ('one_hot_encoder', OneHotEncoder(dtype=np.float32) if sparse_output else OneHotEncoder()),
                 ('scaler', StandardScaler(with_mean=False))
             ])
 
@@ -82,11 +111,14 @@ class DataTransformation:
             logging.info(f"Numerical columns: {numerical_columns}")
 
             # Combine both pipelines into a ColumnTransformer
+            # With sparse_output it always stacks the features as CSR: this data is denser than the default
+            # sparse_threshold, which would build the dense matrix first
             preprocessor = ColumnTransformer(
                 transformers=[
                     ('num_pipeline', num_pipeline, numerical_columns),
                     ('cat_pipeline', cat_pipeline, categorical_columns)
-                ]
+                ],
+                **({'sparse_threshold': 1.0} if sparse_output else {})
             )
 
             return preprocessor
@@ -100,56 +132,154 @@ class DataTransformation:
         Method Name : initiate_data_transformation
         Description : This method applies the preprocessing pipeline to the training and testing data.
         Returns : A tuple containing the transformed training array, transformed testing array, and the preprocessor object.
+                  With sparse_output, the training and testing data are (CSR features, target vector) tuples instead.
         On Failure : Raises a CustomException if any error occurs during the process.
         """
         
         try:
-            # Read the training and testing data
-            train_df = pd.read_csv(train_path)
-            test_df = pd.read_csv(test_path)
+            with profile_stage("data_transformation") as stage:
+                # Read the training and testing data
+                train_df = read_frame(train_path)
+                test_df = read_frame(test_path)
 
-            logging.info("Read train and test data completed")
+                stage["rows"] = len(train_df) + len(test_df)
+                logging.info("Read train and test data completed")
 
-            logging.info("Obtaining preprocessor object")
+                logging.info("Obtaining preprocessor object")
 
-            preprocessor_obj = self.get_data_transformer_object()
+                preprocessor_obj = self.get_data_transformer_object()
 
-            target_column_name = 'math_score'
-            numerical_columns = ['writing_score', 'reading_score']
+                target_column_name = 'math_score'
+                numerical_columns = ['writing_score', 'reading_score']
 
-            # Separate input features and target variable for training data
-            input_feature_train_df = train_df.drop(columns=[target_column_name], axis=1)
-            target_feature_train_df = train_df[target_column_name]
+                # Separate input features and target variable for training data
+                input_feature_train_df = train_df.drop(columns=[target_column_name], axis=1)
+                target_feature_train_df = train_df[target_column_name]
 
-            # Separate input features and target variable for testing data
-            input_feature_test_df = test_df.drop(columns=[target_column_name], axis=1)
-            target_feature_test_df = test_df[target_column_name]
+                # Separate input features and target variable for testing data
+                input_feature_test_df = test_df.drop(columns=[target_column_name], axis=1)
+                target_feature_test_df = test_df[target_column_name]
 
-            # Apply the preprocessing pipeline to the training and testing input features
-            input_feature_train_arr = preprocessor_obj.fit_transform(input_feature_train_df)
-            input_feature_test_arr = preprocessor_obj.transform(input_feature_test_df)
+                # Apply the preprocessing pipeline to the training and testing input features
+                input_feature_train_arr = preprocessor_obj.fit_transform(input_feature_train_df)
+                input_feature_test_arr = preprocessor_obj.transform(input_feature_test_df)
 
-            logging.info("Applying preprocessing object on training and testing datasets.")
+                logging.info("Applying preprocessing object on training and testing datasets.")
 
-            # Combine the transformed input features with the target variable
-            train_arr = np.c_[input_feature_train_arr, np.array(target_feature_train_df)]
-            test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
+                os.makedirs(os.path.dirname(self.data_transformation_config.train_arr_file_path), exist_ok=True)
 
-            logging.info("Saved preprocessor object.")
+                if self.data_transformation_config.sparse_output:
+                    if not (sparse.issparse(input_feature_train_arr) and sparse.issparse(input_feature_test_arr)):
+                        raise ValueError("The preprocessor returned dense features with sparse_output set")
 
-            # Save the preprocessor object to a file
-            save_object(
-                file_path=self.data_transformation_config.preprocessor_obj_file_path,
-                obj=preprocessor_obj
-            )
+                    # Keep the features as CSR float32 and the target as its own vector, without densifying
+                    train_arr = (sparse.csr_matrix(input_feature_train_arr, dtype=np.float32),
+                                 np.asarray(target_feature_train_df, dtype=np.float32))
+                    test_arr = (sparse.csr_matrix(input_feature_test_arr, dtype=np.float32),
+                                np.asarray(target_feature_test_df, dtype=np.float32))
 
-            return (
-                train_arr,
-                test_arr,
-                self.data_transformation_config.preprocessor_obj_file_path
-            )
+                    train_X_path, train_y_path, test_X_path, test_y_path = self.data_transformation_config.array_file_paths()
+                    sparse.save_npz(train_X_path, train_arr[0])
+                    np.save(train_y_path, train_arr[1])
+                    sparse.save_npz(test_X_path, test_arr[0])
+                    np.save(test_y_path, test_arr[1])
+                else:
+                    # Combine the transformed input features with the target variable
+                    train_arr = np.c_[input_feature_train_arr, np.array(target_feature_train_df)]
+                    test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
+
+                    # Save the transformed arrays so later stages and retrains can memory-map them
+                    np.save(self.data_transformation_config.train_arr_file_path, train_arr)
+                    np.save(self.data_transformation_config.test_arr_file_path, test_arr)
+
+                logging.info("Saved preprocessor object.")
+
+                # Serving scores dense rows: models not fit on sparse input (see SPARSE_INPUT_MODELS) need them, and
+                # XGBoost would read the entries absent from a CSR matrix as missing
+                preprocessor_obj.sparse_output_ = False
+
+                # Save the preprocessor object to a file
+                save_object(
+                    file_path=self.data_transformation_config.preprocessor_obj_file_path,
+                    obj=preprocessor_obj
+                )
+
+                return (
+                    train_arr,
+                    test_arr,
+                    self.data_transformation_config.preprocessor_obj_file_path
+                )
         
             logging.info("Data Transformation is competed.")
         except Exception as e:
             logging.info("Error in initiate_data_transformation")
-            raise CustomException(e,sys)
\ No newline at end of file
+            raise CustomException(e,sys)
+
+    def transform_new_data(self, data_path):
+        """"
+        Method Name : transform_new_data
+        Description : This method transforms new rows with the saved, already fitted preprocessor, so they can be fed
+                      to the trained model. Nothing is refit or saved.
+        Parameters :
+            data_path (str): The file holding the new rows, with the target column.
+        Returns : The transformed array with the target as last column, or with sparse_output a (CSR features, target
+                  vector) tuple, like the arrays of initiate_data_transformation.
+        On Failure : Raises a CustomException if any error occurs during the process.
+        """
+
+        try:
+            df = read_frame(data_path)
+            preprocessor_obj = load_object(self.data_transformation_config.preprocessor_obj_file_path)
+
+            sparse_output = self.data_transformation_config.sparse_output
+            if sparse_output:
+                # The saved preprocessor stacks dense rows for serving, this copy stacks CSR like the training arrays
+                preprocessor_obj = copy.copy(preprocessor_obj)
+                preprocessor_obj.sparse_output_ = True
+
+            target_column_name = 'math_score'
+            input_feature_arr = preprocessor_obj.transform(df.drop(columns=[target_column_name], axis=1))
+
+            logging.info(f"Transformed {len(df)} new rows with the saved preprocessor")
+
+            if sparse_output:
+                return (sparse.csr_matrix(input_feature_arr, dtype=np.float32),
+                        np.asarray(df[target_column_name], dtype=np.float32))
+
+            return np.c_[input_feature_arr, np.array(df[target_column_name])]
+
+        except Exception as e:
+            logging.info("Error in transform_new_data")
+            raise CustomException(e,sys)
+
+    def load_transformed_data(self):
+        """"
+        Method Name : load_transformed_data
+        Description : This method opens the training and testing arrays saved by initiate_data_transformation as read-only
+                      memory maps, without reading or transforming the data again.
+        Returns : A tuple containing the transformed training array and the transformed testing array, or with
+                  sparse_output the (CSR features, target vector) tuples (sparse matrices cannot be memory-mapped).
+        On Failure : Raises a CustomException if any error occurs during the process.
+        """
+
+        try:
+            if self.data_transformation_config.sparse_output:
+                train_X_path, train_y_path, test_X_path, test_y_path = self.data_transformation_config.array_file_paths()
+
+                logging.info("Loaded the saved sparse train and test features.")
+
+                return (
+                    (sparse.load_npz(train_X_path).tocsr(), np.load(train_y_path, mmap_mode='r')),
+                    (sparse.load_npz(test_X_path).tocsr(), np.load(test_y_path, mmap_mode='r'))
+                )
+
+            train_arr = np.load(self.data_transformation_config.train_arr_file_path, mmap_mode='r')
+            test_arr = np.load(self.data_transformation_config.test_arr_file_path, mmap_mode='r')
+
+            logging.info("Memory-mapped the saved train and test arrays.")
+
+            return train_arr, test_arr
+
+        except Exception as e:
+            logging.info("Error in load_transformed_data")
+            raise CustomException(e,sys)
@@ -0,0 +1,630 @@
+import json
+import os
+import sys
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_object, read_frame, save_object
+
+# Models whose coefficients are folded into the preprocessor
+LINEAR_MODELS = ("LinearRegression",)
+
+# What CompiledPreprocessor does with a category not seen during fit: raise like the OneHotEncoder, leave the
+# column's one-hot block empty like handle_unknown="ignore", or treat it as the column's most frequent category
+UNKNOWN_CATEGORY_POLICIES = ("error", "ignore", "most_frequent")
+
+
+def _is_missing(value):
+    return value is None or value != value
+
+
+def to_columns(features):
+    """
+    Function Name : to_columns
+    Description : This function turns the accepted input shapes into a mapping of column name -> 1-D array. A dict
+                  of scalars is a single record, a dict of sequences is already a set of columns.
+    Parameters :
+        features (dict | list[dict] | pandas.DataFrame): A single record, a mapping of column arrays, a list of records
+                                                         or a DataFrame.
+    Returns :
+        dict: The column values, one array per column, all of the same length.
+    On Failure : Raises a ValueError when the records do not all have the keys of the first one.
+    """
+
+    if hasattr(features, "columns"):
+        return {name: features[name].to_numpy() for name in features.columns}
+
+    if isinstance(features, dict):
+        return {
+            name: values if isinstance(values, np.ndarray) and values.ndim == 1
+            else np.atleast_1d(np.asarray(values, dtype=object))
+            for name, values in features.items()
+        }
+
+    records = list(features)
+    if not records:
+        return {}
+
+    columns = records[0].keys()
+    for position, record in enumerate(records):
+        if record.keys() != columns:
+            missing, extra = sorted(columns - record.keys()), sorted(record.keys() - columns)
+            raise ValueError(f"Record {position} does not have the columns of the first record: "
+                             f"missing {missing}, extra {extra}")
+
+    return {name: np.array([record[name] for record in records], dtype=object) for name in columns}
+
+
+class CompiledPreprocessor:
+    """
+    Class Name : CompiledPreprocessor
+    Description : This class is the fitted ColumnTransformer of DataTransformation flattened into numpy tables: the
+                  imputation value, mean and scale of every numerical column, and the categories, imputation value and
+                  one-hot output value of every categorical column. It produces the same matrix as the ColumnTransformer
+                  straight from dicts or column arrays, without building a DataFrame or going through its pipelines.
+                  The matrix is written into a buffer that is allocated once per thread and reused by later calls.
+    Attributes :
+        numerical_columns (list): The numerical input columns, in output order.
+        numerical_fill, numerical_mean, numerical_scale (numpy.ndarray): The per-column median, mean and scale.
+        categorical_columns (list): The categorical input columns, in output order.
+        categorical_fill (list): The most frequent category of every categorical column.
+        category_index (list): One dict per categorical column mapping a category to its position in the column's block.
+        category_offset (numpy.ndarray): The output position of the first one-hot feature of every categorical column.
+        category_value (numpy.ndarray): The value of every output feature when its category is set, 0 for the
+                                        numerical positions.
+        n_features (int): The number of output features.
+        unknown_category (str): The policy for categories not seen during fit, one of UNKNOWN_CATEGORY_POLICIES.
+    Methods :
+        from_column_transformer(preprocessor, unknown_category): Builds the tables from a fitted ColumnTransformer.
+        transform(features, out): Returns the feature matrix of records or column arrays.
+    """
+
+    def __init__(self, numerical_columns, numerical_fill, numerical_mean, numerical_scale,
+                 categorical_columns, categorical_fill, categories, category_value, unknown_category="error"):
+        if unknown_category not in UNKNOWN_CATEGORY_POLICIES:
+            raise ValueError(f"unknown_category must be one of {UNKNOWN_CATEGORY_POLICIES}, got {unknown_category!r}")
+
+        self.numerical_columns = list(numerical_columns)
+        self.numerical_fill = np.asarray(numerical_fill, dtype=np.float64)
+        self.numerical_mean = np.asarray(numerical_mean, dtype=np.float64)
+        self.numerical_scale = np.asarray(numerical_scale, dtype=np.float64)
+
+        self.categorical_columns = list(categorical_columns)
+        self.categorical_fill = list(categorical_fill)
+        self.category_index = [{category: i for i, category in enumerate(column)} for column in categories]
+        sizes = [len(column) for column in categories]
+        self.category_offset = len(self.numerical_columns) + np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+        self.category_value = np.concatenate([np.zeros(len(self.numerical_columns)), category_value])
+
+        self.n_features = len(self.numerical_columns) + sum(sizes)
+        self.unknown_category = unknown_category
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # The per-thread buffers are scratch space, not part of the artifact
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault("unknown_category", "error")
+        self._local = threading.local()
+
+    @classmethod
+    def from_column_transformer(cls, preprocessor, unknown_category="error"):
+        """
+        Method Name : from_column_transformer
+        Description : This method reads the fitted state of the ColumnTransformer built by
+                      DataTransformation.get_data_transformer_object. The numerical block must come first, as it does
+                      there, so the output positions line up.
+        Parameters :
+            preprocessor (ColumnTransformer): The fitted preprocessor.
+            unknown_category (str): The policy for categories not seen during fit, one of UNKNOWN_CATEGORY_POLICIES.
+        Returns : A CompiledPreprocessor producing the same features.
+        On Failure : Raises a ValueError if the preprocessor holds a step that cannot be compiled.
+        """
+
+        numerical, categorical = None, None
+        for name, pipeline, columns in preprocessor.transformers_:
+            if name == "remainder":
+                continue
+
+            steps = dict(pipeline.steps)
+            if "one_hot_encoder" in steps and categorical is None and numerical is not None:
+                categorical = (list(columns), steps)
+            elif "one_hot_encoder" not in steps and numerical is None:
+                numerical = (list(columns), steps)
+            else:
+                raise ValueError(f"Cannot compile the transformer '{name}'")
+
+        numerical_columns, numerical_steps = numerical
+        imputer, scaler = numerical_steps["imputer"], numerical_steps["scaler"]
+        n_numerical = len(numerical_columns)
+
+        categorical_columns, categorical_steps = categorical
+        encoder, cat_scaler = categorical_steps["one_hot_encoder"], categorical_steps["scaler"]
+        if encoder.drop is not None or cat_scaler.with_mean:
+            raise ValueError("Cannot compile a one-hot encoder with dropped categories or a centered scaler")
+
+        # StandardScaler(with_mean=False) multiplies the sparse one-hot matrix by 1 / scale
+        category_value = 1.0 / cat_scaler.scale_ if cat_scaler.with_std else np.ones(sum(map(len, encoder.categories_)))
+
+        return cls(
+            numerical_columns=numerical_columns,
+            numerical_fill=imputer.statistics_,
+            numerical_mean=scaler.mean_ if scaler.with_mean else np.zeros(n_numerical),
+            numerical_scale=scaler.scale_ if scaler.with_std else np.ones(n_numerical),
+            categorical_columns=categorical_columns,
+            categorical_fill=categorical_steps["imputer"].statistics_,
+            categories=[list(column) for column in encoder.categories_],
+            category_value=category_value,
+            unknown_category=unknown_category,
+        )
+
+    def numerical_values(self, columns):
+        """
+        Method Name : numerical_values
+        Description : This method returns the numerical columns as an (n_rows, n_numerical) array, medians filled in.
+        """
+
+        values = np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in self.numerical_columns])
+        missing = np.isnan(values)
+        if missing.any():
+            values[missing] = np.broadcast_to(self.numerical_fill, values.shape)[missing]
+
+        return values
+
+    def category_codes(self, columns):
+        """
+        Method Name : category_codes
+        Description : This method returns the position of every categorical value in its column's one-hot block.
+                      Missing values take the column's most frequent category, like the SimpleImputer.
+        Returns : An (n_rows, n_categorical) integer array, -1 for unknown categories under the "ignore" policy.
+        On Failure : Raises a ValueError for a category that was not seen during fit under the "error" policy, like
+                     the OneHotEncoder does.
+        """
+
+        codes = []
+        for name, fill, index in zip(self.categorical_columns, self.categorical_fill, self.category_index):
+            column_codes = []
+            for value in columns[name]:
+                if _is_missing(value):
+                    value = fill
+                code = index.get(value)
+                if code is None:
+                    if self.unknown_category == "error":
+                        raise ValueError(f"Found unknown category {value!r} in column '{name}'")
+                    code = -1 if self.unknown_category == "ignore" else index[fill]
+                column_codes.append(code)
+            codes.append(column_codes)
+
+        return np.array(codes, dtype=np.intp).T.reshape(-1, len(self.categorical_columns))
+
+    def _buffer(self, n_rows):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or len(buffer) < n_rows:
+            buffer = self._local.buffer = np.empty((n_rows, self.n_features))
+
+        return buffer[:n_rows]
+
+    def transform(self, features, out=None):
+        """
+        Method Name : transform
+        Description : This method builds the feature matrix the ColumnTransformer would produce.
+        Parameters :
+            features (dict | list[dict] | pandas.DataFrame): A single record, a mapping of column arrays, a list of
+                                                             records or a DataFrame.
+            out (numpy.ndarray, optional): A float64 array of shape (n_rows, n_features) to write into. By default a
+                                           buffer owned by the calling thread is reused, so the result is only valid
+                                           until that thread's next transform call; copy it to keep it.
+        Returns : A dense float64 numpy.ndarray of shape (n_rows, n_features).
+        On Failure : Raises a ValueError for a category that was not seen during fit under the "error" policy.
+        """
+
+        columns = to_columns(features)
+        missing_columns = [name for name in self.numerical_columns + self.categorical_columns if name not in columns]
+        if missing_columns:
+            raise ValueError(f"Missing input columns: {missing_columns}")
+
+        numerical = self.numerical_values(columns)
+        codes = self.category_codes(columns)
+
+        X = self._buffer(len(numerical)) if out is None else out
+        n_numerical = len(self.numerical_columns)
+        X[:, :n_numerical] = (numerical - self.numerical_mean) / self.numerical_scale
+        X[:, n_numerical:] = 0.0
+
+        # An ignored unknown category leaves its block empty: write a 0 to the first position of the block instead
+        positions = self.category_offset + np.maximum(codes, 0)
+        np.put_along_axis(X, positions, np.where(codes < 0, 0.0, self.category_value[positions]), axis=1)
+
+        return X
+
+
+class FoldedLinearModel:
+    """
+    Class Name : FoldedLinearModel
+    Description : This class is a linear model with the preprocessor folded into it. The scaler of every numerical
+                  column becomes a rescaled coefficient plus an intercept shift, and every one-hot block becomes a
+                  lookup table holding each category's contribution, so no feature matrix is ever built.
+    Attributes :
+        intercept (float): The intercept, shifted by the numerical means.
+        numerical_coef (numpy.ndarray): One coefficient per raw numerical column.
+        category_tables (list): One array per categorical column holding the contribution of each category, followed
+                                by a 0 picked up by the -1 code of an ignored unknown category.
+    """
+
+    def __init__(self, model, preprocessor):
+        coef = np.ravel(model.coef_).astype(np.float64)
+        n_numerical = len(preprocessor.numerical_columns)
+
+        self.numerical_coef = coef[:n_numerical] / preprocessor.numerical_scale
+        self.intercept = float(np.ravel(model.intercept_)[0]) - float(self.numerical_coef @ preprocessor.numerical_mean)
+
+        contributions = coef * preprocessor.category_value
+        self.category_tables = [
+            np.append(contributions[offset:offset + len(index)], 0.0)
+            for offset, index in zip(preprocessor.category_offset, preprocessor.category_index)
+        ]
+
+    def predict(self, preprocessor, columns):
+        prediction = self.intercept + preprocessor.numerical_values(columns) @ self.numerical_coef
+        for table, codes in zip(self.category_tables, preprocessor.category_codes(columns).T):
+            prediction += table[codes]
+
+        return prediction
+
+
+class TreeEnsembleTable:
+    """
+    Class Name : TreeEnsembleTable
+    Description : This class holds every tree of an ensemble in one flat node table. All rows walk all trees at once:
+                  each step looks up the split of the current node of every (row, tree) pair and moves it to a child,
+                  and leaves point to themselves so max_depth steps reach every leaf.
+    Attributes :
+        feature, threshold (numpy.ndarray): The split feature and threshold of every node.
+        left, right (numpy.ndarray): The global index of the children of every node, the node itself for leaves.
+        value (numpy.ndarray): The output of every leaf, already multiplied by its tree's scale.
+        roots (numpy.ndarray): The root node of every tree.
+        max_depth (int): The depth of the deepest tree.
+        strict (bool): Whether the left branch is taken on x < threshold (XGBoost) rather than x <= threshold.
+        aggregation (str): How tree outputs are combined: "sum", "mean" or "weighted_median".
+        bias (float): Added to the aggregated output.
+        weights (numpy.ndarray): The estimator weights used by the weighted median.
+    """
+
+    def __init__(self, trees, aggregation="sum", bias=0.0, strict=False, weights=None):
+        """
+        Method Name : __init__
+        Parameters :
+            trees (list): One (feature, threshold, left, right, value, depth) tuple per tree with tree-local child
+                          indices and -1 children for leaves.
+            aggregation (str): How tree outputs are combined.
+            bias (float): Added to the aggregated output.
+            strict (bool): Whether splits use x < threshold.
+            weights (numpy.ndarray, optional): The estimator weights of a weighted median.
+        """
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for feature, threshold, left, right, value, _ in trees:
+            n_nodes = len(feature)
+            own = np.arange(n_nodes)
+            is_leaf = np.asarray(left) < 0
+
+            features.append(np.where(is_leaf, 0, feature))
+            thresholds.append(np.where(is_leaf, 0.0, threshold))
+            lefts.append(offset + np.where(is_leaf, own, left))
+            rights.append(offset + np.where(is_leaf, own, right))
+            values.append(value)
+            roots.append(offset)
+            offset += n_nodes
+
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds).astype(np.float64)
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.value = np.concatenate(values).astype(np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max(depth for *_, depth in trees)
+
+        self.strict = strict
+        self.aggregation = aggregation
+        self.bias = float(bias)
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+
+    def leaf_values(self, X):
+        """
+        Method Name : leaf_values
+        Description : This method returns the leaf output of every tree for every row.
+        Parameters :
+            X (numpy.ndarray): The feature matrix. It is compared as float32, like sklearn, XGBoost and CatBoost do.
+        Returns : An (n_rows, n_trees) numpy.ndarray.
+        """
+
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            go_left = x < self.threshold[nodes] if self.strict else x <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return self.value[nodes]
+
+    def predict(self, preprocessor, columns):
+        return self.predict_matrix(preprocessor.transform(columns))
+
+    def predict_matrix(self, X):
+        leaves = self.leaf_values(X)
+
+        if self.aggregation == "mean":
+            return self.bias + leaves.mean(axis=1)
+
+        if self.aggregation == "weighted_median":
+            # Same selection as AdaBoostRegressor._get_median_predict
+            sorted_idx = np.argsort(leaves, axis=1)
+            weight_cdf = np.cumsum(self.weights[sorted_idx], axis=1)
+            median_idx = (weight_cdf >= 0.5 * weight_cdf[:, -1][:, np.newaxis]).argmax(axis=1)
+            rows = np.arange(len(leaves))
+            return self.bias + leaves[rows, sorted_idx[rows, median_idx]]
+
+        return self.bias + leaves.sum(axis=1)
+
+
+class FallbackModel:
+    """
+    Class Name : FallbackModel
+    Description : This class wraps a model that has no flat form (k-nearest neighbours, or any unknown estimator). Only
+                  the preprocessing is compiled; the model's own predict is called on its output.
+    Attributes :
+        model (estimator): The fitted model.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, preprocessor, columns):
+        return np.asarray(self.model.predict(preprocessor.transform(columns)), dtype=np.float64)
+
+
+def _sklearn_tree(estimator, scale=1.0):
+    tree = estimator.tree_
+    return (tree.feature, tree.threshold, tree.children_left, tree.children_right,
+            scale * tree.value[:, 0, 0], tree.max_depth)
+
+
+def _xgboost_trees(model):
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw(raw_format="json"))["learner"]
+
+    if learner["objective"]["name"] != "reg:squarederror":
+        raise ValueError(f"Cannot compile XGBoost objective {learner['objective']['name']}")
+
+    trees = learner["gradient_booster"]["model"]["trees"]
+    try:
+        # predict only uses the trees up to the best iteration when early stopping was on
+        trees = trees[:model.best_iteration + 1]
+    except AttributeError:
+        pass
+
+    compiled = []
+    for tree in trees:
+        left = np.asarray(tree["left_children"])
+        right = np.asarray(tree["right_children"])
+        depth = np.zeros(len(left), dtype=np.intp)
+        for node in range(len(left)):
+            if left[node] >= 0:
+                depth[left[node]] = depth[right[node]] = depth[node] + 1
+
+        # Leaves keep their output in split_conditions
+        condition = np.asarray(tree["split_conditions"], dtype=np.float32).astype(np.float64)
+        compiled.append((tree["split_indices"], condition, left, right, np.where(left < 0, condition, 0.0), depth.max()))
+
+    base_score = float(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+
+    return compiled, base_score
+
+
+def _catboost_trees(model):
+    """
+    Function Name : _catboost_trees
+    Description : This function unrolls the oblivious trees of a CatBoost model into complete binary trees. Split d of
+                  an oblivious tree sets bit d of the leaf index when x > border, so the leaf reached by a path is the
+                  sum of its right turns.
+    """
+
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, "model.json")
+        model.save_model(model_path, format="json")
+        with open(model_path) as file_obj:
+            dump = json.load(file_obj)
+
+    feature_index = [feature["flat_feature_index"] for feature in dump["features_info"]["float_features"]]
+
+    compiled = []
+    for tree in dump["oblivious_trees"]:
+        splits = tree["splits"]
+        depth = len(splits)
+        n_nodes = 2 ** (depth + 1) - 1
+
+        feature = np.zeros(n_nodes, dtype=np.intp)
+        threshold = np.zeros(n_nodes)
+        left = np.full(n_nodes, -1, dtype=np.intp)
+        right = np.full(n_nodes, -1, dtype=np.intp)
+        value = np.zeros(n_nodes)
+
+        # Heap layout: node i has children 2i+1 and 2i+2, the last 2**depth nodes are the leaves
+        for level, split in enumerate(splits):
+            for node in range(2 ** level - 1, 2 ** (level + 1) - 1):
+                feature[node] = feature_index[split["float_feature_index"]]
+                threshold[node] = np.float32(split["border"])
+                left[node], right[node] = 2 * node + 1, 2 * node + 2
+
+        first_leaf = 2 ** depth - 1
+        for leaf in range(2 ** depth):
+            # The heap position of a leaf spells its path with the first split as most significant bit
+            leaf_index = sum(((leaf >> (depth - 1 - level)) & 1) << level for level in range(depth))
+            value[first_leaf + leaf] = tree["leaf_values"][leaf_index]
+
+        compiled.append((feature, threshold, left, right, value, depth))
+
+    scale, bias = dump.get("scale_and_bias", [1.0, [0.0]])
+    for tree in compiled:
+        tree[4][:] *= scale
+
+    return compiled, float(np.ravel(bias)[0])
+
+
+def compile_model(model, preprocessor):
+    """
+    Function Name : compile_model
+    Description : This function picks the flat form of a fitted model: a folded linear model, a tree ensemble node
+                  table, or a fallback to the model's own predict.
+    Parameters :
+        model (estimator): The fitted model selected by ModelTrainer.
+        preprocessor (CompiledPreprocessor): The compiled preprocessor.
+    Returns : A FoldedLinearModel, TreeEnsembleTable or FallbackModel.
+    """
+
+    model_type = type(model).__name__
+
+    if model_type in LINEAR_MODELS:
+        return FoldedLinearModel(model, preprocessor)
+
+    if model_type == "DecisionTreeRegressor":
+        return TreeEnsembleTable([_sklearn_tree(model)], aggregation="sum")
+
+    if model_type == "RandomForestRegressor":
+        return TreeEnsembleTable([_sklearn_tree(tree) for tree in model.estimators_], aggregation="mean")
+
+    if model_type == "GradientBoostingRegressor" and hasattr(model.init_, "predict"):
+        bias = float(model.init_.predict(np.zeros((1, preprocessor.n_features)))[0])
+        trees = [_sklearn_tree(stage[0], scale=model.learning_rate) for stage in model.estimators_]
+        return TreeEnsembleTable(trees, aggregation="sum", bias=bias)
+
+    if model_type == "AdaBoostRegressor":
+        n_estimators = len(model.estimators_)
+        return TreeEnsembleTable([_sklearn_tree(tree) for tree in model.estimators_], aggregation="weighted_median",
+                                 weights=model.estimator_weights_[:n_estimators])
+
+    if model_type == "XGBRegressor":
+        trees, base_score = _xgboost_trees(model)
+        return TreeEnsembleTable(trees, aggregation="sum", bias=base_score, strict=True)
+
+    if model_type == "CatBoostRegressor":
+        trees, bias = _catboost_trees(model)
+        return TreeEnsembleTable(trees, aggregation="sum", bias=bias)
+
+    return FallbackModel(model)
+
+
+class CompiledModel:
+    """
+    Class Name : CompiledModel
+    Description : This class is the exported inference artifact: the compiled preprocessor and the flat form of the
+                  selected model. It scores raw records without pandas or the sklearn pipelines.
+    Attributes :
+        preprocessor (CompiledPreprocessor): The compiled preprocessor.
+        predictor (FoldedLinearModel | TreeEnsembleTable | FallbackModel): The flat form of the model.
+        model_type (str): The class name of the compiled model.
+    Methods :
+        predict(features): Predicts the target for every given record.
+    """
+
+    def __init__(self, model, preprocessor, unknown_category="error"):
+        self.preprocessor = CompiledPreprocessor.from_column_transformer(preprocessor, unknown_category)
+        self.predictor = compile_model(model, self.preprocessor)
+        self.model_type = type(model).__name__
+
+    @property
+    def kind(self):
+        return type(self.predictor).__name__
+
+    def predict(self, features):
+        """
+        Method Name : predict
+        Description : This method predicts the target for every given record.
+        Parameters :
+            features (dict | list[dict] | pandas.DataFrame): A single record, a mapping of column arrays, a list of
+                                                             records or a DataFrame.
+        Returns : A numpy.ndarray with one prediction per record.
+        """
+
+        return self.predictor.predict(self.preprocessor, to_columns(features))
+
+
+@dataclass
+class ModelExporterConfig:
+    """
+    Class Name : ModelExporterConfig
+    Description : This class holds the configuration for the model export.
+    Attributes :
+        compiled_model_file_path (str): The file path where the compiled model will be saved.
+        tolerance (float): The largest accepted difference between the compiled and the sklearn predictions.
+    """
+
+    compiled_model_file_path: str = os.path.join("artifacts", "compiled_model.pkl")
+    tolerance: float = 1e-4
+
+
+class ModelExporter:
+    """
+    Class Name : ModelExporter
+    Description : This class compiles the fitted preprocessor and the selected model into a CompiledModel, checks it
+                  against the sklearn predictions and saves it.
+    Attributes :
+        model_exporter_config (ModelExporterConfig): An instance of ModelExporterConfig.
+    Methods :
+        initiate_model_export(model_file_path, preprocessor_file_path, sample_data_path): Compiles, checks and saves the model.
+    """
+
+    def __init__(self):
+        self.model_exporter_config = ModelExporterConfig()
+
+    def initiate_model_export(self, model_file_path, preprocessor_file_path, sample_data_path):
+        """
+        Method Name : initiate_model_export
+        Description : This method compiles the model and the preprocessor, compares its predictions on the sample data
+                      with preprocessor.transform + model.predict and saves it.
+        Parameters :
+            model_file_path (str): The file path of the trained model.
+            preprocessor_file_path (str): The file path of the fitted preprocessor object.
+            sample_data_path (str): The file path of raw records used to check the compiled model, e.g. the test split.
+        Returns :
+            dict: The compiled model type and the largest absolute prediction difference on the sample.
+        On Failure : Raises a CustomException if any error occurs during the process, including a compiled model that
+                     does not match the sklearn predictions.
+        """
+
+        try:
+            model = load_object(file_path=model_file_path)
+            preprocessor = load_object(file_path=preprocessor_file_path)
+
+            compiled_model = CompiledModel(model, preprocessor)
+            logging.info(f"Compiled {compiled_model.model_type} as {compiled_model.kind}")
+
+            sample = read_frame(sample_data_path)
+            expected = np.ravel(model.predict(preprocessor.transform(sample)))
+            max_abs_error = float(np.max(np.abs(compiled_model.predict(sample) - expected)))
+
+            tolerance = self.model_exporter_config.tolerance * max(1.0, float(np.max(np.abs(expected))))
+            if max_abs_error > tolerance:
+                raise ValueError(f"Compiled model differs from the sklearn predictions by {max_abs_error}")
+
+            logging.info(f"Compiled model matches the sklearn predictions within {max_abs_error}")
+
+            save_object(file_path=self.model_exporter_config.compiled_model_file_path, obj=compiled_model)
+
+            return {"model_type": compiled_model.model_type, "kind": compiled_model.kind, "max_abs_error": max_abs_error}
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,139 @@
+import importlib
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """
+    Class Name : ModelSpec
+    Description : This class describes a candidate model without importing it: where its estimator class lives, the
+                  constructor arguments and the hyperparameter grid to search.
+    Attributes :
+        class_path (str): The dotted path of the estimator class, e.g. "sklearn.linear_model.LinearRegression".
+        init_params (dict): The constructor arguments of a fresh instance.
+        param_grid (dict): The hyperparameter grid searched by ModelTrainer.
+    """
+
+    class_path: str
+    init_params: dict = field(default_factory=dict)
+    param_grid: dict = field(default_factory=dict)
+
+    @property
+    def library(self):
+        return self.class_path.split(".", 1)[0]
+
+
+# Candidate models keyed by the name used in the model report. Nothing is imported until a model is resolved.
+MODEL_REGISTRY = {
+    "Random Forest": ModelSpec(
+        "sklearn.ensemble.RandomForestRegressor",
+        param_grid={
+            # 'criterion':['squared_error', 'friedman_mse', 'absolute_error', 'poisson'],
+
+            # 'max_features':['sqrt','log2',None],
+            'n_estimators': [8,16,32,64,128,256]
+        },
+    ),
+    "Decision Tree": ModelSpec(
+        "sklearn.tree.DecisionTreeRegressor",
+        param_grid={
+            'criterion':['squared_error', 'friedman_mse', 'absolute_error', 'poisson'],
+            # 'splitter':['best','random'],
+            # 'max_features':['sqrt','log2'],
+        },
+    ),
+    "Gradient Boosting": ModelSpec(
+        "sklearn.ensemble.GradientBoostingRegressor",
+        param_grid={
+            # 'loss':['squared_error', 'huber', 'absolute_error', 'quantile'],
+            'learning_rate':[.1,.01,.05,.001],
+            'subsample':[0.6,0.7,0.75,0.8,0.85,0.9],
+            # 'criterion':['squared_error', 'friedman_mse'],
+            # 'max_features':['auto','sqrt','log2'],
+            'n_estimators': [8,16,32,64,128,256]
+        },
+    ),
+    "Linear Regression": ModelSpec("sklearn.linear_model.LinearRegression"),
+    "XGBRegressor": ModelSpec(
+        "xgboost.XGBRegressor",
+        param_grid={
+            'learning_rate':[.1,.01,.05,.001],
+            'n_estimators': [8,16,32,64,128,256]
+        },
+    ),
+    "CatBoosting Regressor": ModelSpec(
+        "catboost.CatBoostRegressor",
+        init_params={"verbose": False},
+        param_grid={
+            'depth': [6,8,10],
+            'learning_rate': [0.01, 0.05, 0.1],
+            'iterations': [30, 50, 100]
+        },
+    ),
+    "AdaBoost Regressor": ModelSpec(
+        "sklearn.ensemble.AdaBoostRegressor",
+        param_grid={
+            'learning_rate':[.1,.01,0.5,.001],
+            # 'loss':['linear','square','exponential'],
+            'n_estimators': [8,16,32,64,128,256]
+        },
+    ),
+}
+
+
+def get_model_spec(name):
+    """
+    Function Name : get_model_spec
+    Description : This function returns the registry entry of a candidate model.
+    Parameters :
+        name (str): The candidate name, a key of MODEL_REGISTRY.
+    Returns :
+        ModelSpec: The model description.
+    On Failure : Raises a KeyError listing the known names.
+    """
+
+    try:
+        return MODEL_REGISTRY[name]
+    except KeyError:
+        raise KeyError(f"Unknown model '{name}', expected one of {list(MODEL_REGISTRY)}") from None
+
+
+def resolve_model_class(name):
+    """
+    Function Name : resolve_model_class
+    Description : This function imports the estimator class of a candidate model. Only the library of that model is
+                  imported, so e.g. resolving "Linear Regression" never loads xgboost or catboost.
+    Parameters :
+        name (str): The candidate name, a key of MODEL_REGISTRY.
+    Returns :
+        type: The estimator class.
+    """
+
+    module_path, class_name = get_model_spec(name).class_path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_path), class_name)
+
+
+def create_model(name):
+    """
+    Function Name : create_model
+    Description : This function returns a fresh, unfitted instance of a candidate model.
+    Parameters :
+        name (str): The candidate name, a key of MODEL_REGISTRY.
+    Returns :
+        estimator: The model instance built with the registered constructor arguments.
+    """
+
+    return resolve_model_class(name)(**get_model_spec(name).init_params)
+
+
+def get_param_grid(name):
+    """
+    Function Name : get_param_grid
+    Description : This function returns a copy of the hyperparameter grid of a candidate model.
+    Parameters :
+        name (str): The candidate name, a key of MODEL_REGISTRY.
+    Returns :
+        dict: The hyperparameter grid.
+    """
+
+    return {param: list(values) for param, values in get_model_spec(name).param_grid.items()}
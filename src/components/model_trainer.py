@@ -1,23 +1,18 @@
+import json
 import os
 import sys
+import time
 from dataclasses import dataclass
+from typing import Optional, Tuple
 
-from catboost import CatBoostRegressor
-from sklearn.ensemble import (
-    AdaBoostRegressor,
-    GradientBoostingRegressor,
-    RandomForestRegressor,
-)
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import r2_score
-from sklearn.neighbors import KNeighborsRegressor
-from sklearn.tree import DecisionTreeRegressor
-from xgboost import XGBRegressor
-
+from src.components.model_registry import MODEL_REGISTRY, create_model, get_model_spec, get_param_grid
 from src.exception import CustomException
+from src.fit_cache import FitCache
 from src.logger import logging
+from src.model_selection import measure_serving_cost, select_model
+from src.profiling import profile_stage
 
-from src.utils import save_object,evaluate_models
+from src.utils import load_object,save_object,evaluate_models
 
 @dataclass
 class ModelTrainerConfig:
@@ -26,9 +21,43 @@ class ModelTrainerConfig:
     Description : This class holds the configuration for model training, including the file path for the trained model.
     Attributes :
         trained_model_file_path (str): The file path where the trained model will be saved.
+        n_jobs (int): The global CPU budget for the model search. 1 runs serially, -1 uses every available core.
+        search_strategy (str): The hyperparameter search strategy, "grid" (exhaustive, the reference) or "halving".
+        early_stopping (bool): Whether the boosting models use native early stopping instead of searching their rounds.
+        time_budget (float): The wall-clock budget in seconds of each model's search, None for no limit.
+        fit_cache_dir (str): The directory of the persistent fit cache, None to always refit every model.
+        fit_cache_max_bytes (int): The size limit of the fit cache; least recently used entries are evicted beyond it.
+        model_compress (int): The compression level (0-9) of the saved model. 0 keeps it memory-mappable.
+        candidates (tuple): The names of the MODEL_REGISTRY models to train, None for all of them. Only the libraries
+                            of these models are imported.
+        incremental_rounds (int): The number of boosting rounds / trees an incremental update adds.
+        max_r2_regression (float): How much lower than the current model's the test R2 of an incrementally updated
+                                   model may be for the update to be kept.
+        selection_file_path (str): The file where the selection decision and the serving costs of every candidate are
+                                   recorded next to the saved model.
+        selection_policy (str): How the saved model is chosen, "best_score" (highest test R2) or
+                                "fastest_within_epsilon" (lowest single-row latency within selection_epsilon of it).
+        selection_epsilon (float): The test R2 the "fastest_within_epsilon" policy may give up for speed.
+        max_latency_ms (float): The single-row prediction latency budget of the saved model, None for no limit.
+        max_model_size_mb (float): The artifact size budget of the saved model, None for no limit.
     """
 
     trained_model_file_path=os.path.join("artifacts","model.pkl")
+    selection_file_path=os.path.join("artifacts","model_selection.json")
+    n_jobs: int=1
+    search_strategy: str="grid"
+    early_stopping: bool=False
+    time_budget: Optional[float]=None
+    fit_cache_dir: Optional[str]=os.path.join("artifacts","fit_cache")
+    fit_cache_max_bytes: int=512*1024*1024
+    model_compress: int=0
+    candidates: Optional[Tuple[str, ...]]=None
+    incremental_rounds: int=32
+    max_r2_regression: float=0.005
+    selection_policy: str="best_score"
+    selection_epsilon: float=0.005
+    max_latency_ms: Optional[float]=None
+    max_model_size_mb: Optional[float]=None
 
 class ModelTrainer:
     """
@@ -38,112 +67,234 @@ class ModelTrainer:
         model_trainer_config (ModelTrainerConfig): An instance of ModelTrainerConfig that holds the configuration for model training.
     Methods :
         __init__(): Initializes the ModelTrainer class and its configuration.
+        get_candidate_models(): Returns the candidate models and their hyperparameter grids.
+        describe_candidates(): Describes the candidate models without instantiating them.
         initiate_model_trainer(train_array, test_array): Trains and evaluates multiple models, and saves the best model.
+        save_selection(selection, model_report): Records the selection decision next to the saved model.
+        initiate_incremental_training(new_array, test_array): Continues training the saved model on new rows.
     """
 
     def __init__(self):
         self.model_trainer_config=ModelTrainerConfig()
+        self.model_report={}
+
+
+    def get_candidate_models(self):
+        """
+        Method Name : get_candidate_models
+        Description : This method returns the candidate models and their hyperparameter grids. The estimator classes are
+                      resolved from the model registry here, when the candidates are about to be trained.
+        Returns :
+            tuple: A dictionary of model names to fresh model instances and a dictionary of model names to grids.
+        """
+
+        names = self.model_trainer_config.candidates or tuple(MODEL_REGISTRY)
+
+        models = {name: create_model(name) for name in names}
+        params = {name: get_param_grid(name) for name in names}
+
+        return models, params
+
+    def describe_candidates(self):
+        """
+        Method Name : describe_candidates
+        Description : This method describes the candidate models from their registry entries, without importing or
+                      instantiating any of them, e.g. to fingerprint the training stage of a run that may be skipped.
+        Returns :
+            dict: Model names mapped to their class path, constructor arguments and hyperparameter grid.
+        """
+
+        names = self.model_trainer_config.candidates or tuple(MODEL_REGISTRY)
 
+        return {
+            name: [spec.class_path, repr(sorted(spec.init_params.items())), repr(sorted(spec.param_grid.items()))]
+            for name, spec in ((name, get_model_spec(name)) for name in names)
+        }
+
+    @staticmethod
+    def split_features(array):
+        """
+        Method Name : split_features
+        Description : This method separates the input features from the target.
+        Parameters :
+            array (numpy.ndarray | tuple): A data array whose last column is the target, or a (features, target) tuple
+                                           as produced with sparse_output.
+        Returns : A tuple containing the features and the target.
+        """
+
+        if isinstance(array,tuple):
+            return array
+        return array[:,:-1],array[:,-1]
 
     def initiate_model_trainer(self,train_array,test_array):
         """
         Method Name : initiate_model_trainer
-        Description : This method trains and evaluates multiple machine learning models, selects the best one based on R2 score,
-                      and saves the best model to a file.
+        Description : This method trains and evaluates multiple machine learning models, measures what each costs to
+                      serve (prediction latency, artifact size and load time), selects one according to the selection
+                      policy and budgets of the configuration, and saves it to a file with the decision recorded in
+                      selection_file_path.
+        Parameters :
+            train_array (numpy.ndarray | tuple): The training data array, where the last column is the target variable,
+                                                 or a (features, target) tuple as produced with sparse_output.
+            test_array (numpy.ndarray | tuple): The testing data, in the same layout as train_array.
+        Returns :
+            float: The R2 score of the selected model on the test data. The full evaluation report, with the search
+                   timings and serving costs of every model, is kept in self.model_report.
+        On Failure : Raises a CustomException if any error occurs during the process.
+        """
+
+        try:
+            with profile_stage("model_trainer") as stage:
+                logging.info("Split training and test input data")
+                (X_train,y_train),(X_test,y_test)=self.split_features(train_array),self.split_features(test_array)
+                stage["rows"]=X_train.shape[0]
+                models, params = self.get_candidate_models()
+
+                fit_cache = None
+                if self.model_trainer_config.fit_cache_dir:
+                    fit_cache = FitCache(cache_dir=self.model_trainer_config.fit_cache_dir,
+                                         max_bytes=self.model_trainer_config.fit_cache_max_bytes)
+
+                # To evaluate models and get the report
+                model_report:dict=evaluate_models(X_train=X_train,y_train=y_train,X_test=X_test,y_test=y_test,
+                                                 models=models,param=params,
+                                                 n_jobs=self.model_trainer_config.n_jobs,
+                                                 search=self.model_trainer_config.search_strategy,
+                                                 early_stopping=self.model_trainer_config.early_stopping,
+                                                 time_budget=self.model_trainer_config.time_budget,
+                                                 fit_cache=fit_cache)
+
+                n_fits_saved = sum(report["n_fits_saved"] for report in model_report.values())
+                logging.info(f"Model search '{self.model_trainer_config.search_strategy}' saved {n_fits_saved} fits "
+                             f"compared to the exhaustive grid")
+
+                # To measure the serving cost of every candidate
+                with profile_stage("serving_cost", rows=X_test.shape[0]):
+                    for model_name, model in models.items():
+                        model_report[model_name].update(
+                            measure_serving_cost(model, X_test, compress=self.model_trainer_config.model_compress)
+                        )
+
+                # To get the model to ship according to the selection policy
+                best_model_name, selection = select_model(
+                    model_report,
+                    policy=self.model_trainer_config.selection_policy,
+                    epsilon=self.model_trainer_config.selection_epsilon,
+                    max_latency_ms=self.model_trainer_config.max_latency_ms,
+                    max_size_mb=self.model_trainer_config.max_model_size_mb,
+                )
+                best_model_score = model_report[best_model_name]["test_score"]
+                best_model = models[best_model_name]
+
+                if best_model_score<0.6:
+                    raise CustomException("No best model found")
+                logging.info(f"Best found model on both training and testing dataset")
+
+                logging.info(f"Best model {best_model_name}: search {model_report[best_model_name]['search_time']:.2f}s, "
+                             f"refit {model_report[best_model_name]['refit_time']:.2f}s, "
+                             f"{model_report[best_model_name]['single_row_latency_ms']:.3f} ms per row, "
+                             f"{model_report[best_model_name]['model_size_mb']:.2f} MB")
+
+                save_object(
+                    file_path=self.model_trainer_config.trained_model_file_path,
+                    obj=best_model,
+                    compress=self.model_trainer_config.model_compress
+                )
+                self.save_selection(selection,model_report)
+
+                # The test R2 was computed from the predictions made during the evaluation, no need to predict again
+                self.model_report = model_report
+                return best_model_score
+
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def save_selection(self,selection,model_report):
+        """
+        Method Name : save_selection
+        Description : This method records, next to the saved model, why it was chosen: the selection decision and the
+                      test R2 and serving costs of every candidate.
         Parameters :
-            train_array (numpy.ndarray): The training data array, where the last column is the target variable.
-            test_array (numpy.ndarray): The testing data array, where the last column is the target variable.
+            selection (dict): The decision returned by select_model.
+            model_report (dict): The evaluation report completed with the serving costs.
+        """
+
+        serving_keys=("test_score","single_row_latency_ms","single_row_p95_ms","batch_latency_ms","batch_rows",
+                      "batch_rows_per_second","model_size_mb","load_time_ms")
+        record=dict(selection,candidates={
+            name:{key:report[key] for key in serving_keys} for name,report in model_report.items()
+        })
+
+        file_path=self.model_trainer_config.selection_file_path
+        os.makedirs(os.path.dirname(file_path) or ".",exist_ok=True)
+        with open(file_path+".tmp","w") as file_obj:
+            json.dump(record,file_obj,indent=2)
+        os.replace(file_path+".tmp",file_path)
+
+    def initiate_incremental_training(self,new_array,test_array):
+        """
+        Method Name : initiate_incremental_training
+        Description : This method continues training the saved model on new rows instead of searching every candidate
+                      again on the full history: boosting models get incremental_rounds more rounds fitted on the new
+                      rows (see continue_training). The updated model replaces the saved one only if its R2 on the
+                      held-out test data is at most max_r2_regression below the current model's.
+        Parameters :
+            new_array (numpy.ndarray | tuple): The new rows, transformed by the saved preprocessor, in the layout of
+                                               initiate_model_trainer's train_array.
+            test_array (numpy.ndarray | tuple): The testing data, in the same layout.
         Returns :
-            float: The R2 score of the best model on the test data.
+            dict: The model type, whether the update was kept (accepted), the test R2 before and after, the number of
+                  new rows and rounds added and the fit time. A model that cannot continue training is reported with
+                  accepted False and a reason; it needs a full initiate_model_trainer run.
         On Failure : Raises a CustomException if any error occurs during the process.
         """
 
         try:
-            logging.info("Split training and test input data")
-            X_train,y_train,X_test,y_test=(
-                train_array[:,:-1],
-                train_array[:,-1],
-                test_array[:,:-1],
-                test_array[:,-1]
-            )
-            models = {
-                "Random Forest": RandomForestRegressor(),
-                "Decision Tree": DecisionTreeRegressor(),
-                "Gradient Boosting": GradientBoostingRegressor(),
-                "Linear Regression": LinearRegression(),
-                "XGBRegressor": XGBRegressor(),
-                "CatBoosting Regressor": CatBoostRegressor(verbose=False),
-                "AdaBoost Regressor": AdaBoostRegressor(),
-            }
-            params={
-                "Decision Tree": {
-                    'criterion':['squared_error', 'friedman_mse', 'absolute_error', 'poisson'],
-                    # 'splitter':['best','random'],
-                    # 'max_features':['sqrt','log2'],
-                },
-                "Random Forest":{
-                    # 'criterion':['squared_error', 'friedman_mse', 'absolute_error', 'poisson'],
-                 
-                    # 'max_features':['sqrt','log2',None],
-                    'n_estimators': [8,16,32,64,128,256]
-                },
-                "Gradient Boosting":{
-                    # 'loss':['squared_error', 'huber', 'absolute_error', 'quantile'],
-                    'learning_rate':[.1,.01,.05,.001],
-                    'subsample':[0.6,0.7,0.75,0.8,0.85,0.9],
-                    # 'criterion':['squared_error', 'friedman_mse'],
-                    # 'max_features':['auto','sqrt','log2'],
-                    'n_estimators': [8,16,32,64,128,256]
-                },
-                "Linear Regression":{},
-                "XGBRegressor":{
-                    'learning_rate':[.1,.01,.05,.001],
-                    'n_estimators': [8,16,32,64,128,256]
-                },
-                "CatBoosting Regressor":{
-                    'depth': [6,8,10],
-                    'learning_rate': [0.01, 0.05, 0.1],
-                    'iterations': [30, 50, 100]
-                },
-                "AdaBoost Regressor":{
-                    'learning_rate':[.1,.01,0.5,.001],
-                    # 'loss':['linear','square','exponential'],
-                    'n_estimators': [8,16,32,64,128,256]
-                }
-                
-            }
-
-            # To evaluate models and get the report
-            model_report:dict=evaluate_models(X_train=X_train,y_train=y_train,X_test=X_test,y_test=y_test,
-                                             models=models,param=params)
-            
-            # To get best model score from dict
-            best_model_score = max(sorted(model_report.values()))
-
-            # To get best model name from dict
-
-            best_model_name = list(model_report.keys())[
-                list(model_report.values()).index(best_model_score)
-            ]
-            best_model = models[best_model_name]
-
-            if best_model_score<0.6:
-                raise CustomException("No best model found")
-            logging.info(f"Best found model on both training and testing dataset")
-
-            save_object(
-                file_path=self.model_trainer_config.trained_model_file_path,
-                obj=best_model
-            )
-
-            predicted=best_model.predict(X_test)
-
-            r2_square = r2_score(y_test, predicted)
-            return r2_square
-            
-
-
-
-            
+            from sklearn.metrics import r2_score
+            from src.model_search import WARM_START_MODELS, continue_training, count_estimators
+
+            config=self.model_trainer_config
+            with profile_stage("incremental_training") as stage:
+                (X_new,y_new),(X_test,y_test)=self.split_features(new_array),self.split_features(test_array)
+                stage["rows"]=X_new.shape[0]
+
+                model=load_object(config.trained_model_file_path)
+                model_type=type(model).__name__
+                report={"model_type":model_type,"rows":X_new.shape[0],"accepted":False}
+
+                if model_type not in WARM_START_MODELS:
+                    report["reason"]=f"{model_type} cannot continue training, a full model search is needed"
+                    logging.info(report["reason"])
+                    return report
+
+                report["baseline_r2"]=r2_score(y_test,model.predict(X_test))
+
+                start=time.perf_counter()
+                updated_model=continue_training(model,X_new,y_new,config.incremental_rounds)
+                report["fit_time"]=time.perf_counter()-start
+                report["rounds_added"]=count_estimators(updated_model)-count_estimators(model)
+
+                report["updated_r2"]=r2_score(y_test,updated_model.predict(X_test))
+                report["accepted"]=(report["rounds_added"]>0
+                                    and report["updated_r2"]>=report["baseline_r2"]-config.max_r2_regression)
+
+                if report["accepted"]:
+                    save_object(
+                        file_path=config.trained_model_file_path,
+                        obj=updated_model,
+                        compress=config.model_compress
+                    )
+                elif report["rounds_added"]<=0:
+                    report["reason"]=f"The update added no rounds to the {model_type} model"
+                else:
+                    report["reason"]=(f"Test R2 dropped from {report['baseline_r2']:.4f} to {report['updated_r2']:.4f}, "
+                                      f"more than {config.max_r2_regression}")
+
+                logging.info(f"Incremental update of {model_type} on {X_new.shape[0]} rows: "
+                             f"R2 {report['baseline_r2']:.4f} -> {report['updated_r2']:.4f}, "
+                             f"{'kept' if report['accepted'] else 'rejected'}")
+
+                return report
+
         except Exception as e:
-            raise CustomException(e,sys)
\ No newline at end of file
+            raise CustomException(e,sys)
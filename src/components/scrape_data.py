@@ -1,11 +1,74 @@
+import argparse
+import asyncio
 import csv
+import hashlib
+import json
+import os
+import sqlite3
 import time
 import random
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
 from playwright.sync_api import sync_playwright
 
 # Base URL for Nairobi rental properties
 BASE_URL = "https://www.property24.co.ke/property-to-rent-in-nairobi-p95"
 
+# Columns of the output CSV, in order
+FIELDNAMES = ["title", "price", "location", "address", "bathrooms", "floor_size", "url"]
+
+# CSS selector of every listing field inside a .js_listingTile card
+CARD_SELECTOR = ".js_listingTile"
+FIELD_SELECTORS = {
+    "title": ".p24_propertyTitle",
+    "price": ".p24_price",
+    "location": ".p24.location",
+    "address": ".p24_address",
+    "bathrooms": ".p24_feature_Details",
+    "floor_size": ".p24_size",
+}
+
+# Runs inside the page: scrolls down until neither the page height nor the number of cards has changed for idleMs
+# (or timeoutMs has passed), then reads every card in the same call, so a page costs one round trip after goto
+SETTLE_AND_EXTRACT_JS = """
+async ({cardSelector, fields, idleMs, timeoutMs, stepPx}) => {
+    const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+    const snapshot = () => [document.body.scrollHeight, document.querySelectorAll(cardSelector).length].join(":");
+
+    const deadline = Date.now() + timeoutMs;
+    let last = snapshot();
+    let stableSince = Date.now();
+    let y = 0;
+    while (Date.now() < deadline) {
+        y = Math.min(y + stepPx, document.body.scrollHeight);
+        window.scrollTo(0, y);
+        await sleep(100);
+
+        const current = snapshot();
+        if (current !== last) {
+            last = current;
+            stableSince = Date.now();
+        } else if (y >= document.body.scrollHeight - window.innerHeight && Date.now() - stableSince >= idleMs) {
+            break;
+        }
+    }
+
+    return Array.from(document.querySelectorAll(cardSelector)).map(card => {
+        const listing = {};
+        for (const [name, selector] of Object.entries(fields)) {
+            const el = card.querySelector(selector);
+            listing[name] = el ? el.innerText.trim() : null;
+        }
+        const link = card.querySelector("a");
+        const href = link ? link.getAttribute("href") : null;
+        listing.url = href ? new URL(href, document.baseURI).href : null;
+        return listing;
+    });
+}
+"""
+
+
 def scrape_property24(start_page=1, min_delay=2, max_delay=5):
     """Scrape property listings from Property24 Nairobi rentals."""
 
@@ -67,10 +130,7 @@ def scrape_property24(start_page=1, min_delay=2, max_delay=5):
     # Save results to CSV
     output_file = "data/raw/property24_listings.csv"
     with open(output_file, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            "title", "price", "location", "address",
-            "bathrooms", "floor_size", "url"
-        ])
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
         writer.writerows(listings)
 
@@ -80,5 +140,321 @@ def scrape_property24(start_page=1, min_delay=2, max_delay=5):
     return listings
 
 
+@dataclass
+class ScraperConfig:
+    """Settings of the async scraper.
+
+    base_url / page_url_template: where page N lives; point them at a local server to crawl static fixtures,
+        e.g. base_url="http://127.0.0.1:8000", page_url_template="{base_url}/page-{page}.html".
+    concurrency: number of browser contexts crawling pages in parallel.
+    min_delay / max_delay: global politeness limit, the random gap in seconds between two page requests,
+        whatever the concurrency.
+    settle_idle / settle_timeout: a page is read once its height and card count have not changed for settle_idle
+        seconds, or after settle_timeout seconds.
+    index_path: SQLite file holding the URL index of the listings already seen and the crawl checkpoint.
+    incremental: write only new or changed listings and stop after the first page without a new URL.
+    resume: continue an interrupted run after its last committed page instead of starting over.
+    """
+
+    base_url: str = BASE_URL
+    page_url_template: str = "{base_url}?Page={page}"
+    start_page: int = 1
+    max_pages: Optional[int] = None
+    concurrency: int = 4
+    min_delay: float = 2.0
+    max_delay: float = 5.0
+    settle_idle: float = 1.0
+    settle_timeout: float = 15.0
+    scroll_step: int = 1200
+    navigation_timeout: float = 60.0
+    output_file: str = "data/raw/property24_listings.csv"
+    index_path: str = "data/raw/property24_index.sqlite"
+    incremental: bool = False
+    resume: bool = False
+
+    def page_url(self, page_num):
+        return self.page_url_template.format(base_url=self.base_url, page=page_num)
+
+
+class RateLimiter:
+    """Spaces out page requests across every worker: each acquire() waits for the next free slot."""
+
+    def __init__(self, min_delay, max_delay):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            wait = self._next_slot - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_slot = loop.time() + random.uniform(self.min_delay, self.max_delay)
+
+
+async def fetch_listings(page, url, config):
+    """Load one results page and return its listings, extracted in a single in-browser evaluation."""
+
+    await page.goto(url, timeout=config.navigation_timeout * 1000, wait_until="domcontentloaded")
+    return await page.evaluate(SETTLE_AND_EXTRACT_JS, {
+        "cardSelector": CARD_SELECTOR,
+        "fields": FIELD_SELECTORS,
+        "idleMs": config.settle_idle * 1000,
+        "timeoutMs": config.settle_timeout * 1000,
+        "stepPx": config.scroll_step,
+    })
+
+
+class ListingIndex:
+    """Persistent SQLite index of every listing seen, by URL, with a hash of its fields.
+
+    It also holds the crawl checkpoint (last finished page and the size of the output CSV at that point), updated in
+    the same transaction as the listings of that page, so a crash never leaves the two out of step.
+    """
+
+    def __init__(self, index_path):
+        os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(index_path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS listings (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS crawl_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self.connection.commit()
+
+    @staticmethod
+    def content_hash(listing):
+        fields = {name: listing.get(name) for name in FIELDNAMES if name != "url"}
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+    def classify(self, listings):
+        """Return the status of every listing: "new", "changed" or "unchanged"."""
+
+        urls = [listing["url"] for listing in listings if listing.get("url")]
+        known = {}
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            rows = self.connection.execute(
+                f"SELECT url, content_hash FROM listings WHERE url IN ({','.join('?' * len(chunk))})", chunk
+            )
+            known.update(rows)
+
+        statuses = []
+        for listing in listings:
+            previous = known.get(listing.get("url"))
+            if previous is None:
+                statuses.append("new")
+            else:
+                statuses.append("unchanged" if previous == self.content_hash(listing) else "changed")
+
+        return statuses
+
+    def commit_page(self, listings, checkpoint):
+        """Record the listings of a finished page and the new checkpoint in one transaction."""
+
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.connection:
+            self.connection.executemany(
+                """INSERT INTO listings (url, content_hash, first_seen, last_seen) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET content_hash = excluded.content_hash, last_seen = excluded.last_seen""",
+                [(listing["url"], self.content_hash(listing), now, now) for listing in listings if listing.get("url")],
+            )
+            self._write_state(checkpoint)
+
+    def _write_state(self, values):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO crawl_state (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in values.items()],
+        )
+
+    def save_checkpoint(self, checkpoint):
+        with self.connection:
+            self._write_state(checkpoint)
+
+    def load_checkpoint(self):
+        return {key: json.loads(value) for key, value in self.connection.execute("SELECT key, value FROM crawl_state")}
+
+    def close(self):
+        self.connection.close()
+
+
+async def scrape_property24_async(config=None):
+    """Scrape the listings with a pool of pages crawling in parallel under a global rate limit.
+
+    Pages are fetched concurrently but committed strictly in page order: the rows of a page are appended to the
+    output CSV and flushed, then its listings and the checkpoint are saved in the ListingIndex. The first page
+    without cards marks the end, and pages after it that were already in flight are discarded.
+
+    With incremental=True, only listings that are new or whose fields changed since the last run are written, and
+    the crawl stops after the first page made only of known URLs. With resume=True, an interrupted run continues
+    after its last committed page, appending to its CSV (truncated back to the checkpointed size first).
+
+    Returns a summary with the pages committed, the listings seen and the rows written.
+    """
+
+    from playwright.async_api import async_playwright
+
+    config = config or ScraperConfig()
+    rate_limiter = RateLimiter(config.min_delay, config.max_delay)
+    index = ListingIndex(config.index_path)
+    checkpoint = index.load_checkpoint()
+
+    start_page = config.start_page
+    csv_offset = None
+    if config.resume and checkpoint.get("status") == "running" and checkpoint.get("output_file") == config.output_file:
+        start_page = checkpoint["last_page"] + 1
+        csv_offset = checkpoint["csv_offset"]
+        print(f"↩️ Resuming after page {checkpoint['last_page']} into {config.output_file}")
+
+    os.makedirs(os.path.dirname(config.output_file) or ".", exist_ok=True)
+    if csv_offset is None:
+        csv_file = open(config.output_file, "w", newline="", encoding="utf-8")
+        csv.DictWriter(csv_file, fieldnames=FIELDNAMES).writeheader()
+    else:
+        # Drop rows written after the last checkpoint, they belong to a page that was never committed
+        csv_file = open(config.output_file, "r+", newline="", encoding="utf-8")
+        csv_file.truncate(csv_offset)
+        csv_file.seek(csv_offset)
+    writer = csv.DictWriter(csv_file, fieldnames=FIELDNAMES)
+    csv_file.flush()
+
+    index.save_checkpoint({
+        "status": "running",
+        "output_file": config.output_file,
+        "incremental": config.incremental,
+        "last_page": start_page - 1,
+        "csv_offset": csv_file.tell(),
+    })
+
+    fetched = {}
+    summary = {"pages": 0, "listings": 0, "written": 0, "new": 0, "changed": 0}
+    state = {"next_page": start_page, "next_commit": start_page, "last_page": None}
+    if config.max_pages is not None:
+        state["last_page"] = start_page + config.max_pages - 1
+
+    def stop_after(page_num):
+        if state["last_page"] is None or page_num < state["last_page"]:
+            state["last_page"] = page_num
+
+    def claim_page():
+        page_num = state["next_page"]
+        if state["last_page"] is not None and page_num > state["last_page"]:
+            return None
+        state["next_page"] += 1
+        return page_num
+
+    def commit_ready_pages():
+        while state["next_commit"] in fetched:
+            page_num = state["next_commit"]
+            if state["last_page"] is not None and page_num > state["last_page"]:
+                return
+
+            listings = fetched.pop(page_num)
+            if not listings:
+                print(f"✅ No listings on page {page_num}. Stopping.")
+                stop_after(page_num - 1)
+                return
+
+            statuses = index.classify(listings)
+            rows = listings
+            if config.incremental:
+                rows = [listing for listing, status in zip(listings, statuses) if status != "unchanged"]
+            writer.writerows(rows)
+            csv_file.flush()
+            index.commit_page(listings, {"last_page": page_num, "csv_offset": csv_file.tell()})
+
+            summary["pages"] += 1
+            summary["listings"] += len(listings)
+            summary["written"] += len(rows)
+            summary["new"] += statuses.count("new")
+            summary["changed"] += statuses.count("changed")
+            print(f"   💾 Page {page_num}: {statuses.count('new')} new, {statuses.count('changed')} changed, "
+                  f"{len(rows)} rows written")
+
+            state["next_commit"] += 1
+            if config.incremental and all(status != "new" for status in statuses):
+                print(f"✅ Page {page_num} holds only known listings. Stopping.")
+                stop_after(page_num)
+                return
+
+    async def worker(browser):
+        context = await browser.new_context()
+        page = await context.new_page()
+        try:
+            while (page_num := claim_page()) is not None:
+                await rate_limiter.acquire()
+                # Another worker may have found the last page while this one was waiting
+                if state["last_page"] is not None and page_num > state["last_page"]:
+                    break
+
+                url = config.page_url(page_num)
+                print(f"📄 Fetching page {page_num}… {url}")
+                fetched[page_num] = await fetch_listings(page, url, config)
+                print(f"   → Found {len(fetched[page_num])} listings on page {page_num}")
+                commit_ready_pages()
+        finally:
+            await context.close()
+
+    start = time.perf_counter()
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            try:
+                await asyncio.gather(*(worker(browser) for _ in range(config.concurrency)))
+            finally:
+                await browser.close()
+
+        index.save_checkpoint({"status": "complete"})
+    finally:
+        csv_file.close()
+        index.close()
+
+    print(f"🏁 Done in {time.perf_counter() - start:.1f}s! {summary['pages']} pages, {summary['listings']} listings, "
+          f"{summary['new']} new, {summary['changed']} changed")
+    print(f"📂 {summary['written']} rows saved to {config.output_file}")
+
+    return summary
+
+
 if __name__ == "__main__":
-    scrape_property24(start_page=1)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape Property24 Nairobi rentals.")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="crawl pages in parallel")
+    parser.add_argument("--start-page", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=ScraperConfig.concurrency)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--page-url-template", default=ScraperConfig.page_url_template)
+    parser.add_argument("--min-delay", type=float, default=ScraperConfig.min_delay)
+    parser.add_argument("--max-delay", type=float, default=ScraperConfig.max_delay)
+    parser.add_argument("--output-file", default=ScraperConfig.output_file)
+    parser.add_argument("--index-path", default=ScraperConfig.index_path)
+    parser.add_argument("--incremental", action="store_true",
+                        help="only write new or changed listings and stop at the first page without new ones")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run after its last page")
+    args = parser.parse_args()
+
+    if args.use_async:
+        asyncio.run(scrape_property24_async(ScraperConfig(
+            base_url=args.base_url,
+            page_url_template=args.page_url_template,
+            start_page=args.start_page,
+            max_pages=args.max_pages,
+            concurrency=args.concurrency,
+            min_delay=args.min_delay,
+            max_delay=args.max_delay,
+            output_file=args.output_file,
+            index_path=args.index_path,
+            incremental=args.incremental,
+            resume=args.resume,
+        )))
+    else:
+        scrape_property24(start_page=args.start_page)
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import pickle
+import sys
+
+import numpy as np
+from scipy import sparse
+
+from src.exception import CustomException
+from src.logger import logging
+
+# Bump when the layout of a cache entry changes so old entries are never read back
+FIT_CACHE_VERSION = 1
+
+
+class FitCache:
+    """
+    Class Name : FitCache
+    Description : This class is a persistent, content-addressed cache of tuned models. An entry holds the fitted best
+                  estimator and its report, and is keyed by a hash of the data, the estimator class and parameters,
+                  the hyperparameter grid and the search configuration. Entries live as pickle files in one directory
+                  and the least recently used ones are evicted once the directory grows past max_bytes.
+    Attributes :
+        cache_dir (str): The directory holding the cache entries.
+        max_bytes (int): The maximum total size of the entries in bytes.
+    Methods :
+        make_key(model, params, arrays, options): Returns the cache key of a model search.
+        get(key): Returns the cached (report, estimator) pair or None.
+        put(key, report, estimator): Stores a pair and evicts old entries if needed.
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def _hash_array(cls, digest, array):
+        if sparse.issparse(array):
+            array = sparse.csr_matrix(array)
+            digest.update(f"csr{array.shape}".encode())
+            for component in (array.data, array.indices, array.indptr):
+                cls._hash_array(digest, component)
+            return
+
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(array)
+
+    @classmethod
+    def make_key(cls, model, params, arrays, options):
+        """
+        Method Name : make_key
+        Description : This method hashes everything a model search result depends on.
+        Parameters :
+            model (estimator): The untuned model instance.
+            params (dict): The hyperparameter grid of the model.
+            arrays (list): The training and testing arrays.
+            options (dict): The search configuration (strategy, CV folds, early stopping, budget, ...).
+        Returns : The hex digest used as cache key.
+        """
+
+        digest = hashlib.sha256()
+        digest.update(f"v{FIT_CACHE_VERSION}".encode())
+        digest.update(f"{type(model).__module__}.{type(model).__qualname__}".encode())
+        digest.update(repr(sorted(model.get_params().items())).encode())
+        digest.update(repr(sorted((name, list(values)) for name, values in params.items())).encode())
+        digest.update(repr(sorted(options.items())).encode())
+
+        for array in arrays:
+            cls._hash_array(digest, array)
+
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """
+        Method Name : get
+        Description : This method returns the cached (report, estimator) pair of a key, marking it as recently used.
+        Parameters :
+            key (str): The key returned by make_key.
+        Returns : The (report, estimator) tuple, or None when the key is not cached or the entry is unreadable.
+        """
+
+        entry_path = self._entry_path(key)
+        if not os.path.exists(entry_path):
+            return None
+
+        try:
+            with open(entry_path, "rb") as file_obj:
+                entry = pickle.load(file_obj)
+
+            # The modification time doubles as the last access time for LRU eviction
+            os.utime(entry_path)
+
+            return entry["report"], entry["estimator"]
+
+        except Exception as e:
+            logging.info(f"Ignoring unreadable fit cache entry {entry_path}: {e}")
+            return None
+
+    def put(self, key, report, estimator):
+        """
+        Method Name : put
+        Description : This method stores a (report, estimator) pair and evicts the least recently used entries while
+                      the cache is larger than max_bytes.
+        Parameters :
+            key (str): The key returned by make_key.
+            report (dict): The model report entry.
+            estimator (estimator): The fitted best estimator.
+        On Failure : Raises a CustomException if any error occurs during the process.
+        """
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+            entry_path = self._entry_path(key)
+            tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as file_obj:
+                pickle.dump({"report": report, "estimator": estimator}, file_obj)
+            os.replace(tmp_path, entry_path)
+
+            self.evict()
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def evict(self):
+        """
+        Method Name : evict
+        Description : This method deletes the least recently used entries until the cache fits in max_bytes.
+        """
+
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.cache_dir, file_name))
+                entries.append((stat.st_mtime, stat.st_size, file_name))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, file_name in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, file_name))
+            total_bytes -= size
+            logging.info(f"Evicted fit cache entry {file_name}")
@@ -1,21 +1,249 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
 
-# Generate log filename with timestamp
-LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
+# "file" (default): one synchronous, timestamped log file per process
+# "queue": JSON records handed to a background writer thread, one size-rotated file per process,
+#          with per-logger sampling and rate limits
+LOG_MODE = os.environ.get("LOG_MODE", "file").strip().lower()
+LOG_MODES = ("file", "queue")
 
-# Path for logs directory 
+LOG_FORMAT = "[%(asctime)s] %(lineno)d %(name)s %(levelname)s %(message)s"
+
+# Logger of the per-request events of the serving app
+REQUEST_LOGGER_NAME = "app.request"
+
+# Path for logs directory
 logs_dir = os.path.join(os.getcwd(), "logs")
 os.makedirs(logs_dir, exist_ok=True)   # Creates 'logs' if it doesn’t exist
 
-# Full log file path
-LOG_FILE_PATH = os.path.join(logs_dir, LOG_FILE)
+# Attributes every LogRecord has; anything else was passed through extra= and goes into the JSON record
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "suppressed"}
+
+
+def _parse_logger_values(value):
+    """
+    Function Name : _parse_logger_values
+    Description : This function parses a "logger=value,logger=value" environment variable.
+    Parameters :
+        value (str): The variable value, e.g. "app.request=0.1,src.pipeline=0.5".
+    Returns :
+        dict: The logger names mapped to float values.
+    """
+
+    values = {}
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        name, _, number = item.rpartition("=")
+        values[name.strip()] = float(number)
+
+    return values
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Class Name : JsonFormatter
+    Description : This class formats a record as one JSON object per line, with the values passed through extra= as
+                  fields of their own.
+    """
+
+    def format(self, record):
+        payload = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if getattr(record, "suppressed", 0):
+            payload["suppressed"] = record.suppressed
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+
+        return json.dumps(payload, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Class Name : SamplingFilter
+    Description : This class drops part of the records below WARNING before they are queued. A logger can keep a
+                  random fraction of its records (sample_rates) and at most a number of records per second
+                  (rate_limits, a token bucket allowing a one second burst). A rule applies to the logger it names
+                  and to its children, the most specific rule wins. The next record kept after some were rate
+                  limited carries their number in its "suppressed" field.
+    Attributes :
+        sample_rates (dict): Logger names mapped to the fraction of records kept.
+        rate_limits (dict): Logger names mapped to the maximum number of records per second.
+    """
+
+    def __init__(self, sample_rates=None, rate_limits=None):
+        super().__init__()
+        self.sample_rates = dict(sample_rates or {})
+        self.rate_limits = dict(rate_limits or {})
+        self._buckets = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _rule(rules, name):
+        while name:
+            if name in rules:
+                return name, rules[name]
+            name = name.rpartition(".")[0]
+        return None, None
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        _, sample_rate = self._rule(self.sample_rates, record.name)
+        if sample_rate is not None and random.random() >= sample_rate:
+            return False
+
+        rule_name, rate_limit = self._rule(self.rate_limits, record.name)
+        if rate_limit is None:
+            return True
+
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(rule_name, (rate_limit, now))
+            tokens = min(rate_limit, tokens + (now - last) * rate_limit)
+            if tokens < 1:
+                self._buckets[rule_name] = (tokens, now)
+                self._suppressed[rule_name] = self._suppressed.get(rule_name, 0) + 1
+                return False
+
+            self._buckets[rule_name] = (tokens - 1, now)
+            record.suppressed = self._suppressed.pop(rule_name, 0)
+
+        return True
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Class Name : StructuredQueueHandler
+    Description : This class queues records for the background writer. Unlike QueueHandler, the message is merged
+                  with its arguments and the traceback rendered on the calling thread without being folded into the
+                  message, so the writer can still emit them as separate JSON fields.
+    """
+
+    def prepare(self, record):
+        message = record.getMessage()
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = logging.Formatter().formatException(record.exc_info)
+
+        # The queue handler is the only root handler, so the record is not copied
+        record.msg, record.args = message, None
+        record.exc_info, record.exc_text = None, exc_text
+
+        return record
+
+
+_listener = None
+
+
+def _process_log_file():
+    name = os.path.splitext(os.path.basename(sys.argv[0] or ""))[0] or "python"
+    return os.path.join(logs_dir, f"{name}_{os.getpid()}.log")
+
+
+def configure_queue_logging(level=logging.INFO):
+    """
+    Function Name : configure_queue_logging
+    Description : This function routes the root logger through a queue: the calling thread only filters the record
+                  and puts it on the queue, and a QueueListener thread formats it as JSON and appends it to a
+                  size-rotated file of this process. It is called at import when LOG_MODE=queue and again in every
+                  forked child, which gets its own file and writer thread.
+                  Settings, from the environment: LOG_MAX_BYTES (default 10 MB) and LOG_BACKUP_COUNT (default 3) for
+                  the rotation, LOG_SAMPLING and LOG_RATE_LIMIT as "logger=value,..." for the SamplingFilter.
+    Parameters :
+        level (int): The level of the root logger.
+    Returns :
+        logging.handlers.QueueListener: The started listener.
+    """
+
+    global _listener, LOG_FILE_PATH
+
+    _stop_queue_logging()
+
+    LOG_FILE_PATH = _process_log_file()
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE_PATH,
+        maxBytes=int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+        backupCount=int(os.environ.get("LOG_BACKUP_COUNT", 3)),
+        delay=True,
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(
+        sample_rates=_parse_logger_values(os.environ.get("LOG_SAMPLING")),
+        rate_limits=_parse_logger_values(os.environ.get("LOG_RATE_LIMIT")),
+    ))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _listener.start()
+
+    return _listener
+
+
+def _stop_queue_logging():
+    # Drains the queue so the last records before exit are written
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def _restart_queue_logging_after_fork():
+    # The writer thread does not survive fork(): give the child its own queue, thread and file
+    global _listener
+
+    _listener = None
+    configure_queue_logging(logging.getLogger().level)
+
+
+if LOG_MODE not in LOG_MODES:
+    raise ValueError(f"Unknown LOG_MODE {LOG_MODE!r}, expected one of {LOG_MODES}")
+
+if LOG_MODE == "queue":
+    configure_queue_logging()
+    atexit.register(_stop_queue_logging)
+    os.register_at_fork(after_in_child=_restart_queue_logging_after_fork)
+else:
+    # Generate log filename with timestamp
+    LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
+
+    # Full log file path
+    LOG_FILE_PATH = os.path.join(logs_dir, LOG_FILE)
 
-# Configure logging
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[%(asctime)s] %(lineno)d %(name)s %(levelname)s %(message)s",
-    level=logging.INFO,
-)
+    # Configure logging
+    logging.basicConfig(
+        filename=LOG_FILE_PATH,
+        format=LOG_FORMAT,
+        level=logging.INFO,
+    )
 
+    # Per-request events would put a synchronous file write on every request, they need LOG_MODE=queue
+    logging.getLogger(REQUEST_LOGGER_NAME).setLevel(logging.WARNING)
@@ -0,0 +1,394 @@
+import copy
+import math
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import GridSearchCV, KFold, ParameterGrid
+
+from src.logger import logging
+
+# Number of cross-validation folds used by every search strategy
+CV_FOLDS = 3
+
+# Constructor parameters that count boosting rounds / trees; used as the successive halving resource
+RESOURCE_PARAMS = ("n_estimators", "iterations")
+
+# Models with native early stopping on a validation split
+EARLY_STOPPING_MODELS = ("GradientBoostingRegressor", "XGBRegressor", "CatBoostRegressor")
+
+# Rounds without improvement before boosting stops, and the share of the training rows held out to detect it
+EARLY_STOPPING_ROUNDS = 10
+VALIDATION_FRACTION = 0.1
+
+# Seed of the row subsample used when the number of samples is the halving resource
+SAMPLE_RESOURCE_SEED = 42
+
+# Models whose training can continue from a fitted instance; the others need a full retrain
+WARM_START_MODELS = ("GradientBoostingRegressor", "RandomForestRegressor", "XGBRegressor", "CatBoostRegressor")
+
+
+def count_grid_fits(params):
+    """
+    Function Name : count_grid_fits
+    Description : This function returns the number of search fits an exhaustive grid search over params makes.
+    Parameters :
+        params (dict): The hyperparameter grid of a model.
+    Returns :
+        int: The number of candidates times the number of CV folds.
+    """
+
+    return len(ParameterGrid(params)) * CV_FOLDS
+
+
+def enable_early_stopping(model, params):
+    """
+    Function Name : enable_early_stopping
+    Description : This function switches a boosting model to native early stopping. The number of rounds is set to the
+                  largest value in its grid and removed from the grid, since early stopping picks it per fit.
+    Parameters :
+        model (estimator): The model instance. It is modified in place.
+        params (dict): The hyperparameter grid of the model.
+    Returns :
+        tuple: A flag telling whether early stopping was enabled, and the grid left to search.
+    """
+
+    model_type = type(model).__name__
+    if model_type not in EARLY_STOPPING_MODELS:
+        return False, params
+
+    params = dict(params)
+    for resource in RESOURCE_PARAMS:
+        if resource in params:
+            model.set_params(**{resource: max(params.pop(resource))})
+
+    if model_type == "GradientBoostingRegressor":
+        model.set_params(n_iter_no_change=EARLY_STOPPING_ROUNDS, validation_fraction=VALIDATION_FRACTION)
+    elif model_type == "XGBRegressor":
+        model.set_params(early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+
+    return True, params
+
+
+def fit_model(model, X, y, early_stopping=False):
+    """
+    Function Name : fit_model
+    Description : This function fits a model. XGBoost and CatBoost need an explicit evaluation set for early stopping,
+                  so with early_stopping the last VALIDATION_FRACTION of the rows is held out for it.
+    Parameters :
+        model (estimator): The model instance to fit.
+        X (numpy.ndarray): The input features.
+        y (numpy.ndarray): The target variable.
+        early_stopping (bool): Whether enable_early_stopping was applied to the model.
+    Returns :
+        estimator: The fitted model.
+    """
+
+    model_type = type(model).__name__
+    if not early_stopping or model_type not in ("XGBRegressor", "CatBoostRegressor"):
+        return model.fit(X, y)
+
+    n_val = max(1, int(len(y) * VALIDATION_FRACTION))
+    X_fit, X_val, y_fit, y_val = X[:-n_val], X[-n_val:], y[:-n_val], y[-n_val:]
+
+    if model_type == "XGBRegressor":
+        return model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+
+    return model.fit(X_fit, y_fit, eval_set=(X_val, y_val), early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+
+
+def continue_training(model, X, y, n_estimators):
+    """
+    Function Name : continue_training
+    Description : This function adds boosting rounds (or trees) fitted on new data to a copy of a fitted model, with the
+                  native mechanism of each library: xgb_model for XGBoost, init_model for CatBoost and warm_start for
+                  the sklearn ensembles. Gradient boosting keeps fitting the residuals of the current model, the random
+                  forest averages in trees grown on the new rows. Early stopping is switched off for the update since
+                  it needs a validation split of its own.
+    Parameters :
+        model (estimator): The fitted model. It is left untouched.
+        X (numpy.ndarray): The input features of the new rows.
+        y (numpy.ndarray): The target of the new rows.
+        n_estimators (int): The number of rounds / trees to add.
+    Returns :
+        estimator: The updated copy of the model.
+    On Failure : Raises a ValueError for a model outside WARM_START_MODELS.
+    """
+
+    model_type = type(model).__name__
+    if model_type not in WARM_START_MODELS:
+        raise ValueError(f"{model_type} cannot continue training, expected one of {WARM_START_MODELS}")
+
+    if model_type == "XGBRegressor":
+        booster = model.get_booster()
+        best_iteration = booster.attr("best_iteration")
+        if best_iteration is not None:
+            # Predictions stop at best_iteration, so rounds appended after the trees early stopping discarded would
+            # never be used: continue from the trees the model actually predicts with
+            booster = booster[: int(best_iteration) + 1]
+
+        updated = clone(model).set_params(n_estimators=n_estimators, early_stopping_rounds=None)
+        updated.fit(X, y, xgb_model=booster, verbose=False)
+        # The update has no validation split, a best iteration carried over would truncate its predictions
+        updated.get_booster().set_attr(best_iteration=None, best_score=None)
+        return updated
+
+    if model_type == "CatBoostRegressor":
+        params = dict(model.get_params(), iterations=n_estimators)
+        params.pop("early_stopping_rounds", None)
+        return type(model)(**params).fit(X, y, init_model=model)
+
+    updated = copy.deepcopy(model)
+    # With early stopping a gradient boosting model fitted fewer stages (n_estimators_) than n_estimators
+    fitted = model.n_estimators_ if model_type == "GradientBoostingRegressor" else len(model.estimators_)
+    updated.set_params(warm_start=True, n_estimators=fitted + n_estimators)
+    if model_type == "GradientBoostingRegressor":
+        updated.set_params(n_iter_no_change=None)
+
+    return updated.fit(X, y)
+
+
+def count_estimators(model):
+    """
+    Function Name : count_estimators
+    Description : This function returns the number of boosting rounds or trees a fitted model predicts with.
+    Parameters :
+        model (estimator): A fitted model of WARM_START_MODELS.
+    Returns :
+        int: The number of rounds / trees.
+    """
+
+    model_type = type(model).__name__
+    if model_type == "XGBRegressor":
+        booster = model.get_booster()
+        best_iteration = booster.attr("best_iteration")
+        return booster.num_boosted_rounds() if best_iteration is None else int(best_iteration) + 1
+    if model_type == "CatBoostRegressor":
+        return model.tree_count_
+    if model_type == "GradientBoostingRegressor":
+        return model.n_estimators_
+
+    return len(model.estimators_)
+
+
+def _score_candidate(model, candidate, X, y, train_idx, val_idx, early_stopping):
+    """
+    Function Name : _score_candidate
+    Description : This function fits one candidate on one CV fold and returns its R2 score on the held-out fold.
+                  Like GridSearchCV, a candidate that fails to fit scores NaN instead of aborting the search.
+    """
+
+    try:
+        estimator = clone(model).set_params(**candidate)
+        fit_model(estimator, X[train_idx], y[train_idx], early_stopping=early_stopping)
+
+        return r2_score(y[val_idx], estimator.predict(X[val_idx]))
+
+    except Exception as e:
+        logging.info(f"Fit of {type(model).__name__} with {candidate} failed, scoring it NaN: {e}")
+        return np.nan
+
+
+def _run_rung(model, candidates, X, y, n_jobs, early_stopping, deadline):
+    """
+    Function Name : _run_rung
+    Description : This function cross-validates candidates in batches of n_jobs and stops between batches once the
+                  deadline has passed.
+    Returns :
+        tuple: The mean CV score of every candidate evaluated, in order, and the number of fits made.
+    """
+
+    folds = list(KFold(n_splits=CV_FOLDS).split(X))
+    scores = []
+
+    for start in range(0, len(candidates), n_jobs):
+        if deadline is not None and time.perf_counter() > deadline and scores:
+            break
+
+        batch = candidates[start:start + n_jobs]
+        fold_scores = Parallel(n_jobs=n_jobs)(
+            delayed(_score_candidate)(model, candidate, X, y, train_idx, val_idx, early_stopping)
+            for candidate in batch
+            for train_idx, val_idx in folds
+        )
+        scores.extend(np.asarray(fold_scores).reshape(len(batch), CV_FOLDS).mean(axis=1))
+
+    return scores, len(scores) * CV_FOLDS
+
+
+def _refit_best(model, best_params, X, y, early_stopping):
+    """
+    Function Name : _refit_best
+    Description : This function fits a fresh copy of the model with the best parameters on the full training data.
+    Returns :
+        tuple: The fitted estimator and the refit time in seconds.
+    """
+
+    start = time.perf_counter()
+    estimator = clone(model).set_params(**best_params)
+    fit_model(estimator, X, y, early_stopping=early_stopping)
+
+    return estimator, time.perf_counter() - start
+
+
+def grid_search(model, params, X, y, n_jobs=1, early_stopping=False, time_budget=None, factor=3):
+    """
+    Function Name : grid_search
+    Description : This function is the reference strategy: every candidate in the grid is cross-validated. Without
+                  early stopping or a time budget it is a plain GridSearchCV; otherwise the candidates are scored one
+                  batch at a time until the budget runs out.
+    Parameters :
+        model (estimator): The model instance to tune.
+        params (dict): The hyperparameter grid to search.
+        X (numpy.ndarray): The training input features.
+        y (numpy.ndarray): The training target variable.
+        n_jobs (int): The number of processes used for the candidates and CV folds.
+        early_stopping (bool): Whether enable_early_stopping was applied to the model.
+        time_budget (float, optional): The wall-clock budget of the search in seconds.
+        factor (int): Unused, accepted so every strategy has the same signature.
+    Returns :
+        dict: The best estimator refit on the full training data, its parameters and refit time, the number of
+              search fits made and whether the time budget ran out.
+    """
+
+    if not early_stopping and time_budget is None:
+        # GridSearchCV already refits the best candidate on the full training data
+        gs = GridSearchCV(model, params, cv=CV_FOLDS, n_jobs=n_jobs)
+        gs.fit(X, y)
+
+        return {
+            "best_estimator": gs.best_estimator_,
+            "best_params": gs.best_params_,
+            "refit_time": gs.refit_time_,
+            "n_fits": count_grid_fits(params),
+            "budget_exhausted": False,
+        }
+
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    candidates = list(ParameterGrid(params))
+
+    scores, n_fits = _run_rung(model, candidates, X, y, n_jobs, early_stopping, deadline)
+    best_params = candidates[int(np.nanargmax(scores))]
+    best_estimator, refit_time = _refit_best(model, best_params, X, y, early_stopping)
+
+    return {
+        "best_estimator": best_estimator,
+        "best_params": best_params,
+        "refit_time": refit_time,
+        "n_fits": n_fits,
+        "budget_exhausted": len(scores) < len(candidates),
+    }
+
+
+def successive_halving_search(model, params, X, y, n_jobs=1, early_stopping=False, time_budget=None, factor=3):
+    """
+    Function Name : successive_halving_search
+    Description : This function runs successive halving: all candidates are cross-validated on a small resource, the
+                  best 1/factor of them move on to a factor times larger resource, and so on until one candidate is
+                  left. The resource is the number of boosting rounds / trees (n_estimators or iterations) when the
+                  grid searches it, and the number of training rows otherwise.
+    Parameters :
+        model (estimator): The model instance to tune.
+        params (dict): The hyperparameter grid to search.
+        X (numpy.ndarray): The training input features.
+        y (numpy.ndarray): The training target variable.
+        n_jobs (int): The number of processes used for the candidates and CV folds.
+        early_stopping (bool): Whether enable_early_stopping was applied to the model.
+        time_budget (float, optional): The wall-clock budget of the search in seconds.
+        factor (int): The elimination factor between two rungs.
+    Returns :
+        dict: The best estimator refit on the full training data, its parameters and refit time, the number of
+              search fits made and whether the time budget ran out.
+    """
+
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+
+    params = dict(params)
+    resource = next((name for name in RESOURCE_PARAMS if name in params), None)
+    resource_values = sorted(params.pop(resource)) if resource else None
+    candidates = list(ParameterGrid(params))
+
+    # Number of rungs that still have more than one candidate to compare
+    n_rungs = max(1, math.ceil(math.log(len(candidates), factor))) if len(candidates) > 1 else 0
+
+    # Start small enough that the last rung runs on the full resource
+    if resource is None:
+        max_resource = len(y)
+        min_resource = max(CV_FOLDS * 10, max_resource // factor ** max(n_rungs - 1, 0))
+
+        # Rows fit by the planned rungs against the exhaustive grid on every row; halving on a small training set
+        # (where min_resource is close to all the rows) can cost more than the grid it replaces
+        planned_rows, n_candidates = 0, len(candidates)
+        for rung in range(n_rungs):
+            planned_rows += n_candidates * CV_FOLDS * min(max_resource, min_resource * factor ** rung)
+            n_candidates = max(1, math.ceil(n_candidates / factor))
+            if n_candidates == 1:
+                break
+
+        if planned_rows >= len(candidates) * CV_FOLDS * max_resource:
+            return grid_search(model, params, X, y, n_jobs=n_jobs, early_stopping=early_stopping,
+                               time_budget=time_budget)
+
+        row_order = np.random.RandomState(SAMPLE_RESOURCE_SEED).permutation(len(y))
+    else:
+        max_resource = resource_values[-1]
+        min_resource = max(resource_values[0], max_resource / factor ** max(n_rungs - 1, 0))
+
+    n_fits = 0
+    budget_exhausted = False
+    best_params = dict(candidates[0])
+    best_resource = max_resource
+
+    for rung in range(n_rungs):
+        target = min(max_resource, min_resource * factor ** rung)
+        if resource is None:
+            rung_resource = int(target)
+            X_rung, y_rung = X[row_order[:rung_resource]], y[row_order[:rung_resource]]
+            rung_candidates = candidates
+        else:
+            # Snap to the smallest grid value that covers the target so only values from the grid are tried
+            rung_resource = next(value for value in resource_values if value >= target)
+            X_rung, y_rung = X, y
+            rung_candidates = [dict(candidate, **{resource: rung_resource}) for candidate in candidates]
+
+        scores, rung_fits = _run_rung(model, rung_candidates, X_rung, y_rung, n_jobs, early_stopping, deadline)
+        n_fits += rung_fits
+
+        ranking = np.argsort(-np.nan_to_num(np.asarray(scores), nan=-np.inf), kind="stable")
+        best_params = dict(candidates[ranking[0]])
+        best_resource = rung_resource
+
+        if len(scores) < len(candidates):
+            budget_exhausted = True
+            break
+
+        candidates = [candidates[i] for i in ranking[:max(1, math.ceil(len(candidates) / factor))]]
+        if len(candidates) == 1:
+            best_params = dict(candidates[0])
+            break
+
+    if resource is not None:
+        # The winner is refit with the resource it won at, or the full resource if no comparison was needed
+        best_params[resource] = best_resource if n_rungs else max_resource
+
+    logging.info(f"Successive halving on {type(model).__name__}: {n_fits} fits over {n_rungs} rungs "
+                 f"with {resource or 'n_samples'} as resource")
+
+    best_estimator, refit_time = _refit_best(model, best_params, X, y, early_stopping)
+
+    return {
+        "best_estimator": best_estimator,
+        "best_params": best_params,
+        "refit_time": refit_time,
+        "n_fits": n_fits,
+        "budget_exhausted": budget_exhausted,
+    }
+
+
+# Search strategies available to evaluate_models, keyed by the name used in ModelTrainerConfig.search_strategy
+SEARCH_STRATEGIES = {
+    "grid": grid_search,
+    "halving": successive_halving_search,
+}
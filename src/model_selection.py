@@ -0,0 +1,162 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+from scipy import sparse
+
+from src.logger import logging
+from src.utils import load_object, save_object
+
+# "best_score": the highest test R2 (the historical behaviour)
+# "fastest_within_epsilon": the lowest single-row latency among the models at most epsilon below the best test R2
+SELECTION_POLICIES = ("best_score", "fastest_within_epsilon")
+
+# Single-row predictions timed per model: at least MIN_REPEATS, then until MAX_REPEATS or TIME_LIMIT seconds
+SINGLE_ROW_MIN_REPEATS = 5
+SINGLE_ROW_MAX_REPEATS = 200
+SINGLE_ROW_TIME_LIMIT = 1.0
+
+# Rows of the batch prediction timed per model, and the number of timed batches and artifact loads
+BATCH_ROWS = 1000
+BATCH_REPEATS = 3
+LOAD_REPEATS = 3
+
+
+def _dense_rows(X, n_rows):
+    # The serving path always predicts dense rows coming out of the preprocessor
+    rows = X[:n_rows]
+    return rows.toarray() if sparse.issparse(rows) else np.asarray(rows)
+
+
+def measure_serving_cost(model, X, compress=0, mmap_mode="r"):
+    """
+    Function Name : measure_serving_cost
+    Description : This function measures what a fitted model costs to serve: the latency of a single-row prediction
+                  (median and 95th percentile over up to SINGLE_ROW_MAX_REPEATS calls), the latency of a BATCH_ROWS-row
+                  prediction, and the size and load time of the artifact save_object writes for it. The artifact is
+                  written to a temporary directory and loaded the way PredictPipeline loads it; the load time is the
+                  median of LOAD_REPEATS loads, so it reflects a warm page cache.
+    Parameters :
+        model (estimator): The fitted model.
+        X (numpy.ndarray | scipy.sparse matrix): Rows to predict, e.g. the test features.
+        compress (int): The joblib compression level the model is saved with.
+        mmap_mode (str, optional): The mode the artifact is loaded with, as in PredictPipelineConfig.
+    Returns :
+        dict: single_row_latency_ms, single_row_p95_ms, batch_latency_ms, batch_rows, batch_rows_per_second,
+              model_size_mb and load_time_ms.
+    """
+
+    single_row = _dense_rows(X, 1)
+    batch = _dense_rows(X, BATCH_ROWS)
+
+    # The first call may build caches or spin up thread pools, it is not part of the steady state
+    model.predict(single_row)
+
+    single_row_times = []
+    deadline = time.perf_counter() + SINGLE_ROW_TIME_LIMIT
+    while len(single_row_times) < SINGLE_ROW_MAX_REPEATS and (
+        len(single_row_times) < SINGLE_ROW_MIN_REPEATS or time.perf_counter() < deadline
+    ):
+        start = time.perf_counter()
+        model.predict(single_row)
+        single_row_times.append(time.perf_counter() - start)
+
+    batch_times = []
+    for _ in range(BATCH_REPEATS):
+        start = time.perf_counter()
+        model.predict(batch)
+        batch_times.append(time.perf_counter() - start)
+    batch_time = float(np.median(batch_times))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "model.pkl")
+        save_object(file_path=file_path, obj=model, compress=compress)
+        model_size = os.path.getsize(file_path)
+
+        load_times = []
+        for _ in range(LOAD_REPEATS):
+            start = time.perf_counter()
+            loaded = load_object(file_path, mmap_mode=mmap_mode)
+            load_times.append(time.perf_counter() - start)
+            # Memory-mapped buffers keep the file open until the object goes away
+            del loaded
+
+    return {
+        "single_row_latency_ms": float(np.median(single_row_times)) * 1000,
+        "single_row_p95_ms": float(np.percentile(single_row_times, 95)) * 1000,
+        "batch_latency_ms": batch_time * 1000,
+        "batch_rows": batch.shape[0],
+        "batch_rows_per_second": batch.shape[0] / batch_time if batch_time > 0 else None,
+        "model_size_mb": model_size / 1024 ** 2,
+        "load_time_ms": float(np.median(load_times)) * 1000,
+    }
+
+
+def select_model(model_report, policy="best_score", epsilon=0.005, max_latency_ms=None, max_size_mb=None):
+    """
+    Function Name : select_model
+    Description : This function picks the model to ship from an evaluation report completed with serving costs.
+                  The budgets first drop the models whose single-row latency or artifact size exceed them, then the
+                  policy picks among the rest: "best_score" takes the highest test R2, "fastest_within_epsilon" takes
+                  the lowest single-row latency (then the smallest artifact) among the models whose test R2 is at most
+                  epsilon below the best remaining one.
+    Parameters :
+        model_report (dict): Model names mapped to their report, with test_score, single_row_latency_ms and
+                             model_size_mb.
+        policy (str): One of SELECTION_POLICIES.
+        epsilon (float): The test R2 the "fastest_within_epsilon" policy may give up for speed.
+        max_latency_ms (float, optional): The single-row latency budget in milliseconds.
+        max_size_mb (float, optional): The artifact size budget in megabytes.
+    Returns :
+        tuple: The chosen model name, and a JSON serializable record of the decision: the policy and its settings,
+               the models within the budgets, the model with the best test R2 overall, and the R2 given up, the
+               speedup and the size ratio of the chosen model relative to it.
+    On Failure : Raises a ValueError for an unknown policy or when no model fits the budgets.
+    """
+
+    if policy not in SELECTION_POLICIES:
+        raise ValueError(f"Unknown selection policy {policy!r}, expected one of {SELECTION_POLICIES}")
+
+    def within_budget(report):
+        return ((max_latency_ms is None or report["single_row_latency_ms"] <= max_latency_ms)
+                and (max_size_mb is None or report["model_size_mb"] <= max_size_mb))
+
+    # Dict order breaks score ties, as the selection by maximum test R2 always did
+    best_overall = max(model_report, key=lambda name: model_report[name]["test_score"])
+    eligible = [name for name, report in model_report.items() if within_budget(report)]
+    if not eligible:
+        fastest = min(report["single_row_latency_ms"] for report in model_report.values())
+        smallest = min(report["model_size_mb"] for report in model_report.values())
+        raise ValueError(f"No model fits the budget (max_latency_ms={max_latency_ms}, max_size_mb={max_size_mb}), "
+                         f"the fastest one takes {fastest:.3f} ms per row and the smallest one {smallest:.3f} MB")
+
+    best_eligible = max(eligible, key=lambda name: model_report[name]["test_score"])
+    if policy == "best_score":
+        chosen = best_eligible
+    else:
+        threshold = model_report[best_eligible]["test_score"] - epsilon
+        chosen = min(
+            (name for name in eligible if model_report[name]["test_score"] >= threshold),
+            key=lambda name: (model_report[name]["single_row_latency_ms"], model_report[name]["model_size_mb"]),
+        )
+
+    chosen_report, best_report = model_report[chosen], model_report[best_overall]
+    selection = {
+        "policy": policy,
+        "epsilon": epsilon if policy == "fastest_within_epsilon" else None,
+        "max_latency_ms": max_latency_ms,
+        "max_size_mb": max_size_mb,
+        "eligible": eligible,
+        "chosen": chosen,
+        "best_score_model": best_overall,
+        "score_given_up": best_report["test_score"] - chosen_report["test_score"],
+        "latency_speedup": best_report["single_row_latency_ms"] / chosen_report["single_row_latency_ms"],
+        "size_ratio": chosen_report["model_size_mb"] / best_report["model_size_mb"],
+    }
+
+    if chosen != best_overall:
+        logging.info(f"Selected {chosen} over {best_overall}: {selection['score_given_up']:.4f} R2 given up for a "
+                     f"{selection['latency_speedup']:.1f}x faster single-row prediction")
+
+    return chosen, selection
@@ -0,0 +1,203 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.predict_pipeline import FEATURE_COLUMNS, PredictPipeline, PredictPipelineConfig
+from src.utils import FrameChunkWriter, iter_frame_chunks
+
+# The PredictPipeline of a pool worker, built once by _init_worker
+_WORKER_PIPELINE = None
+
+
+@dataclass
+class BatchPredictConfig:
+    """
+    Class Name : BatchPredictConfig
+    Description : This class holds the configuration for offline batch scoring.
+    Attributes :
+        chunk_size (int): The number of input rows read, scored and written at a time.
+        workers (int, optional): The number of scoring processes, None for one per core. 0 scores the chunks in this
+                                 process, which is also what None does on a single core.
+        max_pending_chunks (int, optional): The number of chunks read ahead of the writer, None for twice the number
+                                            of workers. Together with chunk_size it bounds the memory used.
+        include_inputs (bool): Whether the output holds the input columns next to the predictions.
+        prediction_column (str): The name of the prediction column.
+        predict_pipeline_config (PredictPipelineConfig): The artifacts and scoring settings of every worker.
+    """
+
+    chunk_size: int = 100_000
+    workers: Optional[int] = None
+    max_pending_chunks: Optional[int] = None
+    include_inputs: bool = True
+    prediction_column: str = "prediction"
+    predict_pipeline_config: PredictPipelineConfig = field(default_factory=PredictPipelineConfig)
+
+
+def _init_worker(predict_pipeline_config):
+    """
+    Function Name : _init_worker
+    Description : This function runs once in every pool worker: it loads the model and preprocessor, so the chunks
+                  sent to the worker only carry data.
+    Parameters :
+        predict_pipeline_config (PredictPipelineConfig): The artifacts and scoring settings.
+    """
+
+    global _WORKER_PIPELINE
+
+    _WORKER_PIPELINE = PredictPipeline(predict_pipeline_config)
+    _WORKER_PIPELINE.load()
+
+
+def _score_chunk(columns):
+    """
+    Function Name : _score_chunk
+    Description : This function scores one chunk with the pipeline of the current worker.
+    Parameters :
+        columns (dict): The FEATURE_COLUMNS of the chunk as numpy arrays.
+    Returns :
+        numpy.ndarray: One prediction per row.
+    """
+
+    return np.ravel(_WORKER_PIPELINE.predict(columns))
+
+
+class BatchPredictor:
+    """
+    Class Name : BatchPredictor
+    Description : This class scores a CSV or Parquet file of any size. The input is read in chunks and every chunk is
+                  scored by a process pool whose workers load the artifacts once. Chunks are written in input order
+                  as soon as they and all the chunks before them are scored, to a CSV or Parquet file (row groups are
+                  appended incrementally), so memory stays bounded by max_pending_chunks x chunk_size.
+    Attributes :
+        batch_predict_config (BatchPredictConfig): The batch scoring configuration.
+    Methods :
+        predict_file(input_path, output_path): Scores a file and returns the number of rows and the throughput.
+    """
+
+    def __init__(self, config=None):
+        """
+        Method Name : __init__
+        Description : This is the constructor method for the BatchPredictor class.
+        Parameters :
+            config (BatchPredictConfig, optional): The batch scoring configuration.
+        """
+
+        self.batch_predict_config = config or BatchPredictConfig()
+
+    def _output_frame(self, chunk, predictions):
+        config = self.batch_predict_config
+        output = chunk if config.include_inputs else chunk[[]]
+        return output.assign(**{config.prediction_column: predictions})
+
+    @staticmethod
+    def _chunk_columns(chunk):
+        missing_columns = [col for col in FEATURE_COLUMNS if col not in chunk.columns]
+        if missing_columns:
+            raise ValueError(f"Missing input columns: {missing_columns}")
+
+        # Column arrays take the fast path of PredictPipeline and pickle cheaply to the workers
+        return {col: chunk[col].to_numpy() for col in FEATURE_COLUMNS}
+
+    def predict_file(self, input_path, output_path):
+        """
+        Method Name : predict_file
+        Description : This method scores every row of the input file and writes the predictions, in input order, to
+                      the output file. The formats follow the file extensions (.csv or .parquet).
+        Parameters :
+            input_path (str): The file to score.
+            output_path (str): The file to write.
+        Returns : A dict with the number of rows and chunks, the number of workers, the elapsed seconds and rows/s.
+        On Failure : Raises a CustomException if any error occurs during the process.
+        """
+
+        try:
+            config = self.batch_predict_config
+            workers = config.workers
+            if workers is None:
+                # A single worker only adds pickling on top of the in-process loop
+                workers = os.cpu_count() if (os.cpu_count() or 1) > 1 else 0
+            max_pending = config.max_pending_chunks or 2 * max(workers, 1)
+
+            start = time.perf_counter()
+            n_rows = n_chunks = 0
+
+            with FrameChunkWriter(output_path) as writer:
+                chunks = iter_frame_chunks(input_path, config.chunk_size)
+
+                if workers == 0:
+                    pipeline = PredictPipeline(config.predict_pipeline_config)
+                    for chunk in chunks:
+                        predictions = np.ravel(pipeline.predict(self._chunk_columns(chunk)))
+                        writer.write(self._output_frame(chunk, predictions))
+                        n_rows, n_chunks = n_rows + len(chunk), n_chunks + 1
+                else:
+                    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                             initargs=(config.predict_pipeline_config,)) as pool:
+                        pending = deque()
+                        for chunk in chunks:
+                            pending.append((chunk, pool.submit(_score_chunk, self._chunk_columns(chunk))))
+
+                            # Write the oldest chunk once the read-ahead window is full, keeping the input order
+                            while len(pending) >= max_pending:
+                                done_chunk, future = pending.popleft()
+                                writer.write(self._output_frame(done_chunk, future.result()))
+                                n_rows, n_chunks = n_rows + len(done_chunk), n_chunks + 1
+
+                        while pending:
+                            done_chunk, future = pending.popleft()
+                            writer.write(self._output_frame(done_chunk, future.result()))
+                            n_rows, n_chunks = n_rows + len(done_chunk), n_chunks + 1
+
+            elapsed = time.perf_counter() - start
+            summary = {
+                "rows": n_rows,
+                "chunks": n_chunks,
+                "workers": workers,
+                "seconds": elapsed,
+                "rows_per_second": n_rows / elapsed if elapsed > 0 else None,
+            }
+            logging.info(f"Scored {input_path} into {output_path}: {summary}")
+
+            return summary
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    # Pool workers look functions up by module name, so run the importable module rather than __main__
+    from src.pipeline.batch_predict import BatchPredictConfig, BatchPredictor
+
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file with the trained model.")
+    parser.add_argument("input", help="the .csv or .parquet file to score")
+    parser.add_argument("output", help="the .csv or .parquet file to write")
+    parser.add_argument("--chunk-size", type=int, default=BatchPredictConfig.chunk_size)
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes, 0 to score in this process")
+    parser.add_argument("--max-pending-chunks", type=int, default=None)
+    parser.add_argument("--predictions-only", action="store_true", help="do not copy the input columns")
+    parser.add_argument("--model", default=PredictPipelineConfig.model_file_path)
+    parser.add_argument("--preprocessor", default=PredictPipelineConfig.preprocessor_file_path)
+    parser.add_argument("--compiled", action="store_true",
+                        help="score with the compiled model instead of the model and preprocessor")
+    parser.add_argument("--compiled-model", default=PredictPipelineConfig.compiled_model_file_path)
+    args = parser.parse_args()
+
+    print(BatchPredictor(BatchPredictConfig(
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        max_pending_chunks=args.max_pending_chunks,
+        include_inputs=not args.predictions_only,
+        predict_pipeline_config=PredictPipelineConfig(model_file_path=args.model,
+                                                      preprocessor_file_path=args.preprocessor,
+                                                      compiled_model_file_path=args.compiled_model,
+                                                      **({"use_compiled_model": True} if args.compiled else {})),
+    )).predict_file(args.input, args.output))
@@ -0,0 +1,166 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+from src.logger import logging
+
+
+@dataclass
+class MicroBatcherConfig:
+    """
+    Class Name : MicroBatcherConfig
+    Description : This class holds the configuration for the micro-batcher.
+    Attributes :
+        max_batch_size (int): The number of records that triggers a flush.
+        max_wait (float): The number of seconds the first request of a batch waits for others before the flush.
+        timeout (float): The number of seconds a caller waits for its result.
+    """
+
+    max_batch_size: int = 64
+    max_wait: float = 0.005
+    timeout: float = 30.0
+
+
+class MicroBatcher:
+    """
+    Class Name : MicroBatcher
+    Description : This class merges concurrent prediction requests into batches. Callers put their records on a queue
+                  and wait; a background thread takes the first request, keeps collecting until max_batch_size records
+                  are queued or max_wait has passed, scores them all with one predict_fn call and hands every caller
+                  its own slice of the result. A request that makes the batch fail is isolated by scoring the
+                  requests of that batch one by one, so it only fails its own caller.
+    Attributes :
+        predict_fn (callable): Scores a list of records and returns one prediction per record.
+        config (MicroBatcherConfig): The batching limits.
+        batches, requests, records (int): The number of flushes and of requests and records scored.
+    Methods :
+        submit(records): Queues records and returns a Future of their predictions.
+        predict(records): Queues records and waits for their predictions.
+        stats(): Returns the batching counters.
+        close(): Scores what is queued and stops the background thread.
+    """
+
+    _STOP = object()
+
+    def __init__(self, predict_fn, config=None):
+        self.predict_fn = predict_fn
+        self.config = config or MicroBatcherConfig()
+        self.batches = self.requests = self.records = 0
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        """
+        Method Name : submit
+        Description : This method queues records for the next batch.
+        Parameters :
+            records (list[dict]): The records to score.
+        Returns : A concurrent.futures.Future resolving to the list of their predictions.
+        """
+
+        future = Future()
+        self._queue.put((list(records), future))
+        return future
+
+    def predict(self, records):
+        """
+        Method Name : predict
+        Description : This method queues records and waits for their predictions.
+        Parameters :
+            records (list[dict]): The records to score.
+        Returns : A list with one prediction per record.
+        On Failure : Re-raises the error of predict_fn, or a TimeoutError after config.timeout seconds.
+        """
+
+        return self.submit(records).result(timeout=self.config.timeout)
+
+    def _collect(self, first):
+        batch, n_records = [first], len(first[0])
+        deadline = time.perf_counter() + self.config.max_wait
+
+        while n_records < self.config.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+            if item is self._STOP:
+                # Put the sentinel back so the loop exits after this batch
+                self._queue.put(item)
+                break
+
+            batch.append(item)
+            n_records += len(item[0])
+
+        return batch, n_records
+
+    def _flush(self, batch):
+        records = [record for request_records, _ in batch for record in request_records]
+
+        try:
+            predictions = list(self.predict_fn(records))
+        except Exception:
+            if len(batch) == 1:
+                raise
+            logging.info(f"Batch of {len(batch)} requests failed, scoring them one by one")
+            for request_records, future in batch:
+                try:
+                    future.set_result(list(self.predict_fn(request_records)))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+
+        start = 0
+        for request_records, future in batch:
+            future.set_result(predictions[start:start + len(request_records)])
+            start += len(request_records)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is self._STOP:
+                return
+
+            batch, n_records = self._collect(first)
+            try:
+                self._flush(batch)
+            except Exception as e:
+                batch[0][1].set_exception(e)
+
+            with self._stats_lock:
+                self.batches += 1
+                self.requests += len(batch)
+                self.records += n_records
+
+    def stats(self):
+        """
+        Method Name : stats
+        Description : This method returns the batching counters.
+        Returns : A dict with the number of batches, requests and records, and the mean batch size in records.
+        """
+
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "records": self.records,
+                "mean_batch_size": self.records / self.batches if self.batches else 0.0,
+                "queued": self._queue.qsize(),
+            }
+
+    def close(self):
+        """
+        Method Name : close
+        Description : This method lets the background thread score what is already queued, then stops it.
+        """
+
+        self._queue.put(self._STOP)
+        self._thread.join()
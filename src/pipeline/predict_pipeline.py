@@ -0,0 +1,802 @@
+import copy
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.components.model_exporter import CompiledModel, CompiledPreprocessor, to_columns
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import artifact_digest, load_object
+
+# Input columns expected by the fitted preprocessor, in training order
+FEATURE_COLUMNS = [
+    "gender",
+    "race_ethnicity",
+    "parental_level_of_education",
+    "lunch",
+    "test_preparation_course",
+    "reading_score",
+    "writing_score",
+]
+
+# Process-wide cache of loaded (model, preprocessor) pairs keyed by their file paths
+_ARTIFACT_CACHE = {}
+_ARTIFACT_CACHE_LOCK = threading.Lock()
+
+# Process-wide prediction caches keyed by the artifact file paths and the cache settings
+_PREDICTION_CACHES = {}
+
+# Set to 1 to serve with the compiled model exported by the training pipeline instead of model.pkl / preprocessor.pkl
+COMPILED_MODEL_ENV_VAR = "PREDICT_COMPILED_MODEL"
+
+# Copies of a representative record scored through a newly loaded pair before it is swapped in
+WARMUP_ROWS = 32
+
+
+@dataclass
+class PredictPipelineConfig:
+    """
+    Class Name : PredictPipelineConfig
+    Description : This class holds the configuration for the prediction pipeline, including the file paths of the
+                  trained model and the preprocessor object.
+
+    Attributes :
+        model_file_path (str): The file path of the trained model.
+        preprocessor_file_path (str): The file path of the fitted preprocessor object.
+        mmap_mode (str): The mode used to memory-map the numpy buffers of the artifacts, None to read them into memory.
+        verify_artifacts (bool): Whether to check the artifacts against their header checksum when loading them.
+        fast_path (bool): Whether records given as dicts or column arrays skip the DataFrame and the ColumnTransformer
+                          and are encoded by a CompiledPreprocessor built from the fitted preprocessor.
+        unknown_category (str): What the fast path does with a category not seen during fit: "error",
+                                "ignore" or "most_frequent".
+        cache_size (int): The number of distinct inputs whose prediction is memoized, 0 to disable the cache.
+        cache_ttl (float): The number of seconds a memoized prediction stays valid, None for no expiry.
+        version_manifest_path (str): The version manifest the training pipeline publishes the artifacts to. Without
+                                     it, hot reload watches the artifact files themselves.
+        reload_interval (float): The number of seconds between two checks for new artifacts once start_hot_reload()
+                                 was called, None to never reload.
+        use_compiled_model (bool): Whether to score with the CompiledModel saved by ModelExporter (the preprocessor
+                                   and the flat form of the model in one artifact) instead of preprocessor.transform
+                                   + model.predict. Defaults to the PREDICT_COMPILED_MODEL environment variable.
+        compiled_model_file_path (str): The file path of the compiled model.
+    """
+
+    model_file_path: str = os.path.join("artifacts", "model.pkl")
+    preprocessor_file_path: str = os.path.join("artifacts", "preprocessor.pkl")
+    mmap_mode: Optional[str] = "r"
+    verify_artifacts: bool = False
+    fast_path: bool = True
+    unknown_category: str = "error"
+    cache_size: int = 0
+    cache_ttl: Optional[float] = None
+    version_manifest_path: str = os.path.join("artifacts", "serving.json")
+    reload_interval: Optional[float] = 5.0
+    use_compiled_model: bool = field(default_factory=lambda: os.environ.get(COMPILED_MODEL_ENV_VAR, "0") == "1")
+    compiled_model_file_path: str = os.path.join("artifacts", "compiled_model.pkl")
+
+
+def load_artifacts(model_file_path, preprocessor_file_path, mmap_mode=None, verify=False):
+    """
+    Function Name : load_artifacts
+    Description : This function returns the (model, preprocessor) pair for the given file paths. The artifacts are
+                  unpickled the first time they are requested and served from a process-wide cache afterwards.
+    Parameters :
+        model_file_path (str): The file path of the trained model.
+        preprocessor_file_path (str): The file path of the fitted preprocessor object.
+        mmap_mode (str, optional): Passed to load_object to memory-map the numpy buffers of the artifacts.
+        verify (bool): Passed to load_object to check the artifacts against their checksum.
+    Returns :
+        tuple: The loaded model and preprocessor objects.
+    On Failure : Raises a CustomException if any error occurs during the process.
+    """
+
+    key = (os.path.abspath(model_file_path), os.path.abspath(preprocessor_file_path))
+
+    artifacts = _ARTIFACT_CACHE.get(key)
+    if artifacts is not None:
+        return artifacts
+
+    try:
+        with _ARTIFACT_CACHE_LOCK:
+            # Another thread may have loaded the pair while we waited for the lock
+            artifacts = _ARTIFACT_CACHE.get(key)
+            if artifacts is None:
+                logging.info(f"Loading model from {model_file_path} and preprocessor from {preprocessor_file_path}")
+                model = load_object(file_path=model_file_path, mmap_mode=mmap_mode, verify=verify)
+                preprocessor = load_object(file_path=preprocessor_file_path, mmap_mode=mmap_mode, verify=verify)
+                artifacts = (model, preprocessor)
+                _ARTIFACT_CACHE[key] = artifacts
+
+        return artifacts
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def load_compiled_model(compiled_model_file_path, mmap_mode=None, verify=False):
+    """
+    Function Name : load_compiled_model
+    Description : This function returns the (compiled model, compiled preprocessor) pair of a CompiledModel artifact,
+                  from the process-wide cache shared with load_artifacts.
+    Parameters :
+        compiled_model_file_path (str): The file path of the CompiledModel saved by ModelExporter.
+        mmap_mode (str, optional): Passed to load_object to memory-map the numpy buffers of the artifact.
+        verify (bool): Passed to load_object to check the artifact against its checksum.
+    Returns :
+        tuple: The CompiledModel and its CompiledPreprocessor.
+    On Failure : Raises a CustomException if any error occurs during the process.
+    """
+
+    key = (os.path.abspath(compiled_model_file_path),)
+
+    artifacts = _ARTIFACT_CACHE.get(key)
+    if artifacts is not None:
+        return artifacts
+
+    try:
+        with _ARTIFACT_CACHE_LOCK:
+            artifacts = _ARTIFACT_CACHE.get(key)
+            if artifacts is None:
+                logging.info(f"Loading compiled model from {compiled_model_file_path}")
+                compiled_model = load_object(file_path=compiled_model_file_path, mmap_mode=mmap_mode, verify=verify)
+                artifacts = (compiled_model, compiled_model.preprocessor)
+                _ARTIFACT_CACHE[key] = artifacts
+
+        return artifacts
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def clear_artifact_cache():
+    """
+    Function Name : clear_artifact_cache
+    Description : This function drops every cached (model, preprocessor) pair and memoized prediction so the next
+                  prediction reloads them.
+    """
+
+    with _ARTIFACT_CACHE_LOCK:
+        _ARTIFACT_CACHE.clear()
+        for cache in _PREDICTION_CACHES.values():
+            cache.clear()
+
+
+def artifact_signature(*file_paths):
+    """
+    Function Name : artifact_signature
+    Description : This function returns a cheap fingerprint of files from their metadata. save_object replaces an
+                  artifact with a new file, so a rewrite always changes the inode and modification time.
+    Parameters :
+        file_paths (str): The artifact file paths.
+    Returns :
+        tuple: The (mtime_ns, size, inode) of every file.
+    """
+
+    signature = []
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        signature.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+
+    return tuple(signature)
+
+
+class PredictionCache:
+    """
+    Class Name : PredictionCache
+    Description : This class is a thread-safe, bounded LRU cache of predictions with an optional time to live. It is
+                  tied to the version of the artifacts the predictions came from and empties itself when that
+                  version changes.
+    Attributes :
+        max_size (int): The maximum number of memoized predictions.
+        ttl (float): The number of seconds a prediction stays valid, None for no expiry.
+        signature (str): The version of the artifacts the memoized predictions came from.
+        hits, misses (int): The number of looked up inputs that were and were not memoized.
+        evictions (int): The number of predictions dropped to stay within max_size.
+        expirations (int): The number of predictions dropped because they outlived the ttl.
+        invalidations (int): The number of times the cache was emptied because the artifacts changed.
+    Methods :
+        refresh(signature): Empties the cache if the artifacts changed.
+        get_many(keys): Returns the memoized prediction of every key, None for the others.
+        put_many(items): Memoizes (key, prediction) pairs.
+        stats(): Returns the size and counters of the cache.
+        clear(): Drops every memoized prediction.
+    """
+
+    def __init__(self, max_size, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.signature = None
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def refresh(self, signature):
+        """
+        Method Name : refresh
+        Description : This method records the version of the served artifacts and empties the cache when it differs
+                      from the one the memoized predictions came from.
+        Parameters :
+            signature (str): The version of the served artifacts.
+        Returns : True if the artifacts changed since the cache was filled, False otherwise.
+        """
+
+        with self._lock:
+            if signature == self.signature:
+                return False
+
+            changed = self.signature is not None
+            if changed:
+                self.invalidations += 1
+                logging.info(f"Artifacts changed, dropping {len(self._entries)} memoized predictions")
+            self._entries.clear()
+            self.signature = signature
+
+            return changed
+
+    def get_many(self, keys):
+        """
+        Method Name : get_many
+        Description : This method looks up the keys and marks the found ones as recently used.
+        Parameters :
+            keys (list): The normalized inputs.
+        Returns : A list holding the memoized prediction of every key, or None when it is not memoized.
+        """
+
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and self.ttl is not None and entry[1] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+
+                if entry is None:
+                    self.misses += 1
+                    values.append(None)
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    values.append(entry[0])
+
+        return values
+
+    def put_many(self, items, signature=None):
+        """
+        Method Name : put_many
+        Description : This method memoizes predictions and evicts the least recently used ones beyond max_size.
+        Parameters :
+            items (iterable): (key, prediction) pairs.
+            signature (optional): The signature of the artifacts that made the predictions. When given and the cache
+                                  moved on to other artifacts in the meantime, the predictions are not memoized.
+        """
+
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if signature is not None and signature != self.signature:
+                return
+
+            for key, value in items:
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        """
+        Method Name : stats
+        Description : This method returns the size and counters of the cache.
+        Returns : A dict of the current size, max_size and the hit, miss, eviction, expiration and invalidation counts.
+        """
+
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.signature = None
+
+
+@dataclass(frozen=True)
+class ArtifactVersion:
+    """
+    Class Name : ArtifactVersion
+    Description : This class holds one loaded (model, preprocessor) pair. Hot reload replaces the whole instance in a
+                  single assignment, so a request always scores with a model and the preprocessor it was trained with.
+    Attributes :
+        version (str): The version from the version manifest, or derived from the artifact files without one.
+        model (estimator): The loaded model.
+        preprocessor (ColumnTransformer): The loaded preprocessor.
+        compiled (CompiledPreprocessor): The fast path encoder of the preprocessor, None if it was not built.
+        loaded_at (str): When the pair was swapped in.
+        load_time (float): The seconds spent loading the pair.
+        warmup_time (float): The seconds spent on the warm-up predictions.
+    """
+
+    version: str
+    model: object
+    preprocessor: object
+    compiled: Optional[CompiledPreprocessor]
+    loaded_at: str
+    load_time: float
+    warmup_time: float
+
+
+class PredictPipeline:
+    """
+    Class Name : PredictPipeline
+    Description : This class is responsible for scoring new records with the trained model. The model and preprocessor
+                  are loaded once per process and every call is scored with a single vectorized
+                  preprocessor.transform + model.predict, whether it holds one record or many. Dicts and lists of dicts
+                  are encoded without a DataFrame on the fast path. With a cache_size, predictions are memoized per
+                  distinct input and repeated inputs skip preprocessing and the model altogether. Once
+                  start_hot_reload() is called, new artifacts published by the training pipeline are loaded and
+                  warmed up in a background thread and swapped in without interrupting requests.
+    Attributes :
+        predict_pipeline_config (PredictPipelineConfig): An instance of PredictPipelineConfig that holds the artifact paths.
+    Methods :
+        __init__(config): Initializes the PredictPipeline class and its configuration.
+        compiled_preprocessor(preprocessor): Returns the fast path encoder of the loaded preprocessor.
+        prediction_cache(): Returns the prediction cache of the artifacts, None when caching is disabled.
+        to_dataframe(features): Converts a record, a list of records or a DataFrame into the preprocessor input frame.
+        predict(features): Predicts the target for every given record.
+        start_hot_reload(): Starts watching for new artifacts in a background thread.
+        stop_hot_reload(): Stops watching for new artifacts.
+        reload_if_changed(): Checks once for new artifacts and swaps them in.
+        reload_stats(): Returns the served version and the reload counters.
+    """
+
+    def __init__(self, config=None):
+        """
+        Method Name : __init__
+        Description : This is the constructor method for the PredictPipeline class. It initializes the prediction configuration.
+        Parameters :
+            config (PredictPipelineConfig, optional): The artifact paths to use. Defaults to the paths under artifacts/.
+        """
+
+        self.predict_pipeline_config = config or PredictPipelineConfig()
+        self._compiled = (None, None)
+        self._active = None
+        self._pending_version = None
+        self._failed_version = None
+        self._reload_lock = threading.Lock()
+        self._reload_thread = None
+        self._stop_reload = threading.Event()
+        self._reload_counters = {"reloads": 0, "failed_reloads": 0, "last_error": None, "last_check_at": None}
+
+    def load(self):
+        """
+        Method Name : load
+        Description : This method returns the cached (model, preprocessor) pair, loading it on first use. Under hot
+                      reload it returns the pair currently served. With use_compiled_model, the pair is the
+                      CompiledModel and its CompiledPreprocessor.
+        Returns : A tuple containing the model and the preprocessor objects.
+        """
+
+        active = self._active
+        if active is not None:
+            return active.model, active.preprocessor
+
+        config = self.predict_pipeline_config
+        if config.use_compiled_model:
+            return load_compiled_model(config.compiled_model_file_path, mmap_mode=config.mmap_mode,
+                                       verify=config.verify_artifacts)
+
+        return load_artifacts(
+            model_file_path=self.predict_pipeline_config.model_file_path,
+            preprocessor_file_path=self.predict_pipeline_config.preprocessor_file_path,
+            mmap_mode=self.predict_pipeline_config.mmap_mode,
+            verify=self.predict_pipeline_config.verify_artifacts,
+        )
+
+    def compiled_preprocessor(self, preprocessor):
+        """
+        Method Name : compiled_preprocessor
+        Description : This method returns the CompiledPreprocessor of the given fitted preprocessor, compiling it again
+                      only when the loaded preprocessor object changes.
+        Parameters :
+            preprocessor (ColumnTransformer | CompiledPreprocessor): The preprocessor returned by load().
+        Returns : A CompiledPreprocessor.
+        """
+
+        source, compiled = self._compiled
+        if source is not preprocessor:
+            compiled = self._compile_preprocessor(preprocessor)
+            self._compiled = (preprocessor, compiled)
+
+        return compiled
+
+    def _compile_preprocessor(self, preprocessor):
+        unknown_category = self.predict_pipeline_config.unknown_category
+        if isinstance(preprocessor, CompiledPreprocessor):
+            # Already compiled by the exporter: a shallow copy shares its tables and takes this unknown category policy
+            compiled = copy.copy(preprocessor)
+            compiled.unknown_category = unknown_category
+            return compiled
+
+        return CompiledPreprocessor.from_column_transformer(preprocessor, unknown_category=unknown_category)
+
+    def prediction_cache(self):
+        """
+        Method Name : prediction_cache
+        Description : This method returns the process-wide PredictionCache of the configured artifacts. It follows the
+                      served version: the hot reloader empties it when it swaps in new artifacts. Without hot reload
+                      the loaded pair never changes, so neither does the cache's signature.
+        Returns : A PredictionCache, or None when cache_size is 0.
+        """
+
+        config = self.predict_pipeline_config
+        if config.cache_size <= 0:
+            return None
+
+        cache_key = self._artifact_key() + (config.cache_size, config.cache_ttl)
+
+        cache = _PREDICTION_CACHES.get(cache_key)
+        if cache is None:
+            with _ARTIFACT_CACHE_LOCK:
+                cache = _PREDICTION_CACHES.setdefault(cache_key, PredictionCache(config.cache_size, config.cache_ttl))
+
+        # Reloading is left to the hot reloader, which only loads a pair published together
+        active = self._active
+        if active is not None and cache.signature is None:
+            cache.refresh(active.version)
+
+        return cache
+
+    def _cache_keys(self, compiled, columns):
+        # Numbers compare as floats and categories as strings, so 72, 72.0 and "72" share one entry
+        normalized = [
+            [None if value is None or value != value else float(value) for value in columns[name]]
+            for name in compiled.numerical_columns
+        ] + [
+            [None if value is None or value != value else str(value) for value in columns[name]]
+            for name in compiled.categorical_columns
+        ]
+
+        return list(zip(*normalized))
+
+    def _score(self, model, preprocessor, features):
+        if isinstance(model, CompiledModel):
+            return model.predictor.predict(self.compiled_preprocessor(preprocessor), to_columns(features))
+
+        if self.predict_pipeline_config.fast_path and not isinstance(features, pd.DataFrame):
+            data_scaled = self.compiled_preprocessor(preprocessor).transform(features)
+        else:
+            df = self.to_dataframe(features)
+            data_scaled = preprocessor.transform(df)
+
+        return model.predict(data_scaled)
+
+    def _predict_cached(self, cache, model, preprocessor, features, signature=None):
+        columns = to_columns(features)
+        missing_columns = [col for col in FEATURE_COLUMNS if col not in columns]
+        if missing_columns:
+            raise ValueError(f"Missing input columns: {missing_columns}")
+
+        keys = self._cache_keys(self.compiled_preprocessor(preprocessor), columns)
+        values = cache.get_many(keys)
+
+        # Score every distinct missing input once, in a single batch
+        to_score = {}
+        for row, (key, value) in enumerate(zip(keys, values)):
+            if value is None and key not in to_score:
+                to_score[key] = row
+
+        if to_score:
+            rows = np.fromiter(to_score.values(), dtype=np.intp, count=len(to_score))
+            subset = {name: np.asarray(column)[rows] for name, column in columns.items()}
+            if not self.predict_pipeline_config.fast_path:
+                subset = pd.DataFrame(subset)
+
+            predictions = dict(zip(to_score, np.ravel(self._score(model, preprocessor, subset)).tolist()))
+            cache.put_many(predictions.items(), signature=signature)
+            values = [predictions[key] if value is None else value for key, value in zip(keys, values)]
+
+        return np.asarray(values, dtype=np.float64)
+
+    def cache_stats(self):
+        """
+        Method Name : cache_stats
+        Description : This method returns the counters of the prediction cache.
+        Returns : The PredictionCache.stats() dict, or None when caching is disabled.
+        """
+
+        cache = self.prediction_cache()
+        return None if cache is None else cache.stats()
+
+    @staticmethod
+    def to_dataframe(features):
+        """
+        Method Name : to_dataframe
+        Description : This method converts the given features into a DataFrame with the columns the preprocessor expects.
+        Parameters :
+            features (dict | list[dict] | pandas.DataFrame): A single record, a list of records or a DataFrame.
+        Returns : A pandas DataFrame holding the FEATURE_COLUMNS in training order.
+        On Failure : Raises a CustomException if any error occurs during the process.
+        """
+
+        try:
+            if isinstance(features, pd.DataFrame):
+                df = features
+            elif isinstance(features, dict):
+                df = pd.DataFrame([features])
+            else:
+                df = pd.DataFrame.from_records(list(features))
+
+            missing_columns = [col for col in FEATURE_COLUMNS if col not in df.columns]
+            if missing_columns:
+                raise ValueError(f"Missing input columns: {missing_columns}")
+
+            return df[FEATURE_COLUMNS]
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def predict(self, features):
+        """
+        Method Name : predict
+        Description : This method transforms the given records with the preprocessor and predicts them with the model
+                      in one batch. Records given as dicts skip the DataFrame when the fast path is on, and memoized
+                      inputs are answered from the prediction cache.
+        Parameters :
+            features (dict | list[dict] | pandas.DataFrame): A single record, a list of records or a DataFrame.
+        Returns : A numpy.ndarray with one prediction per record.
+        On Failure : Raises a CustomException if any error occurs during the process.
+        """
+
+        try:
+            # One read of the served version, so a swap during the call cannot mix two pairs
+            active = self._active
+            cache = self.prediction_cache()
+            model, preprocessor = (active.model, active.preprocessor) if active is not None else self.load()
+
+            if cache is not None:
+                return self._predict_cached(cache, model, preprocessor, features,
+                                            signature=None if active is None else active.version)
+
+            return self._score(model, preprocessor, features)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _artifact_paths(self):
+        # The artifact files served, by their name in the version manifest
+        config = self.predict_pipeline_config
+        if config.use_compiled_model:
+            return {"compiled_model": config.compiled_model_file_path}
+        return {"model": config.model_file_path, "preprocessor": config.preprocessor_file_path}
+
+    def _artifact_key(self):
+        # The _ARTIFACT_CACHE key of the artifacts served
+        return tuple(os.path.abspath(file_path) for file_path in self._artifact_paths().values())
+
+    def _artifact_version(self):
+        # Returns the version on disk and the digests it was published with (None without a version manifest)
+        config = self.predict_pipeline_config
+        manifest_path = config.version_manifest_path
+        if manifest_path and os.path.exists(manifest_path):
+            with open(manifest_path) as file_obj:
+                manifest = json.load(file_obj)
+            return manifest["version"], {name: entry["sha256"] for name, entry in manifest["artifacts"].items()}
+
+        signature = artifact_signature(*self._artifact_paths().values())
+        return f"files-{hashlib.sha256(repr(signature).encode()).hexdigest()[:12]}", None
+
+    def _matches_published(self, digests):
+        return all(artifact_digest(file_path) == digests.get(name)
+                   for name, file_path in self._artifact_paths().items())
+
+    def _warm_up(self, model, preprocessor):
+        # Scores a representative record (the imputation values of every column) the way requests are scored, so
+        # the fast path encoder is compiled and the model's lazy initialisation runs before the first request
+        config = self.predict_pipeline_config
+        compiled = self._compile_preprocessor(preprocessor)
+        record = dict(zip(compiled.numerical_columns, compiled.numerical_fill.tolist()))
+        record.update(zip(compiled.categorical_columns, compiled.categorical_fill))
+        records = [record] * WARMUP_ROWS
+
+        if isinstance(model, CompiledModel):
+            predictions = model.predictor.predict(compiled, to_columns(records))
+        elif config.fast_path:
+            predictions = model.predict(compiled.transform(records))
+        else:
+            predictions = model.predict(preprocessor.transform(self.to_dataframe(records)))
+
+        if not np.all(np.isfinite(np.asarray(predictions, dtype=np.float64))):
+            raise ValueError("The new model returned non-finite warm-up predictions")
+
+        return compiled if config.fast_path or isinstance(model, CompiledModel) else None
+
+    def _load_version(self, version, digests):
+        config = self.predict_pipeline_config
+
+        start = time.perf_counter()
+        # Unchecked artifacts published by the manifest are verified against it, a half-replaced pair never loads
+        verify = config.verify_artifacts or digests is not None
+        if config.use_compiled_model:
+            model = load_object(file_path=config.compiled_model_file_path, mmap_mode=config.mmap_mode, verify=verify)
+            preprocessor = model.preprocessor
+        else:
+            model = load_object(file_path=config.model_file_path, mmap_mode=config.mmap_mode, verify=verify)
+            preprocessor = load_object(file_path=config.preprocessor_file_path, mmap_mode=config.mmap_mode,
+                                       verify=verify)
+        load_time = time.perf_counter() - start
+
+        if digests is not None and not self._matches_published(digests):
+            raise ValueError(f"The artifacts changed while version {version} was being loaded")
+
+        start = time.perf_counter()
+        compiled = self._warm_up(model, preprocessor)
+        warmup_time = time.perf_counter() - start
+
+        return ArtifactVersion(version=version, model=model, preprocessor=preprocessor, compiled=compiled,
+                               loaded_at=datetime.now().isoformat(timespec="seconds"),
+                               load_time=load_time, warmup_time=warmup_time)
+
+    def _swap(self, new):
+        old = self._active
+
+        # A single assignment: requests already running finish with the old pair, the next ones get the new pair
+        self._active = new
+        if new.compiled is not None:
+            self._compiled = (new.preprocessor, new.compiled)
+
+        # Nothing references the old pair once the requests using it finish
+        with _ARTIFACT_CACHE_LOCK:
+            _ARTIFACT_CACHE.pop(self._artifact_key(), None)
+
+        cache = self.prediction_cache()
+        if cache is not None:
+            cache.refresh(new.version)
+
+        logging.info(f"Serving artifact version {new.version} ({type(new.model).__name__}) instead of "
+                     f"{old.version if old is not None else None}: loaded in {new.load_time:.3f}s, "
+                     f"warmed up in {new.warmup_time:.3f}s")
+
+    def reload_if_changed(self):
+        """
+        Method Name : reload_if_changed
+        Description : This method checks once whether new artifacts were published and, if so, loads them, scores a
+                      warm-up batch with them and swaps them in. Requests keep being served by the current pair while
+                      this runs, and keep it if the new pair fails to load or to warm up, until a newer version is
+                      published. With a version manifest, only a pair whose files match the published digests is
+                      loaded. Without one, a change of the artifact files is picked up once two consecutive checks saw
+                      the same files, since the training pipeline writes them one after the other.
+        Returns : True if a new version was swapped in, False otherwise.
+        """
+
+        with self._reload_lock:
+            counters = self._reload_counters
+            counters["last_check_at"] = datetime.now().isoformat(timespec="seconds")
+            active = self._active
+            version = None
+            try:
+                version, digests = self._artifact_version()
+                if (active is not None and version == active.version) or version == self._failed_version:
+                    self._pending_version = None
+                    return False
+
+                if digests is None and version != self._pending_version:
+                    self._pending_version = version
+                    return False
+
+                if digests is not None and not self._matches_published(digests):
+                    # The files were rewritten after this version was published, a newer one is on its way
+                    return False
+
+                new = self._load_version(version, digests)
+
+            except Exception as e:
+                # Not retried until another version is published
+                self._failed_version = version
+                counters["failed_reloads"] += 1
+                counters["last_error"] = str(e)
+                logging.info(f"Could not reload the artifacts, still serving version "
+                             f"{active.version if active is not None else None}: {e}")
+                return False
+
+            self._swap(new)
+            self._pending_version = None
+            counters["reloads"] += 1
+            counters["last_error"] = None
+
+            return True
+
+    def _watch_artifacts(self):
+        while not self._stop_reload.wait(self.predict_pipeline_config.reload_interval):
+            self.reload_if_changed()
+
+    def start_hot_reload(self):
+        """
+        Method Name : start_hot_reload
+        Description : This method makes the loaded pair the first served version and starts a daemon thread that
+                      calls reload_if_changed every reload_interval seconds. The thread belongs to the calling
+                      process, so forked workers start their own.
+        Returns : True if the watcher runs, False when reload_interval is None.
+        """
+
+        config = self.predict_pipeline_config
+        if config.reload_interval is None:
+            return False
+
+        with self._reload_lock:
+            if self._reload_thread is not None:
+                return True
+
+            if self._active is None:
+                start = time.perf_counter()
+                version, _ = self._artifact_version()
+                model, preprocessor = self.load()
+                self._active = ArtifactVersion(
+                    version=version, model=model, preprocessor=preprocessor,
+                    compiled=self.compiled_preprocessor(preprocessor) if config.fast_path else None,
+                    loaded_at=datetime.now().isoformat(timespec="seconds"),
+                    load_time=time.perf_counter() - start, warmup_time=0.0,
+                )
+
+            self._stop_reload.clear()
+            self._reload_thread = threading.Thread(target=self._watch_artifacts, name="artifact-reloader",
+                                                   daemon=True)
+            self._reload_thread.start()
+
+        logging.info(f"Watching for new artifacts every {config.reload_interval}s, serving version "
+                     f"{self._active.version}")
+
+        return True
+
+    def stop_hot_reload(self):
+        """
+        Method Name : stop_hot_reload
+        Description : This method stops the watcher thread. The served pair stays in place.
+        """
+
+        thread = self._reload_thread
+        if thread is None:
+            return
+
+        self._stop_reload.set()
+        thread.join()
+        self._reload_thread = None
+
+    def reload_stats(self):
+        """
+        Method Name : reload_stats
+        Description : This method returns the served artifact version and the hot reload counters.
+        Returns : A dict with whether hot reload runs, the served version and model type, when it was swapped in,
+                  its load, warm-up and total reload times in milliseconds, and the number of reloads and failed reloads, the last
+                  error and the time of the last check.
+        """
+
+        active = self._active
+        return {
+            "hot_reload": self._reload_thread is not None,
+            "version": None if active is None else active.version,
+            "model_type": None if active is None else type(active.model).__name__,
+            "loaded_at": None if active is None else active.loaded_at,
+            "load_time_ms": None if active is None else active.load_time * 1000,
+            "warmup_time_ms": None if active is None else active.warmup_time * 1000,
+            "reload_time_ms": None if active is None else (active.load_time + active.warmup_time) * 1000,
+            **self._reload_counters,
+        }
@@ -0,0 +1,271 @@
+import argparse
+import gc
+import json
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from dataclasses import dataclass
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class PreforkServerConfig:
+    """
+    Class Name : PreforkServerConfig
+    Description : This class holds the configuration for the pre-forked serving launcher.
+    Attributes :
+        host (str): The interface the shared listening socket binds to.
+        port (int): The port the shared listening socket binds to.
+        workers (int): The number of worker processes.
+        preload (bool): Whether the parent loads the artifacts before forking, so the workers share them
+                        copy-on-write. False makes every worker load its own copy, for comparison.
+        report_interval (float): The number of seconds between two worker reports.
+    """
+
+    host: str = "0.0.0.0"
+    port: int = 5000
+    workers: int = 2
+    preload: bool = True
+    report_interval: float = 30.0
+
+
+def unique_set_size(pid):
+    """
+    Function Name : unique_set_size
+    Description : This function returns the memory only the given process uses (USS), i.e. its private pages. Pages
+                  it still shares copy-on-write with the parent are not counted. psutil is used when it is installed,
+                  /proc/<pid>/smaps_rollup otherwise.
+    Parameters :
+        pid (int): The process id.
+    Returns :
+        int: The unique set size in bytes, or None when it cannot be read.
+    """
+
+    try:
+        import psutil
+
+        return psutil.Process(pid).memory_full_info().uss
+    except ImportError:
+        pass
+    except Exception:
+        return None
+
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as file_obj:
+            fields = dict(line.split(":", 1) for line in file_obj if ":" in line)
+        return sum(int(fields[name].split()[0]) * 1024 for name in ("Private_Clean", "Private_Dirty") if name in fields)
+    except OSError:
+        return None
+
+
+class PreforkServer:
+    """
+    Class Name : PreforkServer
+    Description : This class loads the model and preprocessor once in a parent process, moves every object alive at
+                  that point into the permanent GC generation (gc.freeze) so collections in the workers never write to
+                  their pages, and forks workers that serve the Flask app from one shared listening socket. The
+                  workers therefore share the imported libraries and the artifacts copy-on-write. The parent
+                  respawns workers that die and regularly reports each worker's unique memory and the time from
+                  launcher start to its first served request.
+    Attributes :
+        prefork_server_config (PreforkServerConfig): The launcher configuration.
+        workers (dict): The pid of every live worker mapped to its report.
+    Methods :
+        run(): Binds the socket, preloads, forks the workers and supervises them until SIGINT / SIGTERM.
+        report(): Returns the memory and time to first request of every worker.
+    """
+
+    def __init__(self, config=None, app_factory=None):
+        """
+        Method Name : __init__
+        Description : This is the constructor method for the PreforkServer class.
+        Parameters :
+            config (PreforkServerConfig, optional): The launcher configuration.
+            app_factory (callable, optional): Builds the WSGI app in a worker. Defaults to app.create_app.
+        """
+
+        self.prefork_server_config = config or PreforkServerConfig()
+        self.app_factory = app_factory
+        self.workers = {}
+        self.started_at = time.monotonic()
+        self._running = False
+        self._socket = None
+        self._report_read_fd = self._report_write_fd = None
+
+    def _preload(self):
+        start = time.perf_counter()
+        if self.app_factory is None:
+            from app import create_app
+            self.app_factory = create_app
+
+        from src.pipeline.predict_pipeline import PredictPipeline
+        model, preprocessor = PredictPipeline().load()
+        logging.info(f"Preloaded the app, {type(model).__name__} and the preprocessor in "
+                     f"{time.perf_counter() - start:.3f}s")
+
+    def _spawn_worker(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = {"pid": pid, "time_to_first_request": None}
+            return
+
+        # Worker process: never returns
+        exit_code = 0
+        try:
+            self._worker_main()
+        except BaseException as e:
+            logging.info(f"Worker {os.getpid()} stopped: {e!r}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _worker_main(self):
+        from werkzeug.serving import make_server
+
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        os.close(self._report_read_fd)
+        gc.enable()
+
+        if self.app_factory is None:
+            from app import create_app
+            app = create_app()
+        else:
+            app = self.app_factory()
+
+        first_request_served = []
+
+        def wsgi_app(environ, start_response):
+            response = app(environ, start_response)
+            if not first_request_served:
+                first_request_served.append(True)
+                elapsed = time.monotonic() - self.started_at
+                message = json.dumps({"pid": os.getpid(), "time_to_first_request": elapsed}) + "\n"
+                os.write(self._report_write_fd, message.encode())
+            return response
+
+        config = self.prefork_server_config
+        server = make_server(config.host, config.port, wsgi_app, threaded=True, fd=self._socket.fileno())
+        logging.info(f"Worker {os.getpid()} serving on {config.host}:{config.port}")
+        server.serve_forever()
+
+    def _read_worker_messages(self, timeout):
+        ready, _, _ = select.select([self._report_read_fd], [], [], timeout)
+        if not ready:
+            return
+
+        for line in os.read(self._report_read_fd, 65536).decode().splitlines():
+            message = json.loads(line)
+            if message["pid"] in self.workers:
+                self.workers[message["pid"]]["time_to_first_request"] = message["time_to_first_request"]
+
+    def _reap_workers(self):
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            if self.workers.pop(pid, None) is not None and self._running:
+                logging.info(f"Worker {pid} exited with status {status}, respawning it")
+                self._spawn_worker()
+
+    def report(self):
+        """
+        Method Name : report
+        Description : This method measures every live worker.
+        Returns : A list with the pid, unique set size in MB and time to first request in seconds of every worker.
+        """
+
+        report = []
+        for pid, worker in sorted(self.workers.items()):
+            uss = unique_set_size(pid)
+            report.append({
+                "pid": pid,
+                "uss_mb": None if uss is None else round(uss / 1024 ** 2, 1),
+                "time_to_first_request": worker["time_to_first_request"],
+            })
+
+        return report
+
+    def _stop(self, signum, frame):
+        self._running = False
+
+    def run(self):
+        """
+        Method Name : run
+        Description : This method binds the shared socket, preloads the artifacts, freezes the heap, forks the workers
+                      and supervises them until it receives SIGINT or SIGTERM, then stops the workers.
+        On Failure : Raises a CustomException if any error occurs during the process.
+        """
+
+        try:
+            config = self.prefork_server_config
+
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._socket.bind((config.host, config.port))
+            self._socket.listen(128)
+            self._socket.set_inheritable(True)
+
+            if config.preload:
+                self._preload()
+
+            # Collect once, then keep the collector from touching (and so copying) the preloaded objects
+            gc.disable()
+            gc.collect()
+            gc.freeze()
+
+            self._report_read_fd, self._report_write_fd = os.pipe()
+            self._running = True
+            signal.signal(signal.SIGTERM, self._stop)
+            signal.signal(signal.SIGINT, self._stop)
+
+            for _ in range(config.workers):
+                self._spawn_worker()
+            logging.info(f"Started {config.workers} workers on {config.host}:{config.port}, preload={config.preload}")
+
+            next_report = time.monotonic() + config.report_interval
+            while self._running:
+                try:
+                    self._read_worker_messages(timeout=0.5)
+                except InterruptedError:
+                    continue
+                self._reap_workers()
+
+                if time.monotonic() >= next_report:
+                    report = self.report()
+                    logging.info(f"Worker report: {report}")
+                    print(json.dumps(report), flush=True)
+                    next_report = time.monotonic() + config.report_interval
+
+            for pid in self.workers:
+                os.kill(pid, signal.SIGTERM)
+            for pid in list(self.workers):
+                os.waitpid(pid, 0)
+            self.workers.clear()
+            self._socket.close()
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the prediction app from pre-forked workers sharing one model.")
+    parser.add_argument("--host", default=PreforkServerConfig.host)
+    parser.add_argument("--port", type=int, default=PreforkServerConfig.port)
+    parser.add_argument("--workers", type=int, default=PreforkServerConfig.workers)
+    parser.add_argument("--no-preload", action="store_true", help="let every worker load its own artifacts")
+    parser.add_argument("--report-interval", type=float, default=PreforkServerConfig.report_interval)
+    args = parser.parse_args()
+
+    PreforkServer(PreforkServerConfig(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        preload=not args.no_preload,
+        report_interval=args.report_interval,
+    )).run()
@@ -0,0 +1,363 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import DataTransformation
+from src.components.model_exporter import ModelExporter
+from src.components.model_trainer import ModelTrainer
+from src.exception import CustomException
+from src.logger import logging
+from src.profiling import PROFILERS, RunProfiler, RunProfilerConfig, record_stage
+from src.utils import hash_file, write_version_manifest
+
+# Version of the manifest layout; a manifest with another version is ignored and every stage reruns
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class TrainPipelineConfig:
+    """
+    Class Name : TrainPipelineConfig
+    Description : This class holds the configuration for the training pipeline.
+
+    Attributes :
+        manifest_file_path (str): The file path of the manifest recording the inputs and outputs of every stage.
+        version_manifest_file_path (str): The file path of the version manifest the model and preprocessor are
+                                          published to once a run completes; serving processes reload from it.
+    """
+
+    manifest_file_path: str = os.path.join("artifacts", "manifest.json")
+    version_manifest_file_path: str = os.path.join("artifacts", "serving.json")
+
+
+def describe_config(config):
+    """
+    Function Name : describe_config
+    Description : This function returns the public attributes of a config object as strings, so they can be hashed.
+    Parameters :
+        config (object): A component configuration instance.
+    Returns :
+        dict: The attribute names and the repr of their values.
+    """
+
+    return {
+        name: repr(getattr(config, name))
+        for name in sorted(dir(config))
+        if not name.startswith("_") and not callable(getattr(config, name))
+    }
+
+
+class TrainPipeline:
+    """
+    Class Name : TrainPipeline
+    Description : This class runs ingestion -> transformation -> training -> export as a small DAG. Each stage records the hashes
+                  of its inputs and configuration (its fingerprint) and of its outputs in a manifest. A stage whose
+                  fingerprint is unchanged and whose outputs are still on disk is skipped and its artifacts are reused.
+    Attributes :
+        train_pipeline_config (TrainPipelineConfig): An instance of TrainPipelineConfig.
+        data_ingestion, data_transformation, model_trainer, model_exporter: The pipeline components.
+        force (bool): Whether to rerun every stage regardless of the manifest.
+    Methods :
+        run_pipeline(): Runs the stages that are out of date and returns the test R2 score of the trained model.
+    """
+
+    def __init__(self, force=False, run_profiler_config=None):
+        """
+        Method Name : __init__
+        Description : This is the constructor method for the TrainPipeline class. It initializes the components.
+        Parameters :
+            force (bool): Whether to rerun every stage regardless of the manifest.
+            run_profiler_config (RunProfilerConfig, optional): Where the run record is written and which profiler,
+                                                               if any, also profiles the run.
+        """
+
+        self.train_pipeline_config = TrainPipelineConfig()
+        self.data_ingestion = DataIngestion()
+        self.data_transformation = DataTransformation()
+        self.model_trainer = ModelTrainer()
+        self.model_exporter = ModelExporter()
+        self.force = force
+        self.run_profiler_config = run_profiler_config or RunProfilerConfig()
+        self.last_run_path = None
+
+    def _load_manifest(self):
+        manifest_path = self.train_pipeline_config.manifest_file_path
+        if not os.path.exists(manifest_path):
+            return {"version": MANIFEST_VERSION, "stages": {}}
+
+        with open(manifest_path) as file_obj:
+            manifest = json.load(file_obj)
+
+        if manifest.get("version") != MANIFEST_VERSION:
+            logging.info(f"Ignoring manifest {manifest_path} with version {manifest.get('version')}")
+            return {"version": MANIFEST_VERSION, "stages": {}}
+
+        return manifest
+
+    def _save_manifest(self, manifest):
+        manifest_path = self.train_pipeline_config.manifest_file_path
+        os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, "w") as file_obj:
+            json.dump(manifest, file_obj, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+
+    @staticmethod
+    def _fingerprint(inputs):
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def _is_up_to_date(self, record, fingerprint):
+        if self.force or record is None or record.get("fingerprint") != fingerprint:
+            return False
+
+        return all(
+            os.path.exists(path) and hash_file(path) == digest
+            for path, digest in record["outputs"].items()
+        )
+
+    def _run_stage(self, manifest, name, inputs, outputs, run):
+        """
+        Method Name : _run_stage
+        Description : This method runs a stage unless the manifest shows it is up to date, then records it.
+        Parameters :
+            manifest (dict): The manifest being updated.
+            name (str): The stage name.
+            inputs (dict): The input hashes and configuration of the stage.
+            outputs (list): The file paths the stage produces.
+            run (callable): Runs the stage and returns a JSON serializable result.
+        Returns : A tuple with the stage result and whether the stage actually ran.
+        """
+
+        fingerprint = self._fingerprint(inputs)
+        record = manifest["stages"].get(name)
+
+        if self._is_up_to_date(record, fingerprint):
+            logging.info(f"Stage '{name}' is up to date, reusing {list(record['outputs'])}")
+            record_stage(name, skipped=True)
+            return record.get("result"), False
+
+        logging.info(f"Running stage '{name}'")
+        start = time.perf_counter()
+        result = run()
+
+        manifest["stages"][name] = {
+            "fingerprint": fingerprint,
+            "inputs": inputs,
+            "outputs": {path: hash_file(path) for path in outputs},
+            "result": result,
+            "duration": time.perf_counter() - start,
+            "completed_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self._save_manifest(manifest)
+
+        return result, True
+
+    def _run_export_stage(self, manifest):
+        ingestion_config = self.data_ingestion.ingestion_config
+        transformation_config = self.data_transformation.data_transformation_config
+        trainer_config = self.model_trainer.model_trainer_config
+        exporter_config = self.model_exporter.model_exporter_config
+
+        return self._run_stage(
+            manifest,
+            name="export",
+            inputs={
+                "model": hash_file(trainer_config.trained_model_file_path),
+                "preprocessor": hash_file(transformation_config.preprocessor_obj_file_path),
+                "test_data": hash_file(ingestion_config.test_data_path),
+                "config": describe_config(exporter_config),
+            },
+            outputs=[exporter_config.compiled_model_file_path],
+            run=lambda: self.model_exporter.initiate_model_export(
+                trainer_config.trained_model_file_path,
+                transformation_config.preprocessor_obj_file_path,
+                ingestion_config.test_data_path,
+            ),
+        )
+
+    def _publish_artifacts(self):
+        # Written last, so serving processes only ever see a model together with the preprocessor of its run
+        manifest = write_version_manifest(self.train_pipeline_config.version_manifest_file_path, {
+            "model": self.model_trainer.model_trainer_config.trained_model_file_path,
+            "preprocessor": self.data_transformation.data_transformation_config.preprocessor_obj_file_path,
+            "compiled_model": self.model_exporter.model_exporter_config.compiled_model_file_path,
+        })
+        logging.info(f"Published artifact version {manifest['version']}")
+
+    def run_pipeline(self):
+        """
+        Method Name : run_pipeline
+        Description : This method runs ingestion, transformation, training and export, skipping every stage whose
+                      inputs and configuration are unchanged since its last run. The wall time, CPU time, peak memory
+                      and rows of every stage and the fits of every model are written to a JSON run record, whose
+                      path is kept in self.last_run_path.
+        Returns : The R2 score of the trained model on the test data.
+        On Failure : Raises a CustomException if any error occurs during the process.
+        """
+
+        run_profiler = RunProfiler(self.run_profiler_config)
+        try:
+            with run_profiler:
+                return self._run_stages()
+        finally:
+            self.last_run_path = run_profiler.run_path
+
+    def _run_stages(self):
+        try:
+            manifest = self._load_manifest()
+
+            ingestion_config = self.data_ingestion.ingestion_config
+            transformation_config = self.data_transformation.data_transformation_config
+            trainer_config = self.model_trainer.model_trainer_config
+
+            # Ingestion: source data -> raw, train and test splits
+            self._run_stage(
+                manifest,
+                name="ingestion",
+                inputs={
+                    "source_data": hash_file(ingestion_config.source_data_path),
+                    "config": describe_config(ingestion_config),
+                },
+                outputs=[
+                    ingestion_config.raw_data_path,
+                    ingestion_config.train_data_path,
+                    ingestion_config.test_data_path,
+                    *ingestion_config.csv_export_paths(),
+                ],
+                run=lambda: list(self.data_ingestion.initiate_data_ingestion()),
+            )
+
+            # Transformation: train and test splits -> fitted preprocessor and transformed arrays
+            transformed = {}
+
+            def run_transformation():
+                train_arr, test_arr, _ = self.data_transformation.initiate_data_transformation(
+                    ingestion_config.train_data_path, ingestion_config.test_data_path
+                )
+                transformed.update(train_arr=train_arr, test_arr=test_arr)
+
+            self._run_stage(
+                manifest,
+                name="transformation",
+                inputs={
+                    "train_data": hash_file(ingestion_config.train_data_path),
+                    "test_data": hash_file(ingestion_config.test_data_path),
+                    "preprocessor": repr(self.data_transformation.get_data_transformer_object()),
+                    "config": describe_config(transformation_config),
+                },
+                outputs=[
+                    transformation_config.preprocessor_obj_file_path,
+                    *transformation_config.array_file_paths(),
+                ],
+                run=run_transformation,
+            )
+
+            # Training: transformed arrays -> best model (memory-mapped from disk when transformation was skipped)
+            def run_training():
+                if not transformed:
+                    train_arr, test_arr = self.data_transformation.load_transformed_data()
+                    transformed.update(train_arr=train_arr, test_arr=test_arr)
+
+                return self.model_trainer.initiate_model_trainer(transformed["train_arr"], transformed["test_arr"])
+
+            r2_square, _ = self._run_stage(
+                manifest,
+                name="training",
+                inputs={
+                    "arrays": {path: hash_file(path) for path in transformation_config.array_file_paths()},
+                    # From the registry entries: building the estimators would import xgboost and catboost even
+                    # when the stage is skipped
+                    "candidates": self.model_trainer.describe_candidates(),
+                    "config": describe_config(trainer_config),
+                },
+                outputs=[trainer_config.trained_model_file_path, trainer_config.selection_file_path],
+                run=run_training,
+            )
+
+            # Export: model and preprocessor -> compiled inference artifact, checked on the test split
+            self._run_export_stage(manifest)
+            self._publish_artifacts()
+
+            return r2_square
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def run_incremental(self, new_data_path):
+        """
+        Method Name : run_incremental
+        Description : This method updates the trained model with new rows instead of running the full model search:
+                      the rows are transformed with the saved preprocessor and the model continues training on them
+                      (ModelTrainer.initiate_incremental_training), validated on the held-out test split. A kept update
+                      is recorded in the manifest under the training stage, so the next run_pipeline does not redo the
+                      search for it, and the export stage is rerun for the new model. The full search still runs when
+                      the training data or configuration change, or with --force.
+        Parameters :
+            new_data_path (str): The file holding the new rows, with the columns of the source data.
+        Returns : The incremental training report.
+        On Failure : Raises a CustomException if any error occurs during the process.
+        """
+
+        run_profiler = RunProfiler(self.run_profiler_config, name="incremental")
+        try:
+            with run_profiler:
+                return self._run_incremental(new_data_path)
+        finally:
+            self.last_run_path = run_profiler.run_path
+
+    def _run_incremental(self, new_data_path):
+        try:
+            manifest = self._load_manifest()
+            trainer_config = self.model_trainer.model_trainer_config
+
+            new_arr = self.data_transformation.transform_new_data(new_data_path)
+            _, test_arr = self.data_transformation.load_transformed_data()
+
+            report = self.model_trainer.initiate_incremental_training(new_arr, test_arr)
+
+            if report["accepted"]:
+                model_path = trainer_config.trained_model_file_path
+                record = manifest["stages"].get("training")
+                if record is not None:
+                    record["outputs"][model_path] = hash_file(model_path)
+                    record["result"] = report["updated_r2"]
+                    record.setdefault("incremental_updates", []).append({
+                        "new_data": hash_file(new_data_path),
+                        "rows": report["rows"],
+                        "baseline_r2": report["baseline_r2"],
+                        "updated_r2": report["updated_r2"],
+                        "completed_at": datetime.now().isoformat(timespec="seconds"),
+                    })
+                    self._save_manifest(manifest)
+
+                self._run_export_stage(manifest)
+                self._publish_artifacts()
+
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the training pipeline, skipping stages that are up to date.")
+    parser.add_argument("--force", action="store_true", help="rerun every stage regardless of the manifest")
+    parser.add_argument("--profile", choices=PROFILERS, default=RunProfilerConfig().profiler,
+                        help="also dump a profile of the run (defaults to the TRAINING_PROFILER environment variable)")
+    parser.add_argument("--incremental", metavar="NEW_DATA",
+                        help="continue training the saved model on the rows of this file instead of a full search")
+    args = parser.parse_args()
+
+    pipeline = TrainPipeline(force=args.force, run_profiler_config=RunProfilerConfig(profiler=args.profile))
+    if args.incremental:
+        print(pipeline.run_incremental(args.incremental))
+    else:
+        print(pipeline.run_pipeline())
+    print(f"Run record: {pipeline.last_run_path}")
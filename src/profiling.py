@@ -0,0 +1,325 @@
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from src.exception import CustomException
+from src.logger import logging
+
+# Set to "cprofile" or "pyinstrument" to also dump a profile of the whole run next to its run record
+PROFILER_ENV_VAR = "TRAINING_PROFILER"
+PROFILERS = ("cprofile", "pyinstrument")
+
+# Measurements currently open in this process, innermost last, so nested peaks survive a peak reset
+_open_measurements = []
+
+# The RunProfiler collecting the stages of this process, if any
+_active_profiler = None
+
+
+def _read_peak_rss():
+    """
+    Function Name : _read_peak_rss
+    Description : This function returns the peak resident set size of the process since the last reset. On Linux it
+                  reads VmHWM, which _reset_peak_rss can rewind; elsewhere it falls back to ru_maxrss, the peak over
+                  the whole process lifetime.
+    Returns :
+        int: The peak RSS in bytes.
+    """
+
+    try:
+        with open("/proc/self/status") as file_obj:
+            for line in file_obj:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as file_obj:
+            file_obj.write("5")
+    except OSError:
+        pass
+
+
+@contextmanager
+def measure(**extra):
+    """
+    Function Name : measure
+    Description : This context manager measures the wall time, the CPU time of every thread of the process and the
+                  peak RSS reached inside the block, and stores them in the dict it yields. The block may add its own
+                  values (e.g. rows) to that dict. Measurements nest: the peak of an inner block is folded into the
+                  blocks around it before the peak counter is reset.
+    Parameters :
+        extra: Values stored with the measurement.
+    Returns : A dict with wall_time, cpu_time (seconds) and peak_rss_mb once the block has exited.
+    """
+
+    metrics = dict(extra)
+    state = {"peak": _read_peak_rss()}
+
+    for outer in _open_measurements:
+        outer["peak"] = max(outer["peak"], state["peak"])
+    _reset_peak_rss()
+    state["peak"] = _read_peak_rss()
+    _open_measurements.append(state)
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield metrics
+    finally:
+        wall_time, cpu_time = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        peak = _read_peak_rss()
+        del _open_measurements[next(i for i, open_state in enumerate(_open_measurements) if open_state is state)]
+        for measurement in (*_open_measurements, state):
+            measurement["peak"] = max(measurement["peak"], peak)
+
+        metrics.update(wall_time=wall_time, cpu_time=cpu_time, peak_rss_mb=round(state["peak"] / 1024 ** 2, 1))
+
+
+@dataclass
+class RunProfilerConfig:
+    """
+    Class Name : RunProfilerConfig
+    Description : This class holds the configuration for the run records of the training pipeline.
+    Attributes :
+        runs_dir (str): The directory the run records and profile dumps are written to.
+        profiler (str, optional): "cprofile" or "pyinstrument" to also profile the run, None to only record the
+                                  stages. Defaults to the TRAINING_PROFILER environment variable.
+    """
+
+    runs_dir: str = os.path.join("artifacts", "runs")
+    profiler: Optional[str] = field(default_factory=lambda: os.environ.get(PROFILER_ENV_VAR) or None)
+
+
+class RunProfiler:
+    """
+    Class Name : RunProfiler
+    Description : This class records one training run. While it is active (as a context manager), the instrumented
+                  components add a stage to it through profile_stage and record_stage, with the wall time, CPU time,
+                  peak RSS and rows processed of every stage and the number of fits of every model. On exit it writes
+                  a JSON run record to runs_dir, and a cProfile or pyinstrument dump when a profiler is configured.
+    Attributes :
+        run_profiler_config (RunProfilerConfig): The run record configuration.
+        run_id (str): The run identifier, also the base name of the written files.
+        stages (list): The recorded stages, in the order they finished.
+    Methods :
+        stage(name, **extra): Context manager measuring a stage.
+        add_stage(name, **metrics): Records a stage measured elsewhere, e.g. in a worker process.
+        record(): Returns the run record.
+    """
+
+    def __init__(self, config=None, name="train"):
+        """
+        Method Name : __init__
+        Description : This is the constructor method for the RunProfiler class.
+        Parameters :
+            config (RunProfilerConfig, optional): The run record configuration.
+            name (str): The kind of run, stored in the record.
+        """
+
+        self.run_profiler_config = config or RunProfilerConfig()
+        self.name = name
+        self.run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.stages = []
+        self.status = None
+        self.error = None
+        self.run_path = None
+        self.profile_path = None
+        self._stage_path = []
+        self._profiler = None
+        self._run_measurement = None
+
+        if self.run_profiler_config.profiler not in (None, *PROFILERS):
+            raise ValueError(f"Unknown profiler {self.run_profiler_config.profiler!r}, expected one of {PROFILERS}")
+
+    @contextmanager
+    def stage(self, name, **extra):
+        """
+        Method Name : stage
+        Description : This context manager measures a stage and records it when the block exits, also when it raises.
+                      Stages opened inside another stage are named "<outer>/<inner>".
+        Parameters :
+            name (str): The stage name.
+            extra: Values stored with the stage.
+        Returns : The stage dict, which the block may complete (e.g. with rows).
+        """
+
+        self._stage_path.append(name)
+        path = "/".join(self._stage_path)
+        try:
+            with measure(**extra) as metrics:
+                yield metrics
+        finally:
+            self._stage_path.pop()
+            self.stages.append({"name": path, **metrics})
+
+    def add_stage(self, name, **metrics):
+        """
+        Method Name : add_stage
+        Description : This method records a stage measured elsewhere, under the stage currently open.
+        Parameters :
+            name (str): The stage name.
+            metrics: The stage values (wall_time, cpu_time, peak_rss_mb, rows, ...).
+        """
+
+        self.stages.append({"name": "/".join([*self._stage_path, name]), **metrics})
+
+    def _start_profiler(self):
+        profiler = self.run_profiler_config.profiler
+        if profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logging.info("pyinstrument is not installed, profiling the run with cProfile instead")
+                profiler = "cprofile"
+            else:
+                self._profiler = Profiler()
+                self._profiler.start()
+                return
+
+        if profiler == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def _stop_profiler(self):
+        if self._profiler is None:
+            return
+
+        runs_dir = self.run_profiler_config.runs_dir
+        if hasattr(self._profiler, "dump_stats"):
+            self._profiler.disable()
+            self.profile_path = os.path.join(runs_dir, f"{self.run_id}.prof")
+            self._profiler.dump_stats(self.profile_path)
+        else:
+            self._profiler.stop()
+            self.profile_path = os.path.join(runs_dir, f"{self.run_id}.html")
+            with open(self.profile_path, "w") as file_obj:
+                file_obj.write(self._profiler.output_html())
+
+        self._profiler = None
+
+    def record(self):
+        """
+        Method Name : record
+        Description : This method returns the run record.
+        Returns : A JSON serializable dict with the run metadata, its totals, every stage and the fits per model.
+        """
+
+        fits_per_model = {
+            stage["model"]: stage["n_fits"] for stage in self.stages if "model" in stage and "n_fits" in stage
+        }
+
+        return {
+            "run_id": self.run_id,
+            "name": self.name,
+            "status": self.status,
+            "error": self.error,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "total": self._run_measurement,
+            "stages": self.stages,
+            "fits_per_model": fits_per_model,
+            "profile_path": self.profile_path,
+        }
+
+    def __enter__(self):
+        global _active_profiler
+
+        if _active_profiler is not None:
+            raise RuntimeError("A RunProfiler is already active in this process")
+
+        os.makedirs(self.run_profiler_config.runs_dir, exist_ok=True)
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self._measurement_cm = measure(started_at=self.started_at)
+        self._run_measurement = self._measurement_cm.__enter__()
+        self._start_profiler()
+        _active_profiler = self
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _active_profiler
+
+        _active_profiler = None
+        try:
+            self._stop_profiler()
+            self._measurement_cm.__exit__(None, None, None)
+            self._run_measurement["finished_at"] = datetime.now().isoformat(timespec="seconds")
+            self.status = "failed" if exc_type is not None else "completed"
+            self.error = None if exc_value is None else str(exc_value)
+
+            self.run_path = os.path.join(self.run_profiler_config.runs_dir, f"{self.run_id}.json")
+            tmp_path = f"{self.run_path}.tmp"
+            with open(tmp_path, "w") as file_obj:
+                json.dump(self.record(), file_obj, indent=2, default=str)
+            os.replace(tmp_path, self.run_path)
+
+            logging.info(f"Wrote run record {self.run_path}"
+                         + (f" and profile {self.profile_path}" if self.profile_path else ""))
+        except Exception as e:
+            # Never hide the error of the run itself behind a failure to record it
+            if exc_type is None:
+                raise CustomException(e, sys)
+            logging.info(f"Could not write the run record: {e}")
+
+        return False
+
+
+def current_profiler():
+    """
+    Function Name : current_profiler
+    Description : This function returns the RunProfiler active in this process.
+    Returns :
+        RunProfiler: The active profiler, or None when no run is being recorded.
+    """
+
+    return _active_profiler
+
+
+@contextmanager
+def profile_stage(name, **extra):
+    """
+    Function Name : profile_stage
+    Description : This context manager records a stage in the active RunProfiler. Without an active profiler the
+                  block runs unmeasured and the yielded dict is simply discarded, so components can always use it.
+    Parameters :
+        name (str): The stage name.
+        extra: Values stored with the stage.
+    Returns : The stage dict, which the block may complete (e.g. with rows).
+    """
+
+    if _active_profiler is None:
+        yield dict(extra)
+        return
+
+    with _active_profiler.stage(name, **extra) as metrics:
+        yield metrics
+
+
+def record_stage(name, **metrics):
+    """
+    Function Name : record_stage
+    Description : This function records a stage measured elsewhere in the active RunProfiler, if any.
+    Parameters :
+        name (str): The stage name.
+        metrics: The stage values.
+    """
+
+    if _active_profiler is not None:
+        _active_profiler.add_stage(name, **metrics)
@@ -1,77 +1,603 @@
+import hashlib
+import inspect
 import os
 import sys
+import time
+
+import json
 
 import numpy as np 
 import pandas as pd
-import dill
-import pickle
-
-from sklearn.model_selection import GridSearchCV
-from sklearn.metrics import r2_score
+from scipy import sparse
+import joblib
+from joblib import Parallel, cpu_count, delayed, parallel_config
 
 from src.exception import CustomException
+from src.logger import logging
+from src.profiling import measure, record_stage
+
+# Models fit directly on sparse (CSR) features; the others get one shared dense copy. XGBoost is left out on purpose:
+# it treats entries absent from a sparse matrix as missing rather than zero, so a model fit on CSR features would
+# predict differently on the dense rows of the serving path.
+SPARSE_INPUT_MODELS = (
+    "LinearRegression",
+    "DecisionTreeRegressor",
+    "RandomForestRegressor",
+    "GradientBoostingRegressor",
+    "KNeighborsRegressor",
+    "AdaBoostRegressor",
+)
+
+# Version of the artifact layout written by save_object; load_object refuses artifacts from newer versions
+ARTIFACT_FORMAT_VERSION = 1
+
+# Constructor parameters that set the number of native threads an estimator uses
+# (scikit-learn / XGBoost use n_jobs, CatBoost uses thread_count)
+MODEL_THREAD_PARAMS = ("n_jobs", "thread_count")
+
+def _artifact_header_path(file_path):
+    return file_path + ".meta.json"
 
-def save_object(file_path, obj):
+def read_artifact_header(file_path):
+
+    """
+    Function Name : read_artifact_header
+    Description : This function returns the header that save_object writes next to an artifact.
+    Parameters :
+        file_path (str): The file path of the saved object.
+    Returns :
+        dict: The header (format version, serializer, compression, size and SHA-256 checksum of the payload), or None
+              for artifacts saved without one.
+    On Failure : Raises a CustomException if any error occurs during the process.
+    """
+
+    try:
+        header_path = _artifact_header_path(file_path)
+        if not os.path.exists(header_path):
+            return None
+
+        with open(header_path) as file_obj:
+            return json.load(file_obj)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def save_object(file_path, obj, compress=0):
     
     """"
     Function Name : save_object
-    Description : This function saves a Python object to a specified file path using dill serialization.
+    Description : This function saves a Python object to a specified file path using joblib serialization, which stores
+                  numpy buffers (e.g. the node arrays of fitted trees) raw so they can be memory-mapped when loading.
+                  The object is written to a temporary file that is renamed over file_path once complete, so readers
+                  never see a half-written artifact, and a header with the format version and a checksum is written to
+                  file_path + ".meta.json".
     Parameters :
         file_path (str): The file path where the object will be saved.
         obj (any): The Python object to be saved.
+        compress (int): The joblib compression level from 0 (none, allows memory-mapping) to 9.
     On Failure : Raises a CustomException if any error occurs during the process.
     """
 
     try:
         dir_path = os.path.dirname(file_path)
 
-        os.makedirs(dir_path, exist_ok=True)
+        os.makedirs(dir_path or ".", exist_ok=True)
+
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        try:
+            joblib.dump(obj, tmp_path, compress=compress)
+            with open(tmp_path, "rb") as file_obj:
+                os.fsync(file_obj.fileno())
+
+            header = {
+                "format_version": ARTIFACT_FORMAT_VERSION,
+                "serializer": "joblib",
+                "compress": compress,
+                "object_type": f"{type(obj).__module__}.{type(obj).__qualname__}",
+                "size": os.path.getsize(tmp_path),
+                "sha256": hash_file(tmp_path),
+            }
+
+            os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        header_path = _artifact_header_path(file_path)
+        with open(header_path + ".tmp", "w") as file_obj:
+            json.dump(header, file_obj, indent=2)
+        os.replace(header_path + ".tmp", header_path)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def load_object(file_path, mmap_mode=None, verify=False):
+
+    """
+    Function Name : load_object
+    Description : This function loads a Python object that was previously saved with save_object. Plain pickle files
+                  without a header load as well.
+    Parameters :
+        file_path (str): The file path of the saved object.
+        mmap_mode (str, optional): "r" memory-maps the numpy buffers of an uncompressed artifact instead of reading
+                                   them into memory, which makes large tree ensembles much faster to load.
+        verify (bool): Whether to check the payload against the checksum in the header before loading it.
+    Returns :
+        any: The deserialized Python object.
+    On Failure : Raises a CustomException if any error occurs during the process.
+    """
+
+    try:
+        header = read_artifact_header(file_path)
+
+        if header is not None:
+            if header["format_version"] > ARTIFACT_FORMAT_VERSION:
+                raise ValueError(f"{file_path} has artifact format version {header['format_version']}, "
+                                 f"this code reads up to version {ARTIFACT_FORMAT_VERSION}")
+            if verify and hash_file(file_path) != header["sha256"]:
+                raise ValueError(f"Checksum mismatch for {file_path}, the artifact is corrupt or being replaced")
+            if header["compress"]:
+                # Compressed buffers cannot be memory-mapped
+                mmap_mode = None
+
+        return joblib.load(file_path, mmap_mode=mmap_mode)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def hash_file(file_path, chunk_size=1024 * 1024):
 
-        with open(file_path, "wb") as file_obj:
-            pickle.dump(obj, file_obj)
+    """
+    Function Name : hash_file
+    Description : This function returns the SHA-256 digest of a file's content, read in chunks.
+    Parameters :
+        file_path (str): The path of the file to hash.
+        chunk_size (int): The number of bytes read at a time.
+    Returns :
+        str: The hex digest of the file content.
+    On Failure : Raises a CustomException if any error occurs during the process.
+    """
+
+    try:
+        digest = hashlib.sha256()
+
+        with open(file_path, "rb") as file_obj:
+            for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+                digest.update(chunk)
+
+        return digest.hexdigest()
 
     except Exception as e:
         raise CustomException(e, sys)
-def evaluate_models(X_train, y_train, X_test, y_test, models, param):
+
+def artifact_digest(file_path):
+
+    """
+    Function Name : artifact_digest
+    Description : This function returns the SHA-256 digest of an artifact, read from the header save_object wrote
+                  next to it when there is one, so large artifacts are not hashed again.
+    Parameters :
+        file_path (str): The file path of the saved object.
+    Returns :
+        str: The hex digest of the artifact payload.
+    On Failure : Raises a CustomException if any error occurs during the process.
+    """
+
+    header = read_artifact_header(file_path)
+    return header["sha256"] if header is not None else hash_file(file_path)
+
+def write_version_manifest(manifest_path, artifacts):
+
+    """
+    Function Name : write_version_manifest
+    Description : This function publishes a set of artifacts that belong together (e.g. a model and the preprocessor
+                  it was trained on) by writing their digests to a version manifest. The version is derived from the
+                  digests, so publishing unchanged artifacts again keeps it. Serving processes watch this file to know
+                  when a complete, consistent set is ready to be loaded.
+    Parameters :
+        manifest_path (str): The file path of the version manifest.
+        artifacts (dict): The artifact names (e.g. "model", "preprocessor") mapped to their file paths.
+    Returns :
+        dict: The written manifest.
+    On Failure : Raises a CustomException if any error occurs during the process.
+    """
+
+    try:
+        entries = {
+            name: {"path": file_path, "sha256": artifact_digest(file_path)}
+            for name, file_path in sorted(artifacts.items())
+        }
+        version = hashlib.sha256(
+            json.dumps({name: entry["sha256"] for name, entry in entries.items()}, sort_keys=True).encode()
+        ).hexdigest()[:12]
+
+        manifest = {
+            "version": version,
+            "published_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "artifacts": entries,
+        }
+
+        os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+        with open(manifest_path + ".tmp", "w") as file_obj:
+            json.dump(manifest, file_obj, indent=2)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+        return manifest
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def write_frame(df, file_path):
+
+    """
+    Function Name : write_frame
+    Description : This function saves a DataFrame in the format given by the file extension: .parquet and .feather are
+                  binary columnar formats in which text columns are stored as typed categoricals, .csv is plain text.
+    Parameters :
+        df (pandas.DataFrame): The DataFrame to save.
+        file_path (str): The destination path.
+    On Failure : Raises a CustomException if any error occurs during the process.
+    """
+
+    try:
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        extension = os.path.splitext(file_path)[1].lower()
+
+        if extension == ".csv":
+            df.to_csv(file_path, index=False, header=True)
+            return
+
+        object_columns = df.select_dtypes(include="object").columns
+        df = df.astype({column: "category" for column in object_columns}).reset_index(drop=True)
+
+        if extension == ".parquet":
+            df.to_parquet(file_path, index=False)
+        elif extension == ".feather":
+            df.to_feather(file_path)
+        else:
+            raise ValueError(f"Unsupported data format {extension!r} for {file_path}")
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def read_frame(file_path):
+
+    """
+    Function Name : read_frame
+    Description : This function loads a DataFrame saved by write_frame, choosing the reader from the file extension.
+    Parameters :
+        file_path (str): The path of the saved DataFrame.
+    Returns :
+        pandas.DataFrame: The loaded DataFrame.
+    On Failure : Raises a CustomException if any error occurs during the process.
+    """
+
+    try:
+        extension = os.path.splitext(file_path)[1].lower()
+
+        if extension == ".csv":
+            return pd.read_csv(file_path)
+        if extension == ".parquet":
+            return pd.read_parquet(file_path)
+        if extension == ".feather":
+            return pd.read_feather(file_path)
+
+        raise ValueError(f"Unsupported data format {extension!r} for {file_path}")
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def iter_frame_chunks(file_path, chunk_size):
+
+    """
+    Function Name : iter_frame_chunks
+    Description : This function reads a CSV or Parquet file as a sequence of DataFrames of at most chunk_size rows,
+                  so the whole file never has to fit in memory.
+    Parameters :
+        file_path (str): The path of the file to read.
+        chunk_size (int): The maximum number of rows per chunk.
+    Returns :
+        iterator: The DataFrame chunks in file order.
+    On Failure : Raises a CustomException if any error occurs during the process.
+    """
+
+    try:
+        extension = os.path.splitext(file_path)[1].lower()
+
+        if extension == ".csv":
+            yield from pd.read_csv(file_path, chunksize=chunk_size)
+        elif extension == ".parquet":
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas()
+        else:
+            raise ValueError(f"Chunked reading is not supported for {extension!r} files: {file_path}")
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+class FrameChunkWriter:
+    """
+    Class Name : FrameChunkWriter
+    Description : This class appends DataFrame chunks to a single CSV or Parquet file. Like write_frame, text columns
+                  are stored as categoricals in Parquet; every chunk is cast to the schema of the first one.
+    Attributes :
+        file_path (str): The destination path.
+        n_rows (int): The number of rows written so far.
+    Methods :
+        write(df): Appends a chunk.
+        close(): Flushes and closes the file. No file is created if no chunk was written.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.extension = os.path.splitext(file_path)[1].lower()
+        self.n_rows = 0
+        self._writer = None
+        self._schema = None
+
+        if self.extension not in (".csv", ".parquet"):
+            raise CustomException(ValueError(f"Chunked writing is not supported for {self.extension!r} files"), sys)
+
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    def write(self, df):
+        if len(df) == 0:
+            return
+
+        try:
+            if self.extension == ".csv":
+                df.to_csv(self.file_path, mode="a", index=False, header=self.n_rows == 0)
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                object_columns = df.select_dtypes(include="object").columns
+                df = df.astype({column: "category" for column in object_columns})
+
+                if self._writer is None:
+                    schema = pa.Schema.from_pandas(df, preserve_index=False)
+                    # Use wide dictionary indices so later chunks with more categories still fit the schema
+                    for i, field in enumerate(schema):
+                        if pa.types.is_dictionary(field.type):
+                            schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), field.type.value_type)))
+                    self._schema = schema
+                    self._writer = pq.ParquetWriter(self.file_path, self._schema)
+
+                self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+
+            self.n_rows += len(df)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _evaluate_model(model, params, X_train, y_train, X_test, y_test, n_jobs=1, search="grid",
+                    early_stopping=False, time_budget=None, return_train_score=False):
+    """
+    Function Name : _evaluate_model
+    Description : This function tunes a single model with the given search strategy and scores the refit best
+                  estimator on the test data. It is module level so it can be shipped to a worker process.
+    Parameters :
+        model (estimator): The model instance to tune.
+        params (dict): The hyperparameter grid of the model.
+        X_train, y_train, X_test, y_test (numpy.ndarray): The training and testing data.
+        n_jobs (int): The number of processes the search may use for its candidates and CV folds.
+        search (str): The name of the search strategy in SEARCH_STRATEGIES.
+        early_stopping (bool): Whether boosting models use native early stopping instead of searching their rounds.
+        time_budget (float, optional): The wall-clock budget of the search in seconds.
+        return_train_score (bool): Whether to also predict the training data and report its R2 score.
+    Returns :
+        tuple: The model report entry and the fitted best estimator.
+    """
+
+    # Training-only dependencies are imported on use so that loading artifacts for serving stays light
+    from sklearn.metrics import r2_score
+    from src.model_search import SEARCH_STRATEGIES, count_grid_fits, enable_early_stopping
+
+    with measure() as metrics:
+        start = time.perf_counter()
+        n_fits_full = count_grid_fits(params)
+
+        if early_stopping:
+            early_stopping, params = enable_early_stopping(model, params)
+
+        result = SEARCH_STRATEGIES[search](
+            model, params, X_train, y_train, n_jobs=n_jobs, early_stopping=early_stopping, time_budget=time_budget
+        )
+        best_model = result["best_estimator"]
+        search_time = time.perf_counter() - start
+
+        predict_start = time.perf_counter()
+        y_test_pred = best_model.predict(X_test)
+        predict_time = time.perf_counter() - predict_start
+
+        report = {
+            "test_score": r2_score(y_test, y_test_pred),
+            "best_params": result["best_params"],
+            "search": search,
+            "n_fits": result["n_fits"],
+            "n_fits_saved": n_fits_full - result["n_fits"],
+            "budget_exhausted": result["budget_exhausted"],
+            "search_time": search_time,
+            "refit_time": result["refit_time"],
+            "predict_time": predict_time,
+        }
+
+        if return_train_score:
+            report["train_score"] = r2_score(y_train, best_model.predict(X_train))
+
+    report["total_time"] = time.perf_counter() - start
+    # Measured in the process running the search; CV workers of a nested pool are not included
+    report["cpu_time"] = metrics["cpu_time"]
+    report["peak_rss_mb"] = metrics["peak_rss_mb"]
+
+    return report, best_model
+
+def _evaluate_model_in_worker(model, params, X_train, y_train, X_test, y_test, n_jobs, **search_options):
+    """
+    Function Name : _evaluate_model_in_worker
+    Description : This function runs _evaluate_model inside a pool worker. The model's own threads are capped to one and
+                  the search gets a nested process pool of n_jobs workers with single-threaded native libraries, so the
+                  worker never uses more than its share of the CPU budget.
+    Returns :
+        tuple: The model report entry and the fitted best estimator.
+    """
+
+    current_params = model.get_params()
+    # CatBoost only reports explicitly set parameters, so also look at the constructor signature
+    supported_params = set(current_params) | set(inspect.signature(type(model).__init__).parameters)
+    thread_params = [key for key in MODEL_THREAD_PARAMS if key in supported_params]
+    # CatBoost refuses set_params once fitted and takes its prediction threads from predict() anyway,
+    # so only n_jobs needs to be restored after the search
+    original_thread_params = {key: current_params[key] for key in thread_params if key == "n_jobs"}
+    model.set_params(**{key: 1 for key in thread_params})
+
+    with parallel_config(backend="loky", inner_max_num_threads=1):
+        model_report, model = _evaluate_model(
+            model, params, X_train, y_train, X_test, y_test, n_jobs=n_jobs, **search_options
+        )
+
+    # Give the fitted model back its original threading so it predicts as it would in the serial path
+    if original_thread_params:
+        model.set_params(**original_thread_params)
+
+    return model_report, model
+
+def evaluate_models(X_train, y_train, X_test, y_test, models, param, n_jobs=1, search="grid",
+                    early_stopping=False, time_budget=None, return_train_score=False, fit_cache=None):
     """
     Function Name : evaluate_models
     Description : This function evaluates multiple machine learning models using the provided training and testing data,
-                  along with hyperparameter tuning. It returns a report of model performance.   
+                  along with hyperparameter tuning. It returns a report of model performance.
     Parameters :
-        X_train (numpy.ndarray): The training input features.
+        X_train (numpy.ndarray | scipy.sparse matrix): The training input features. Sparse features are passed as-is
+                                                       to the SPARSE_INPUT_MODELS and densified once for the others.
         y_train (numpy.ndarray): The training target variable.
-        X_test (numpy.ndarray): The testing input features.
+        X_test (numpy.ndarray | scipy.sparse matrix): The testing input features, in the same layout as X_train.
         y_test (numpy.ndarray): The testing target variable.
         models (dict): A dictionary containing model names as keys and model instances as values.
         param (dict): A dictionary containing model names as keys and hyperparameter grids as values.
+        n_jobs (int): The global CPU budget. 1 evaluates the models one after another in this process, -1 uses every
+                      available core. Above 1, the models run concurrently in a process pool and the remaining budget
+                      is spent on parallel CV folds inside each model's search.
+        search (str): The search strategy, "grid" (exhaustive GridSearchCV, the reference) or "halving"
+                      (successive halving over n_estimators/iterations or the number of samples).
+        early_stopping (bool): If True, Gradient Boosting, XGBoost and CatBoost use native early stopping instead of
+                               searching their number of rounds.
+        time_budget (float, optional): The wall-clock budget in seconds of each model's search.
+        return_train_score (bool): Whether to also report the R2 score on the training data (train_score).
+        fit_cache (FitCache, optional): A persistent cache of tuned models. Models whose data, parameters, grid and
+                                        search configuration are unchanged are read from it instead of being refit.
     Returns :
-        dict: A dictionary containing model names as keys and their corresponding R2 scores as values.
+        dict: A dictionary containing model names as keys and a report per model as values, holding the R2 score on
+              the test data (test_score), the best parameters, the number of search fits made (n_fits) and saved
+              compared to the exhaustive grid (n_fits_saved), whether the time budget ran out, and the search, refit,
+              test prediction and total times in seconds, the CPU time and peak RSS of the search process
+              (cpu_time, peak_rss_mb), and whether it came from the fit cache (cached). The refit
+              best estimators replace the model instances in the models dictionary.
     On Failure : Raises a CustomException if any error occurs during the process.
     """
 
+    from src.model_search import CV_FOLDS, SEARCH_STRATEGIES
+
     try:
-        report = {}
+        if search not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy {search!r}, expected one of {list(SEARCH_STRATEGIES)}")
+
+        search_options = {
+            "search": search,
+            "early_stopping": early_stopping,
+            "time_budget": time_budget,
+            "return_train_score": return_train_score,
+        }
+        results = {}
+        cache_keys = {}
+
+        if fit_cache is not None:
+            cache_options = dict(search_options, cv_folds=CV_FOLDS)
+            for model_name, model in models.items():
+                cache_keys[model_name] = fit_cache.make_key(
+                    model, param[model_name], [X_train, y_train, X_test, y_test], cache_options
+                )
+                cached = fit_cache.get(cache_keys[model_name])
+                if cached is not None:
+                    logging.info(f"Reusing cached fit of {model_name}")
+                    results[model_name] = (dict(cached[0], cached=True), cached[1])
 
-        for i in range(len(models)):
-            model = list(models.values())[i]
-            model_name = list(models.keys())[i]
-            params = param[model_name]
+        pending = [model_name for model_name in models if model_name not in results]
+        cpu_budget = cpu_count() if n_jobs is None or n_jobs < 1 else n_jobs
 
-            gs = GridSearchCV(model, params, cv=3)
-            gs.fit(X_train, y_train)
+        dense_inputs = []
 
-            model.set_params(**gs.best_params_)
-            model.fit(X_train, y_train)
+        def model_inputs(model_name):
+            # Sparse features go as-is to models that accept them; the others share a single dense copy
+            if not sparse.issparse(X_train) or type(models[model_name]).__name__ in SPARSE_INPUT_MODELS:
+                return X_train, y_train, X_test, y_test
+            if not dense_inputs:
+                logging.info("Densifying the sparse features once for the models without sparse support")
+                dense_inputs.extend([X_train.toarray(), X_test.toarray()])
+            return dense_inputs[0], y_train, dense_inputs[1], y_test
 
-            y_train_pred = model.predict(X_train)
-            y_test_pred = model.predict(X_test)
+        if cpu_budget == 1 or len(pending) == 0:
+            fitted = [
+                _evaluate_model(models[model_name], param[model_name], *model_inputs(model_name), **search_options)
+                for model_name in pending
+            ]
+        else:
+            # Split the budget between concurrent models and the CV folds of each model
+            outer_jobs = min(len(pending), cpu_budget)
+            inner_jobs = max(1, cpu_budget // outer_jobs)
+            logging.info(f"Evaluating models with a CPU budget of {cpu_budget}: "
+                         f"{outer_jobs} concurrent models x {inner_jobs} CV workers")
 
-            train_model_score = r2_score(y_train, y_train_pred)
-            test_model_score = r2_score(y_test, y_test_pred)
+            fitted = Parallel(n_jobs=outer_jobs, backend="loky")(
+                delayed(_evaluate_model_in_worker)(
+                    models[model_name], param[model_name], *model_inputs(model_name), inner_jobs, **search_options
+                )
+                for model_name in pending
+            )
 
-            report[model_name] = test_model_score
+        for model_name, (model_report, model) in zip(pending, fitted):
+            model_report["cached"] = False
+            results[model_name] = (model_report, model)
+            if fit_cache is not None:
+                fit_cache.put(cache_keys[model_name], model_report, model)
+
+        report = {}
+
+        for model_name in models:
+            model_report, model = results[model_name]
+            models[model_name] = model
+            report[model_name] = model_report
+
+            # A cached model made no fit in this run, its timings are those of the run that fitted it
+            cached = model_report["cached"]
+            record_stage(
+                f"fit {model_name}",
+                model=model_name,
+                rows=X_train.shape[0],
+                n_fits=0 if cached else model_report["n_fits"],
+                cached=cached,
+                wall_time=0.0 if cached else model_report["total_time"],
+                cpu_time=0.0 if cached else model_report.get("cpu_time"),
+                peak_rss_mb=None if cached else model_report.get("peak_rss_mb"),
+            )
 
         return report
 
     except Exception as e:
-        raise CustomException(e, sys)
\ No newline at end of file
+        raise CustomException(e, sys)